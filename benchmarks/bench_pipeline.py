@@ -0,0 +1,391 @@
+"""
+Benchmark the post pipeline against local fakes of Instagram, OpenAI and Firebase.
+
+Each batch size runs in a fresh process so peak RSS is measured per run:
+
+    python benchmarks/bench_pipeline.py --sizes 1 10 100 --output results.json
+    python benchmarks/bench_pipeline.py --baseline results.json
+"""
+
+import argparse
+import asyncio
+import functools
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# main.py is imported through the ``src`` package, while its subpackages import
+# each other as top-level packages, so both directories go on the path.
+for path in (ROOT, os.path.join(ROOT, "src")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import openai  # noqa: E402
+
+from benchmarks.fakes import (  # noqa: E402
+    FakeDownloader,
+    FakeOpenAIServer,
+    FakeTranscriber,
+    make_canned_media,
+)
+from metrics import get_metrics  # noqa: E402
+from src.firebase.client import FirebaseClient  # noqa: E402
+from src.firebase.store import SQLiteDocumentStore  # noqa: E402
+from src.models.cookbook import Cookbook  # noqa: E402
+from src.models.user import User  # noqa: E402
+from src.pipeline import StageStats  # noqa: E402
+from src.scraper.openai_client import AsyncOpenAIClient  # noqa: E402
+from src.scraper.recipe_classifier import RecipeScorer  # noqa: E402
+from src.scraper.recipe_generator import RecipeGenerator  # noqa: E402
+from src.scraper.transcriber import BatchTranscriber, Transcriber  # noqa: E402
+
+# ``src`` exports the ``main`` function under the module's name, so fetch the
+# module itself.
+recipe_main = importlib.import_module("src.main")
+
+DEFAULT_SIZES = [1, 10, 50, 100, 500]
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+MEDIA_DIR = os.path.join(ROOT, ".cache", "bench_media")
+
+
+def _timed(stats: StageStats, func: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.monotonic()
+        if stats.started_at is None:
+            stats.started_at = start
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            stats.failed += 1
+            raise
+        else:
+            stats.processed += 1
+            return result
+        finally:
+            stats.finished_at = time.monotonic()
+            stats.busy_seconds += stats.finished_at - start
+
+    return wrapper
+
+
+def _run_serial(
+    urls: List[str],
+    downloader: FakeDownloader,
+    user: User,
+    cookbook: Cookbook,
+    generator: RecipeGenerator,
+    firebase_client: FirebaseClient,
+    transcriber: Transcriber,
+) -> Dict[str, Dict]:
+    stages = {
+        name: StageStats() for name in ("audio", "transcribe", "generate", "persist")
+    }
+    # process_post looks these helpers up at call time, so wrapping them here
+    # times each step without changing the code under test.
+    recipe_main.get_audio = _timed(stages["audio"], recipe_main.get_audio)
+    recipe_main.get_transcript = _timed(
+        stages["transcribe"], recipe_main.get_transcript
+    )
+    generator.generate_recipe = _timed(  # type: ignore[method-assign]
+        stages["generate"], generator.generate_recipe
+    )
+    user.add_recipe = _timed(  # type: ignore[method-assign]
+        stages["persist"], user.add_recipe
+    )
+    fingerprints = recipe_main.FingerprintIndex(firebase_client)
+    for url in urls:
+        recipe_main.process_post(
+            downloader,
+            url,
+            user,
+            cookbook,
+            generator,
+            firebase_client,
+            local=True,
+            transcriber=transcriber,
+            fingerprints=fingerprints,
+        )
+    return {name: stats.to_dict() for name, stats in stages.items()}
+
+
+def run_once(size: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one batch of fake posts through the pipeline and measure it.
+
+    Args:
+        size (int): Number of posts.
+        options (dict): Benchmark options parsed from the command line.
+
+    Returns:
+        dict: Measurements for the run.
+    """
+    logging.getLogger().setLevel(options["log_level"])
+    get_metrics().enabled = True
+    os.chdir(tempfile.mkdtemp(prefix="recipe-bench-"))
+    media = make_canned_media(
+        MEDIA_DIR, options["media_count"], options["media_seconds"]
+    )
+    with FakeOpenAIServer(
+        options["openai_latency"], options["openai_failure_rate"]
+    ) as server:
+        openai.base_url = server.base_url
+        openai.api_key = "bench"
+        store = SQLiteDocumentStore(
+            ":memory:" if options["store"] == "memory" else "documents.sqlite3"
+        )
+        firebase_client = FirebaseClient(local=True, store=store)
+        downloader = FakeDownloader(
+            media, options["fetch_latency"], options["recipe_share"]
+        )
+        transcriber: Transcriber
+        if options["real_transcriber"]:
+            transcriber = (
+                BatchTranscriber(workers=options["transcribe_workers"])
+                if options["transcribe_workers"] > 1
+                else Transcriber()
+            )
+        else:
+            transcriber = FakeTranscriber(
+                options["transcribe_latency"], options["recipe_share"]
+            )
+        async_client = AsyncOpenAIClient(
+            api_key="bench",
+            base_url=server.base_url,
+            max_concurrency=options["concurrency"],
+        )
+        generator = RecipeGenerator(
+            local=True,
+            firebase_client=firebase_client,
+            scorer=RecipeScorer() if options["prefilter"] else None,
+            async_client=async_client,
+        )
+        user = User("bench-user", "Bench", "bench@example.com", firebase_client)
+        cookbook = Cookbook("bench-cookbook", "Bench", "", firebase_client)
+        with firebase_client.batch() as batch:
+            user.save(batch)
+            user.create_cookbook(cookbook, batch)
+        urls = [
+            f"https://www.instagram.com/reel/BENCH{index:05d}/" for index in range(size)
+        ]
+
+        started = time.monotonic()
+        if options["mode"] == "serial":
+            stages = _run_serial(
+                urls,
+                downloader,
+                user,
+                cookbook,
+                generator,
+                firebase_client,
+                transcriber,
+            )
+            asyncio.run(async_client.aclose())
+        else:
+            pipeline = recipe_main.build_pipeline(
+                downloader,
+                user,
+                cookbook,
+                generator,
+                firebase_client,
+                transcriber,  # type: ignore[arg-type]
+                local=True,
+                concurrency=options["concurrency"],
+                # The canned transcripts are near-duplicates of each other.
+                duplicate_threshold=None,
+            )
+            jobs = [
+                recipe_main.PostJob(
+                    url,
+                    downloader._get_shortcode(url),
+                    firebase_client.batch(),
+                    downloader.audio_path(downloader._get_shortcode(url)),
+                )
+                for url in urls
+            ]
+
+            async def run_jobs() -> None:
+                async with async_client:
+                    await pipeline.run_async(jobs)
+
+            asyncio.run(run_jobs())
+            stages = {stage.name: stage.stats.to_dict() for stage in pipeline.stages}
+        wall_seconds = time.monotonic() - started
+        if isinstance(transcriber, BatchTranscriber):
+            transcriber.close()
+        recipes = len(user.shortcodes)
+        openai_requests = server.requests
+        store.close()
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "size": size,
+        "mode": options["mode"],
+        "wall_seconds": round(wall_seconds, 3),
+        "posts_per_minute": round(size / wall_seconds * 60.0, 2),
+        "recipes": recipes,
+        "openai_requests": openai_requests,
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1
+        ),
+        "peak_child_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1
+        ),
+        "stages": stages,
+        "metrics": get_metrics().to_dict(),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict], baseline: List[Dict]) -> str:
+    """
+    Compare throughput, wall time and peak RSS against a baseline run.
+
+    Args:
+        results (list): Measurements of the current run.
+        baseline (list): Measurements of the baseline run.
+
+    Returns:
+        str: One line per batch size present in both runs.
+    """
+    previous = {(run["mode"], run["size"]): run for run in baseline}
+    lines = []
+    for run in results:
+        before = previous.get((run["mode"], run["size"]))
+        if before is None:
+            continue
+        change = (run["posts_per_minute"] / before["posts_per_minute"] - 1) * 100
+        lines.append(
+            f"  {run['mode']:<8} n={run['size']:<4} "
+            f"{before['posts_per_minute']:.1f} -> {run['posts_per_minute']:.1f} "
+            f"posts/min ({change:+.1f}%), "
+            f"wall {before['wall_seconds']:.1f}s -> {run['wall_seconds']:.1f}s, "
+            f"RSS {before['peak_rss_mb']:.0f} -> {run['peak_rss_mb']:.0f} MB"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """
+    Main function to run the pipeline benchmark.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the recipe pipeline against local fakes."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--mode",
+        choices=("pipeline", "serial"),
+        default="pipeline",
+        help="Run the staged pipeline or process_post one post at a time",
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--store", choices=("memory", "sqlite"), default="sqlite", help="Local store"
+    )
+    parser.add_argument("--fetch-latency", type=float, default=0.2)
+    parser.add_argument("--openai-latency", type=float, default=0.5)
+    parser.add_argument("--openai-failure-rate", type=float, default=0.0)
+    parser.add_argument("--transcribe-latency", type=float, default=1.0)
+    parser.add_argument(
+        "--real-transcriber",
+        action="store_true",
+        default=False,
+        help="Transcribe with Whisper instead of returning canned text",
+    )
+    parser.add_argument("--transcribe-workers", type=int, default=1)
+    parser.add_argument("--recipe-share", type=float, default=0.8)
+    parser.add_argument(
+        "--no-prefilter",
+        action="store_true",
+        default=False,
+        help="Send every post to the LLM classifier",
+    )
+    parser.add_argument("--media-count", type=int, default=8)
+    parser.add_argument("--media-seconds", type=float, default=30.0)
+    parser.add_argument("--output", help="Path of the JSON results file")
+    parser.add_argument("--baseline", help="JSON results file to compare against")
+    parser.add_argument("--verbose", action="store_true", default=False)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    options = {
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "store": args.store,
+        "fetch_latency": args.fetch_latency,
+        "openai_latency": args.openai_latency,
+        "openai_failure_rate": args.openai_failure_rate,
+        "transcribe_latency": args.transcribe_latency,
+        "real_transcriber": args.real_transcriber,
+        "transcribe_workers": args.transcribe_workers,
+        "recipe_share": args.recipe_share,
+        "prefilter": not args.no_prefilter,
+        "media_count": args.media_count,
+        "media_seconds": args.media_seconds,
+        "log_level": logging.INFO if args.verbose else logging.WARNING,
+    }
+
+    results = []
+    for size in args.sizes:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            run = executor.submit(run_once, size, options).result()
+        results.append(run)
+        logging.info(
+            f"n={size}: {run['wall_seconds']:.1f}s, "
+            f"{run['posts_per_minute']:.1f} posts/min, "
+            f"peak RSS {run['peak_rss_mb']:.0f} MB"
+        )
+        for name, stats in run["stages"].items():
+            logging.info(f"  {name:<11} {stats}")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(
+            {
+                "revision": _git_revision(),
+                "python": platform.python_version(),
+                "options": options,
+                "results": results,
+            },
+            file,
+            indent=2,
+        )
+    logging.info(f"Results saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)["results"]
+        logging.info(f"Compared with {args.baseline}:\n{compare(results, baseline)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Check that the light entry points import quickly and without ML dependencies.
+
+Each target is imported in a fresh interpreter under ``python -X importtime``.
+The run fails if a target takes longer than its budget to import or pulls in
+one of the heavy packages:
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 10 --output startup.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (module, import budget in milliseconds). Modules are imported with both the
+# repository root and ``src`` on the path, the way the scripts run.
+TARGETS: List[Tuple[str, float]] = [
+    ("src", 50.0),
+    ("firebase.client", 150.0),
+    ("models", 150.0),
+    ("scraper.recipe_generator", 250.0),
+    ("viewer", 600.0),
+]
+# Packages that must only be imported when they are actually used.
+HEAVY_PACKAGES = (
+    "torch",
+    "whisper",
+    "openai",
+    "httpx",
+    "firebase_admin",
+    "google",
+    "instaloader",
+    "pydub",
+)
+
+
+def measure_import(module: str) -> Tuple[float, List[str]]:
+    """
+    Import a module in a fresh interpreter and time it.
+
+    Args:
+        module (str): Dotted module name.
+
+    Returns:
+        tuple: Cumulative import time in milliseconds and the names of every
+            module imported along the way.
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [ROOT, os.path.join(ROOT, "src"), env.get("PYTHONPATH", "")]
+    ).rstrip(os.pathsep)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    cumulative_us = 0
+    modules = []
+    # Lines look like "import time:  self [us] | cumulative | imported package".
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].strip()
+        modules.append(name)
+        if name == module:
+            cumulative_us = int(fields[1])
+    return cumulative_us / 1000.0, modules
+
+
+def run(repeat: int, budget_scale: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Measure every target, keeping the fastest of several imports.
+
+    Args:
+        repeat (int): Imports per target.
+        budget_scale (float): Factor applied to every budget, for slow machines.
+
+    Returns:
+        list: One result per target.
+    """
+    results = []
+    for module, budget in TARGETS:
+        timings = []
+        modules: List[str] = []
+        for _ in range(repeat):
+            milliseconds, modules = measure_import(module)
+            timings.append(milliseconds)
+        heavy = sorted(
+            {name for name in modules if name.split(".")[0] in HEAVY_PACKAGES}
+        )
+        budget *= budget_scale
+        results.append(
+            {
+                "module": module,
+                "milliseconds": round(min(timings), 1),
+                "budget_milliseconds": budget,
+                "heavy_imports": heavy,
+                "ok": min(timings) <= budget and not heavy,
+            }
+        )
+    return results
+
+
+def report(results: List[Dict[str, Any]]) -> str:
+    """
+    Format the results as a table.
+
+    Args:
+        results (list): Results from ``run``.
+
+    Returns:
+        str: One line per target.
+    """
+    lines = []
+    for result in results:
+        status = "ok" if result["ok"] else "FAIL"
+        line = (
+            f"  {result['module']:<26} {result['milliseconds']:>7.1f} ms "
+            f"(budget {result['budget_milliseconds']:.0f} ms) {status}"
+        )
+        if result["heavy_imports"]:
+            roots = sorted({name.split(".")[0] for name in result["heavy_imports"]})
+            line += f" imports {', '.join(roots)}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Main function to run the startup benchmark.
+
+    Returns:
+        int: Exit status, 1 if any target is over budget or imports a heavy
+            package.
+    """
+    parser = argparse.ArgumentParser(
+        description="Check import times of the light entry points."
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Imports per target")
+    parser.add_argument(
+        "--budget-scale",
+        type=float,
+        default=1.0,
+        help="Multiply every budget, e.g. 2 on a slow CI machine",
+    )
+    parser.add_argument("--output", help="Path of the JSON results file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    results = run(args.repeat, args.budget_scale)
+    logging.info(f"Import times:\n{report(results)}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        logging.info(f"Results written to {args.output}")
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
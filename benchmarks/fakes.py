@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import random
+import subprocess
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional, Tuple
+
+from src.scraper.downloader import InstagramDownloader
+from src.scraper.transcriber import Transcriber
+
+RECIPE_TRANSCRIPT = (
+    "Today we're making garlic butter pasta. Boil 200 grams of pasta in salted "
+    "water. Melt 2 tablespoons of butter in a pan, add 3 cloves of minced garlic "
+    "and stir for a minute. Toss the pasta with the sauce, season with salt and "
+    "pepper and finish with grated cheese and a squeeze of lemon."
+)
+OTHER_TRANSCRIPT = (
+    "Here is my morning workout routine. Ten minutes of stretching, then squats, "
+    "lunges and a quick dance to my favourite song before the gym."
+)
+RECIPE_CAPTION = "Easy garlic butter pasta 🍝 full recipe below! #recipe #pasta"
+RECIPE_RESPONSE = {
+    "title": "Garlic Butter Pasta",
+    "ingredients": [
+        "200 g pasta",
+        "2 tbsp butter",
+        "3 cloves garlic, minced",
+        "Grated cheese",
+        "1 lemon",
+    ],
+    "instructions": [
+        "Boil the pasta in salted water.",
+        "Melt the butter and cook the garlic for a minute.",
+        "Toss the pasta with the sauce and season.",
+        "Finish with cheese and lemon juice.",
+    ],
+    "notes": "Save some pasta water to loosen the sauce.",
+    "categories": ["pasta", "quick"],
+}
+
+
+def is_recipe_post(shortcode: str, recipe_share: float) -> bool:
+    """
+    Decide deterministically whether a fake post is a recipe.
+
+    Args:
+        shortcode (str): Shortcode of the post.
+        recipe_share (float): Share of posts that are recipes.
+
+    Returns:
+        bool: Whether the post is a recipe.
+    """
+    return zlib.crc32(shortcode.encode()) % 1000 < recipe_share * 1000
+
+
+def make_canned_media(
+    directory: str, count: int = 8, seconds: float = 30.0
+) -> List[str]:
+    """
+    Create short MP4 clips with distinct tones to stand in for post videos.
+
+    Existing clips are reused.
+
+    Args:
+        directory (str): Directory to write the clips to.
+        count (int): Number of distinct clips.
+        seconds (float): Length of each clip.
+
+    Returns:
+        list: Paths of the clips.
+
+    Raises:
+        RuntimeError: If ffmpeg fails.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"clip_{index:02d}_{int(seconds)}s.mp4")
+        paths.append(path)
+        if os.path.exists(path):
+            continue
+        frequency = 220 + 55 * index
+        result = subprocess.run(
+            [
+                "ffmpeg",
+                "-loglevel",
+                "error",
+                "-y",
+                "-f",
+                "lavfi",
+                "-i",
+                f"sine=frequency={frequency}:duration={seconds}",
+                "-f",
+                "lavfi",
+                "-i",
+                f"color=c=black:s=320x240:d={seconds}",
+                "-shortest",
+                "-c:v",
+                "libx264",
+                "-c:a",
+                "aac",
+                path,
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to create {path}: {result.stderr}")
+    return paths
+
+
+class FakeDownloader(InstagramDownloader):
+    """
+    An InstagramDownloader that serves canned videos instead of calling Instagram.
+
+    Post metadata lookups sleep for ``latency`` seconds; audio is still extracted
+    from the canned video with ffmpeg.
+
+    Attributes:
+        media (list): Paths of the canned videos.
+        latency (float): Seconds each metadata lookup takes.
+        recipe_share (float): Share of posts with a recipe caption.
+    """
+
+    def __init__(
+        self, media: List[str], latency: float = 0.0, recipe_share: float = 0.8
+    ) -> None:
+        super().__init__(local=True)
+        self.media = media
+        self.latency = latency
+        self.recipe_share = recipe_share
+
+    def fetch_post(self, post_url: str) -> Tuple[str, str]:
+        time.sleep(self.latency)
+        shortcode = self._get_shortcode(post_url)
+        video = self.media[zlib.crc32(shortcode.encode()) % len(self.media)]
+        caption = (
+            RECIPE_CAPTION
+            if is_recipe_post(shortcode, self.recipe_share)
+            else "Morning routine"
+        )
+        return caption, video
+
+
+class FakeTranscriber(Transcriber):
+    """
+    A Transcriber that returns canned text after a fixed delay.
+
+    Attributes:
+        latency (float): Seconds each transcription takes.
+        recipe_share (float): Share of posts with a recipe transcript.
+    """
+
+    def __init__(self, latency: float = 0.0, recipe_share: float = 0.8) -> None:
+        super().__init__(vad=False)
+        self.latency = latency
+        self.recipe_share = recipe_share
+
+    def transcribe_audio(self, audio_path: str, verbose: bool = False) -> str:
+        time.sleep(self.latency)
+        shortcode = os.path.splitext(os.path.basename(audio_path))[0]
+        text = (
+            RECIPE_TRANSCRIPT
+            if is_recipe_post(shortcode, self.recipe_share)
+            else OTHER_TRANSCRIPT
+        )
+        return f"{text} ({shortcode})"
+
+
+class FakeOpenAIServer:
+    """
+    A local HTTP server that answers OpenAI chat completion requests.
+
+    Classification prompts get a high likelihood and recipe prompts a canned
+    recipe, after ``latency`` seconds. The first ``fail_first`` requests and a
+    random share of the rest can be rejected with HTTP 429 to exercise retries.
+
+    Attributes:
+        latency (float): Seconds each response takes.
+        failure_rate (float): Share of requests answered with HTTP 429.
+        fail_first (int): Number of initial requests answered with HTTP 429.
+        retry_after (str): Retry-After header sent with each HTTP 429.
+        requests (int): Requests received.
+        base_url (str): API base URL to point clients at.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        failure_rate: float = 0.0,
+        fail_first: int = 0,
+        retry_after: str = "0",
+    ) -> None:
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_first = fail_first
+        self.retry_after = retry_after
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.base_url = ""
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def respond(self, body: dict) -> str:
+        """
+        Build the assistant message for a chat completion request.
+
+        Args:
+            body (dict): Request body.
+
+        Returns:
+            str: Assistant message content.
+        """
+        prompt = body["messages"][-1]["content"]
+        if "Likelihood" in prompt:
+            return "Likelihood: 5%" if OTHER_TRANSCRIPT in prompt else "Likelihood: 95%"
+        return json.dumps(RECIPE_RESPONSE)
+
+    def start(self) -> None:
+        """
+        Start serving on a free local port.
+        """
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                    rejected = fake.requests <= fake.fail_first
+                time.sleep(fake.latency)
+                if rejected or random.random() < fake.failure_rate:
+                    self._send(429, {"error": {"message": "Rate limited"}})
+                    return
+                self._send(
+                    200,
+                    {
+                        "id": "chatcmpl-bench",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", ""),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {
+                                    "role": "assistant",
+                                    "content": fake.respond(body),
+                                },
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": {
+                            "prompt_tokens": 0,
+                            "completion_tokens": 0,
+                            "total_tokens": 0,
+                        },
+                    },
+                )
+
+            def _send(self, status: int, payload: dict) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if status == 429:
+                    self.send_header("Retry-After", fake.retry_after)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logging.debug(format % args)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}/v1"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the server.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
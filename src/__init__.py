@@ -1,12 +1,27 @@
-from .firebase.client import FirebaseClient
+import importlib
+from typing import Any
 
-from .models.recipe import Recipe
-from .models.user import User
-from .models.cookbook import Cookbook
+# Public names and the modules defining them. Modules are imported on first
+# access, so using one part of the package (such as the viewer) does not pull in
+# Whisper, torch, Instaloader or the OpenAI SDK.
+_EXPORTS = {
+    "FirebaseClient": ".firebase.client",
+    "Recipe": ".models.recipe",
+    "User": ".models.user",
+    "Cookbook": ".models.cookbook",
+    "RecipeGenerator": ".scraper.recipe_generator",
+    "Transcriber": ".scraper.transcriber",
+    "InstagramDownloader": ".scraper.downloader",
+    "CLI": ".viewer",
+    "main": ".main",
+}
 
-from .scraper.recipe_generator import RecipeGenerator
-from .scraper.transcriber import Transcriber
-from .scraper.downloader import InstagramDownloader
+__all__ = list(_EXPORTS)
 
-from .viewer import CLI
-from .main import main
\ No newline at end of file
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
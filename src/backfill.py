@@ -0,0 +1,137 @@
+import argparse
+import logging
+from typing import List, Optional, Set
+
+from firebase.client import FirebaseClient
+from models.cookbook import Cookbook
+from models.shortcode_index import ShortcodeIndex
+from models.user import User
+from scraper.batch import BatchBackend, OpenAIBatchBackend
+from scraper.completion_cache import CompletionCache
+from scraper.recipe_classifier import RecipeScorer
+from scraper.recipe_generator import RecipeGenerator
+
+logging.basicConfig(level=logging.INFO)
+
+
+def backfill(
+    firebase_client: FirebaseClient,
+    generator: RecipeGenerator,
+    cookbook: Cookbook,
+    backend: BatchBackend,
+    shortcodes: Optional[Set[str]] = None,
+    batch_dir: str = "batches",
+    poll_interval: float = 30.0,
+    user: Optional[User] = None,
+) -> int:
+    """
+    Generate recipes for stored transcripts with batch jobs.
+
+    Posts that already have a recipe in any user's shortcode index are skipped.
+
+    Args:
+        firebase_client (FirebaseClient): FirebaseClient instance.
+        generator (RecipeGenerator): RecipeGenerator instance.
+        cookbook (Cookbook): Cookbook to add the recipes to.
+        backend (BatchBackend): Service that runs the batch jobs.
+        shortcodes (set, optional): Only backfill these posts. Defaults to all.
+        batch_dir (str): Directory for the request and result files.
+        poll_interval (float): Seconds between status checks.
+        user (User, optional): Owner of the cookbook, whose shortcode index
+            records the new recipes.
+
+    Returns:
+        int: Number of recipes generated.
+    """
+    transcripts = firebase_client.list_documents("transcripts")
+    captions = {
+        document_id.removesuffix(".mp3"): data.get("caption", "")
+        for document_id, data in firebase_client.list_documents(
+            "audio_metadata"
+        ).items()
+    }
+    processed = ShortcodeIndex.all_shortcodes(firebase_client)
+    posts = [
+        (shortcode, data["transcript"], captions.get(shortcode, ""))
+        for shortcode, data in transcripts.items()
+        if data.get("transcript")
+        and (not shortcodes or shortcode in shortcodes)
+        and shortcode not in processed
+    ]
+    logging.info(
+        f"Backfilling recipes for {len(posts)} transcript(s); "
+        f"{len(processed)} post(s) already have a recipe."
+    )
+    recipes = generator.generate_recipes_batch(
+        posts,
+        backend,
+        firebase_client,
+        cookbook=cookbook,
+        batch_dir=batch_dir,
+        poll_interval=poll_interval,
+        user=user,
+    )
+    logging.info(f"Generated {len(recipes)} recipe(s).")
+    return len(recipes)
+
+
+def main() -> None:
+    """
+    Main function to backfill recipes for stored transcripts.
+    """
+    parser = argparse.ArgumentParser(
+        description="Generate recipes for stored transcripts using batch jobs."
+    )
+    parser.add_argument("cookbook_id", help="Cookbook to add the recipes to")
+    parser.add_argument(
+        "shortcodes", nargs="*", help="Only backfill these posts (default: all)"
+    )
+    parser.add_argument(
+        "--user-id", help="Owner of the cookbook, to index the new recipes under"
+    )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        default=False,
+        help="Use local storage instead of Firebase",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between batch status checks",
+    )
+    args = parser.parse_args()
+
+    firebase_client = FirebaseClient(local=args.local)
+    generator = RecipeGenerator(
+        local=args.local,
+        firebase_client=firebase_client,
+        cache=CompletionCache(),
+        scorer=RecipeScorer(),
+    )
+    cookbook = Cookbook(
+        cookbook_id=args.cookbook_id,
+        name="",
+        description="",
+        firebase_client=firebase_client,
+    )
+    user = (
+        User(user_id=args.user_id, name="", email="", firebase_client=firebase_client)
+        if args.user_id
+        else None
+    )
+    shortcodes: List[str] = args.shortcodes
+    backfill(
+        firebase_client,
+        generator,
+        cookbook,
+        OpenAIBatchBackend(),
+        shortcodes=set(shortcodes),
+        poll_interval=args.poll_interval,
+        user=user,
+    )
+
+
+if __name__ == "__main__":
+    main()
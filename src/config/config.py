@@ -5,3 +5,9 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 # Whisper API endpoint (modify as needed if self-hosted)
 WHISPER_API_URL = "https://api.openai.com/v1/audio/transcriptions"
+
+# Local recipe pre-classifier: posts scoring at or above the accept threshold are
+# treated as recipes, at or below the reject threshold as non-recipes, and only
+# the band in between is sent to the LLM classifier.
+RECIPE_ACCEPT_SCORE = float(os.getenv("RECIPE_ACCEPT_SCORE", "0.9"))
+RECIPE_REJECT_SCORE = float(os.getenv("RECIPE_REJECT_SCORE", "0.1"))
@@ -1 +1,2 @@
-from .client import FirebaseClient
+from .client import FirebaseClient, WriteBatch
+from .store import DocumentStore, FirestoreDocumentStore, SQLiteDocumentStore
@@ -1,18 +1,34 @@
 import logging
 import os
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 
-import firebase_admin  # type: ignore
-from firebase_admin import credentials, firestore, storage
+from firebase.store import (
+    DocumentStore,
+    FirestoreDocumentStore,
+    Operation,
+    SQLiteDocumentStore,
+)
+from metrics import get_metrics
+
+if TYPE_CHECKING:
+    import firebase_admin  # type: ignore
+    from firebase_admin import firestore, storage
 
 
 class FirebaseClient:
     def __init__(
-        self, local: bool = False, firebase_app: Optional[firebase_admin.App] = None
+        self,
+        local: bool = False,
+        firebase_app: Optional["firebase_admin.App"] = None,
+        store: Optional[DocumentStore] = None,
     ):
         self.local: bool = local
-        if not local and firebase_app is None:
-            if not firebase_admin._apps:
+        if not local:
+            # Only remote mode needs the Firebase SDK, which is slow to import.
+            import firebase_admin
+            from firebase_admin import credentials, firestore, storage
+
+            if firebase_app is None and not firebase_admin._apps:
                 service_account_path = os.path.join(
                     os.path.dirname(__file__), "../../.private/firebasekey.json"
                 )
@@ -24,12 +40,14 @@ class FirebaseClient:
                         "projectId": "ai-recipe-bot-d0b13",
                     },
                 )
-        if not local:
-            self.db: firestore.Client = firestore.client()
-            self.bucket: storage.Bucket = storage.bucket()
+            self.db: "firestore.Client" = firestore.client()
+            self.bucket: "storage.Bucket" = storage.bucket()
             logging.info(
                 "Firebase initialized successfully with service account credentials."
             )
+        if store is None:
+            store = SQLiteDocumentStore() if local else FirestoreDocumentStore(self.db)
+        self.store: DocumentStore = store
 
     def upload_file(self, local_path: str, remote_path: str) -> None:
         """
@@ -39,21 +57,24 @@ class FirebaseClient:
             local_path (str): Path to the local file.
             remote_path (str): Path in Firebase Storage or local storage.
         """
-        if self.local:
-            os.makedirs(os.path.dirname(remote_path), exist_ok=True)
-            try:
-                with open(remote_path, "wb") as file:
-                    file.write(open(local_path, "rb").read())
-                logging.info(f"File saved locally at {remote_path}")
-            except Exception as e:
-                logging.error(f"Error saving file locally: {e}")
-        else:
-            try:
-                blob = self.bucket.blob(remote_path)
-                blob.upload_from_filename(local_path)
-                logging.info(f"File uploaded to Firebase Storage at {remote_path}")
-            except Exception as e:
-                logging.error(f"Error uploading file to Firebase Storage: {e}")
+        with get_metrics().span("firebase_upload_file") as span:
+            if self.local:
+                os.makedirs(os.path.dirname(remote_path), exist_ok=True)
+                try:
+                    with open(remote_path, "wb") as file:
+                        file.write(open(local_path, "rb").read())
+                    logging.info(f"File saved locally at {remote_path}")
+                    span.add(bytes=os.path.getsize(remote_path))
+                except Exception as e:
+                    logging.error(f"Error saving file locally: {e}")
+            else:
+                try:
+                    blob = self.bucket.blob(remote_path)
+                    blob.upload_from_filename(local_path)
+                    logging.info(f"File uploaded to Firebase Storage at {remote_path}")
+                    span.add(bytes=os.path.getsize(local_path))
+                except Exception as e:
+                    logging.error(f"Error uploading file to Firebase Storage: {e}")
 
     def upload_string(self, content: str, remote_path: str) -> None:
         """
@@ -63,21 +84,26 @@ class FirebaseClient:
             content (str): Content to upload.
             remote_path (str): Path in Firebase Storage or local storage.
         """
-        if self.local:
-            os.makedirs(os.path.dirname(remote_path), exist_ok=True)
-            try:
-                with open(remote_path, "w") as file:
-                    file.write(content)
-                logging.info(f"Content saved locally at {remote_path}")
-            except Exception as e:
-                logging.error(f"Error saving content locally: {e}")
-        else:
-            try:
-                blob = self.bucket.blob(remote_path)
-                blob.upload_from_string(content)
-                logging.info(f"Content uploaded to Firebase Storage at {remote_path}")
-            except Exception as e:
-                logging.error(f"Error uploading content to Firebase Storage: {e}")
+        with get_metrics().span("firebase_upload_string") as span:
+            if self.local:
+                os.makedirs(os.path.dirname(remote_path), exist_ok=True)
+                try:
+                    with open(remote_path, "w") as file:
+                        file.write(content)
+                    logging.info(f"Content saved locally at {remote_path}")
+                    span.add(bytes=len(content.encode()))
+                except Exception as e:
+                    logging.error(f"Error saving content locally: {e}")
+            else:
+                try:
+                    blob = self.bucket.blob(remote_path)
+                    blob.upload_from_string(content)
+                    logging.info(
+                        f"Content uploaded to Firebase Storage at {remote_path}"
+                    )
+                    span.add(bytes=len(content.encode()))
+                except Exception as e:
+                    logging.error(f"Error uploading content to Firebase Storage: {e}")
 
     def download_string(self, remote_path: str) -> str:
         """
@@ -93,39 +119,46 @@ class FirebaseClient:
             FileNotFoundError: If the file does not exist.
             Exception: If there is an error during download.
         """
-        if self.local:
-            if os.path.exists(remote_path):
+        with get_metrics().span("firebase_download_string") as span:
+            if self.local:
+                if os.path.exists(remote_path):
+                    try:
+                        with open(remote_path, "r") as file:
+                            content = file.read()
+                        logging.info(
+                            f"Content downloaded from local storage at {remote_path}"
+                        )
+                        span.add(bytes=len(content.encode()))
+                        return content
+                    except Exception as e:
+                        logging.error(
+                            f"Error downloading content from local storage: {e}"
+                        )
+                        raise e
+                else:
+                    logging.error(f"Local path {remote_path} does not exist.")
+                    raise FileNotFoundError(f"Local path {remote_path} does not exist.")
+            else:
                 try:
-                    with open(remote_path, "r") as file:
-                        content = file.read()
+                    blob = self.bucket.blob(remote_path)
+                    if not blob.exists():
+                        logging.error(
+                            f"Remote path {remote_path} does not exist in Firebase Storage."
+                        )
+                        raise FileNotFoundError(
+                            f"Remote path {remote_path} does not exist in Firebase Storage."
+                        )
+                    content = blob.download_as_text()
                     logging.info(
-                        f"Content downloaded from local storage at {remote_path}"
+                        f"Content downloaded from Firebase Storage at {remote_path}"
                     )
+                    span.add(bytes=len(content.encode()))
                     return content
                 except Exception as e:
-                    logging.error(f"Error downloading content from local storage: {e}")
-                    raise e
-            else:
-                logging.error(f"Local path {remote_path} does not exist.")
-                raise FileNotFoundError(f"Local path {remote_path} does not exist.")
-        else:
-            try:
-                blob = self.bucket.blob(remote_path)
-                if not blob.exists():
                     logging.error(
-                        f"Remote path {remote_path} does not exist in Firebase Storage."
-                    )
-                    raise FileNotFoundError(
-                        f"Remote path {remote_path} does not exist in Firebase Storage."
+                        f"Error downloading content from Firebase Storage: {e}"
                     )
-                content = blob.download_as_text()
-                logging.info(
-                    f"Content downloaded from Firebase Storage at {remote_path}"
-                )
-                return content
-            except Exception as e:
-                logging.error(f"Error downloading content from Firebase Storage: {e}")
-                raise e
+                    raise e
 
     def download_file(self, remote_path: str, local_path: str) -> None:
         """
@@ -139,44 +172,77 @@ class FirebaseClient:
             FileNotFoundError: If the file does not exist.
             Exception: If there is an error during download.
         """
-        if self.local:
-            if os.path.exists(remote_path):
+        with get_metrics().span("firebase_download_file") as span:
+            if self.local:
+                if os.path.exists(remote_path):
+                    try:
+                        with open(local_path, "wb") as file:
+                            file.write(open(remote_path, "rb").read())
+                        logging.info(
+                            f"File downloaded from local storage at {remote_path}"
+                        )
+                        span.add(bytes=os.path.getsize(local_path))
+                    except Exception as e:
+                        logging.error(f"Error downloading file from local storage: {e}")
+                        raise e
+                else:
+                    logging.error(f"Local path {remote_path} does not exist.")
+                    raise FileNotFoundError(f"Local path {remote_path} does not exist.")
+            else:
                 try:
-                    with open(local_path, "wb") as file:
-                        file.write(open(remote_path, "rb").read())
-                    logging.info(f"File downloaded from local storage at {remote_path}")
+                    blob = self.bucket.blob(remote_path)
+                    if not blob.exists():
+                        logging.error(
+                            f"Remote path {remote_path} does not exist in Firebase Storage."
+                        )
+                        raise FileNotFoundError(
+                            f"Remote path {remote_path} does not exist in Firebase Storage."
+                        )
+                    blob.download_to_filename(local_path)
+                    logging.info(
+                        f"File downloaded from Firebase Storage at {remote_path}"
+                    )
+                    span.add(bytes=os.path.getsize(local_path))
                 except Exception as e:
-                    logging.error(f"Error downloading file from local storage: {e}")
+                    logging.error(f"Error downloading file from Firebase Storage: {e}")
                     raise e
+
+    def delete_file(self, remote_path: str) -> None:
+        """
+        Delete a file from Firebase Storage or local storage.
+
+        Deleting a file that does not exist does nothing.
+
+        Args:
+            remote_path (str): Path in Firebase Storage or local storage.
+
+        Raises:
+            Exception: If there is an error during deletion.
+        """
+        with get_metrics().span("firebase_delete_file"):
+            if self.local:
+                if os.path.exists(remote_path):
+                    os.remove(remote_path)
+                    logging.info(f"File deleted from local storage at {remote_path}")
             else:
-                logging.error(f"Local path {remote_path} does not exist.")
-                raise FileNotFoundError(f"Local path {remote_path} does not exist.")
-        else:
-            try:
-                blob = self.bucket.blob(remote_path)
-                if not blob.exists():
-                    logging.error(
-                        f"Remote path {remote_path} does not exist in Firebase Storage."
-                    )
-                    raise FileNotFoundError(
-                        f"Remote path {remote_path} does not exist in Firebase Storage."
-                    )
-                blob.download_to_filename(local_path)
-                logging.info(f"File downloaded from Firebase Storage at {remote_path}")
-            except Exception as e:
-                logging.error(f"Error downloading file from Firebase Storage: {e}")
-                raise e
+                try:
+                    blob = self.bucket.blob(remote_path)
+                    if blob.exists():
+                        blob.delete()
+                        logging.info(
+                            f"File deleted from Firebase Storage at {remote_path}"
+                        )
+                except Exception as e:
+                    logging.error(f"Error deleting file from Firebase Storage: {e}")
+                    raise e
 
-    def get_document(
-        self, collection: str, document_id: str, local_path: Optional[str] = None
-    ) -> Dict:
+    def get_document(self, collection: str, document_id: str) -> Dict:
         """
         Retrieve a document from Firestore or local storage.
 
         Args:
             collection (str): Firestore collection name.
             document_id (str): Document ID.
-            local_path (str, optional): Path in local storage. Defaults to None.
 
         Returns:
             dict: Document data.
@@ -185,37 +251,95 @@ class FirebaseClient:
             FileNotFoundError: If the document does not exist.
             Exception: If there is an error during retrieval.
         """
-        if self.local and local_path and os.path.exists(local_path):
-            try:
-                with open(local_path, "r") as file:
-                    content = file.read()
-                logging.info(f"Document downloaded from local storage at {local_path}")
-                return eval(
-                    content
-                )  # Assuming the local document is stored as a dictionary string
-            except Exception as e:
-                logging.error(f"Error downloading document from local storage: {e}")
-                raise e
-        elif not self.local:
-            try:
-                doc_ref = self.db.collection(collection).document(document_id)
-                doc = doc_ref.get()
-                if not doc.exists:
-                    logging.error(
-                        f"Document {document_id} does not exist in collection {collection}."
-                    )
-                    raise FileNotFoundError(
-                        f"Document {document_id} does not exist in collection {collection}."
-                    )
-                return doc.to_dict()
-            except Exception as e:
-                logging.error(f"Error retrieving document from Firestore: {e}")
-                raise e
-        else:
-            logging.error(f"Local path {local_path} does not exist.")
-            raise FileNotFoundError(f"Local path {local_path} does not exist.")
+        try:
+            with get_metrics().span("firebase_get_document"):
+                document = self.store.get(collection, [document_id]).get(document_id)
+        except Exception as e:
+            logging.error(f"Error retrieving document {document_id}: {e}")
+            raise e
+        if document is None:
+            logging.error(
+                f"Document {document_id} does not exist in collection {collection}."
+            )
+            raise FileNotFoundError(
+                f"Document {document_id} does not exist in collection {collection}."
+            )
+        return document
+
+    def get_documents(
+        self,
+        collection: str,
+        document_ids: List[str],
+        field_paths: Optional[List[str]] = None,
+    ) -> List[Optional[Dict]]:
+        """
+        Retrieve many documents from Firestore or local storage in one call.
+
+        Args:
+            collection (str): Firestore collection name.
+            document_ids (list): Document IDs to fetch.
+            field_paths (list, optional): Top-level fields to return. Defaults to
+                the whole document.
+
+        Returns:
+            list: Document data in the order of ``document_ids``, with None for
+                documents that do not exist.
+
+        Raises:
+            Exception: If there is an error during retrieval.
+        """
+        if not document_ids:
+            return []
+        try:
+            with get_metrics().span("firebase_get_documents") as span:
+                found = self.store.get(collection, document_ids, field_paths)
+                span.add(documents=len(found))
+        except Exception as e:
+            logging.error(f"Error retrieving documents from {collection}: {e}")
+            raise e
+        missing = len(set(document_ids) - found.keys())
+        if missing:
+            logging.warning(f"{missing} document(s) missing from {collection}.")
+        return [found.get(document_id) for document_id in document_ids]
 
-    def set_document(self, collection: str, document_id: str, data: Dict) -> None:
+    def get_updated_documents(
+        self,
+        collection: str,
+        since: float,
+        field_paths: Optional[List[str]] = None,
+    ) -> Dict[str, Dict]:
+        """
+        Retrieve the documents of a collection written after a point in time.
+
+        Args:
+            collection (str): Firestore collection name.
+            since (float): Exclusive lower bound on the documents' ``updated_at``,
+                in seconds since the epoch.
+            field_paths (list, optional): Top-level fields to return. Defaults to
+                the whole document.
+
+        Returns:
+            dict: Document data keyed by document ID.
+
+        Raises:
+            Exception: If there is an error during retrieval.
+        """
+        try:
+            with get_metrics().span("firebase_get_updated_documents") as span:
+                documents = self.store.updated_since(collection, since, field_paths)
+                span.add(documents=len(documents))
+                return documents
+        except Exception as e:
+            logging.error(f"Error retrieving updated documents from {collection}: {e}")
+            raise e
+
+    def set_document(
+        self,
+        collection: str,
+        document_id: str,
+        data: Dict,
+        batch: Optional["WriteBatch"] = None,
+    ) -> None:
         """
         Set a document in Firestore or save it locally.
 
@@ -223,73 +347,202 @@ class FirebaseClient:
             collection (str): Firestore collection name.
             document_id (str): Document ID.
             data (dict): Data to set in the document.
+            batch (WriteBatch, optional): Batch to add the write to instead of
+                committing it immediately.
         """
-        if self.local:
-            local_path = f"{collection}/{document_id}.json"
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            try:
-                with open(local_path, "w") as file:
-                    file.write(str(data))
-                logging.info(f"Document saved locally at {local_path}")
-            except Exception as e:
-                logging.error(f"Error saving document locally: {e}")
-        else:
-            try:
-                doc_ref = self.db.collection(collection).document(document_id)
-                doc_ref.set(data)
-                logging.info(f"Document {document_id} set in collection {collection}")
-            except Exception as e:
-                logging.error(f"Error setting document in Firestore: {e}")
+        if batch is not None:
+            batch.set(collection, document_id, data)
+            return
+        try:
+            with self.batch() as batch:
+                batch.set(collection, document_id, data)
+            logging.info(f"Document {document_id} set in collection {collection}")
+        except Exception as e:
+            logging.error(f"Error setting document: {e}")
+
+    def batch(self) -> "WriteBatch":
+        """
+        Start a batch of document writes that are committed together.
+
+        Returns:
+            WriteBatch: New write batch. Use it as a context manager to commit
+                on success and discard on error.
+        """
+        return WriteBatch(self)
+
+    def list_documents(self, collection: str) -> Dict[str, Dict]:
+        """
+        Retrieve every document in a collection from Firestore or local storage.
+
+        Args:
+            collection (str): Firestore collection name.
+
+        Returns:
+            dict: Document data keyed by document ID.
+        """
+        try:
+            with get_metrics().span("firebase_list_documents") as span:
+                documents = self.store.list(collection)
+                span.add(documents=len(documents))
+                return documents
+        except Exception as e:
+            logging.error(f"Error listing collection {collection}: {e}")
+            raise e
 
-    def create_user(self, user_id: str, user_data: Dict) -> None:
+    def create_user(
+        self, user_id: str, user_data: Dict, batch: Optional["WriteBatch"] = None
+    ) -> None:
         """Create a new user document."""
-        if self.local:
-            local_path = f"users/{user_id}.json"
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            with open(local_path, "w") as file:
-                file.write(str(user_data))
-        else:
-            try:
-                user_ref = self.db.collection("users").document(user_id)
-                user_ref.set(user_data)
-                logging.info(f"User {user_id} created.")
-            except Exception as e:
-                logging.error(f"Error creating user: {e}")
+        if batch is not None:
+            batch.set("users", user_id, user_data)
+            return
+        try:
+            with self.batch() as batch:
+                batch.set("users", user_id, user_data)
+            logging.info(f"User {user_id} created.")
+        except Exception as e:
+            logging.error(f"Error creating user: {e}")
 
     def create_cookbook(
-        self, user_id: str, cookbook_id: str, cookbook_data: Dict
+        self,
+        user_id: str,
+        cookbook_id: str,
+        cookbook_data: Dict,
+        batch: Optional["WriteBatch"] = None,
     ) -> None:
         """Create a new cookbook and associate it with a user."""
-        if self.local:
-            local_path = f"users/{user_id}/cookbooks/{cookbook_id}.json"
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            with open(local_path, "w") as file:
-                file.write(str(cookbook_data))
-        else:
-            try:
-                # Save cookbook in 'cookbooks' collection
-                cookbook_ref = self.db.collection("cookbooks").document(cookbook_id)
-                cookbook_ref.set(cookbook_data)
-                # Update user document with reference to the cookbook ID
-                user_ref = self.db.collection("users").document(user_id)
-                user_ref.update({"cookbooks": firestore.ArrayUnion([cookbook_id])})
-                logging.info(
-                    f"Cookbook {cookbook_id} created and associated with user {user_id}."
-                )
-            except Exception as e:
-                logging.error(f"Error creating cookbook: {e}")
+        if batch is not None:
+            # Save cookbook in 'cookbooks' collection
+            batch.set("cookbooks", cookbook_id, cookbook_data)
+            # Update user document with reference to the cookbook ID
+            batch.array_union("users", user_id, "cookbooks", [cookbook_id])
+            return
+        try:
+            with self.batch() as batch:
+                self.create_cookbook(user_id, cookbook_id, cookbook_data, batch)
+            logging.info(
+                f"Cookbook {cookbook_id} created and associated with user {user_id}."
+            )
+        except Exception as e:
+            logging.error(f"Error creating cookbook: {e}")
 
-    def save_recipe(self, recipe_id: str, recipe_data: Dict) -> None:
+    def save_recipe(
+        self, recipe_id: str, recipe_data: Dict, batch: Optional["WriteBatch"] = None
+    ) -> None:
         """Save a recipe in the 'recipes' collection."""
-        if self.local:
-            local_path = f"recipes/{recipe_id}.json"
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            with open(local_path, "w") as file:
-                file.write(str(recipe_data))
+        if batch is not None:
+            batch.set("recipes", recipe_id, recipe_data)
+            return
+        try:
+            with self.batch() as batch:
+                batch.set("recipes", recipe_id, recipe_data)
+            logging.info(f"Recipe {recipe_id} saved in 'recipes' collection.")
+        except Exception as e:
+            logging.error(f"Error saving recipe: {e}")
+
+
+class WriteBatch:
+    """
+    A unit of work that collects document writes and commits them together.
+
+    The writes are applied by the client's document store: as chunked batched
+    writes in Firestore, and as one transaction in the local store.
+
+    Attributes:
+        client (FirebaseClient): Client the batch writes through.
+        operations (list): Pending (kind, collection, document ID, payload) writes.
+        callbacks (list): Functions called once the pending writes are committed.
+    """
+
+    def __init__(self, client: FirebaseClient) -> None:
+        self.client = client
+        self.operations: List[Operation] = []
+        self.callbacks: List[Callable[[], Any]] = []
+
+    def __enter__(self) -> "WriteBatch":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        if exc_type is None:
+            self.commit()
         else:
+            self.discard()
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def set(self, collection: str, document_id: str, data: Dict) -> None:
+        """
+        Queue a write that replaces a whole document.
+
+        Args:
+            collection (str): Firestore collection name.
+            document_id (str): Document ID.
+            data (dict): Document data.
+        """
+        self.operations.append(("set", collection, document_id, data))
+
+    def update(self, collection: str, document_id: str, data: Dict) -> None:
+        """
+        Queue a write that merges fields into a document. Nested maps are
+        merged key by key.
+
+        Args:
+            collection (str): Firestore collection name.
+            document_id (str): Document ID.
+            data (dict): Fields to merge.
+        """
+        self.operations.append(("update", collection, document_id, data))
+
+    def array_union(
+        self, collection: str, document_id: str, field: str, values: List[Any]
+    ) -> None:
+        """
+        Queue a write that appends values missing from an array field.
+
+        Args:
+            collection (str): Firestore collection name.
+            document_id (str): Document ID.
+            field (str): Name of the array field.
+            values (list): Values to add.
+        """
+        self.operations.append(
+            ("array_union", collection, document_id, (field, values))
+        )
+
+    def on_commit(self, callback: Callable[[], Any]) -> None:
+        """
+        Run a function once the queued writes are committed, such as updating a
+        local index of the written documents. It is dropped with the writes if
+        the batch is discarded.
+
+        Args:
+            callback (callable): Function called without arguments.
+        """
+        self.callbacks.append(callback)
+
+    def commit(self) -> None:
+        """
+        Commit every queued write and clear the batch.
+        """
+        operations, self.operations = self.operations, []
+        callbacks, self.callbacks = self.callbacks, []
+        if operations:
+            with get_metrics().span("firebase_commit") as span:
+                self.client.store.apply(operations)
+                span.add(documents=len(operations))
+            logging.debug(f"Committed {len(operations)} write(s) in a batch.")
+        for callback in callbacks:
             try:
-                recipe_ref = self.db.collection("recipes").document(recipe_id)
-                recipe_ref.set(recipe_data)
-                logging.info(f"Recipe {recipe_id} saved in 'recipes' collection.")
+                callback()
             except Exception as e:
-                logging.error(f"Error saving recipe: {e}")
+                logging.error(f"Error after committing a batch: {e}")
+
+    def discard(self) -> None:
+        """
+        Drop every queued write and callback without applying them.
+        """
+        if self.operations:
+            logging.debug(f"Discarded {len(self.operations)} write(s) in a batch.")
+        self.operations.clear()
+        self.callbacks.clear()
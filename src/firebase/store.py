@@ -0,0 +1,498 @@
+import ast
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from firebase_admin import firestore  # type: ignore
+
+DEFAULT_STORE_PATH = os.path.join(".local", "documents.sqlite3")
+# Field holding the time a document was last written, in seconds since the epoch.
+UPDATED_AT_FIELD = "updated_at"
+
+# A queued write: (kind, collection, document ID, payload). Kind is "set",
+# "update" or "array_union"; the array_union payload is (field, values).
+Operation = Tuple[str, str, str, Any]
+
+
+def merge_fields(data: Dict, updates: Dict) -> None:
+    """
+    Merge fields into a document in place, merging nested maps key by key.
+
+    Args:
+        data (dict): Document data to update.
+        updates (dict): Fields to merge.
+    """
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(data.get(key), dict):
+            merge_fields(data[key], value)
+        else:
+            data[key] = value
+
+
+def _project(data: Dict, field_paths: Optional[List[str]]) -> Dict:
+    if field_paths is None:
+        return data
+    return {field: data[field] for field in field_paths if field in data}
+
+
+class DocumentStore(ABC):
+    """
+    Interface for the document storage behind FirebaseClient.
+    """
+
+    @abstractmethod
+    def get(
+        self,
+        collection: str,
+        document_ids: List[str],
+        field_paths: Optional[List[str]] = None,
+    ) -> Dict[str, Dict]:
+        """
+        Retrieve many documents of a collection.
+
+        Args:
+            collection (str): Collection name.
+            document_ids (list): Document IDs to fetch.
+            field_paths (list, optional): Top-level fields to return. Defaults to
+                the whole document.
+
+        Returns:
+            dict: Data of the documents that exist, keyed by document ID.
+        """
+
+    @abstractmethod
+    def list(self, collection: str) -> Dict[str, Dict]:
+        """
+        Retrieve every document in a collection.
+
+        Args:
+            collection (str): Collection name.
+
+        Returns:
+            dict: Document data keyed by document ID.
+        """
+
+    @abstractmethod
+    def updated_since(
+        self,
+        collection: str,
+        since: float,
+        field_paths: Optional[List[str]] = None,
+    ) -> Dict[str, Dict]:
+        """
+        Retrieve the documents of a collection written after a point in time.
+
+        Only documents with an ``updated_at`` field are considered.
+
+        Args:
+            collection (str): Collection name.
+            since (float): Exclusive lower bound on ``updated_at``.
+            field_paths (list, optional): Top-level fields to return. Defaults to
+                the whole document.
+
+        Returns:
+            dict: Document data keyed by document ID.
+        """
+
+    @abstractmethod
+    def apply(self, operations: List[Operation]) -> None:
+        """
+        Apply queued writes.
+
+        Args:
+            operations (list): Writes in the order they were queued.
+        """
+
+    def close(self) -> None:
+        """
+        Release the resources held by the store.
+        """
+
+
+class FirestoreDocumentStore(DocumentStore):
+    """
+    Stores documents in Cloud Firestore.
+
+    Writes are sent as batched writes, split at the per-batch operation limit;
+    each chunk is atomic.
+    """
+
+    MAX_OPERATIONS = 500
+
+    def __init__(self, db: "firestore.Client") -> None:
+        self.db = db
+
+    def get(
+        self,
+        collection: str,
+        document_ids: List[str],
+        field_paths: Optional[List[str]] = None,
+    ) -> Dict[str, Dict]:
+        refs = [
+            self.db.collection(collection).document(document_id)
+            for document_id in dict.fromkeys(document_ids)
+        ]
+        # get_all yields snapshots in arbitrary order.
+        return {
+            doc.id: doc.to_dict()
+            for doc in self.db.get_all(refs, field_paths=field_paths)
+            if doc.exists
+        }
+
+    def list(self, collection: str) -> Dict[str, Dict]:
+        return {
+            doc.id: doc.to_dict() for doc in self.db.collection(collection).stream()
+        }
+
+    def updated_since(
+        self,
+        collection: str,
+        since: float,
+        field_paths: Optional[List[str]] = None,
+    ) -> Dict[str, Dict]:
+        query = self.db.collection(collection).where(UPDATED_AT_FIELD, ">", since)
+        if field_paths is not None:
+            query = query.select(field_paths)
+        return {doc.id: doc.to_dict() for doc in query.stream()}
+
+    def apply(self, operations: List[Operation]) -> None:
+        for start in range(0, len(operations), self.MAX_OPERATIONS):
+            batch = self.db.batch()
+            for kind, collection, document_id, payload in operations[
+                start : start + self.MAX_OPERATIONS
+            ]:
+                doc_ref = self.db.collection(collection).document(document_id)
+                if kind == "set":
+                    batch.set(doc_ref, payload)
+                elif kind == "update":
+                    batch.set(doc_ref, payload, merge=True)
+                else:
+                    from firebase_admin import firestore
+
+                    field, values = payload
+                    batch.set(
+                        doc_ref, {field: firestore.ArrayUnion(values)}, merge=True
+                    )
+            batch.commit()
+
+
+class SQLiteDocumentStore(DocumentStore):
+    """
+    Stores documents in a local SQLite database in WAL mode.
+
+    Documents are JSON rows keyed by (collection, ID). Values added with an
+    array union are kept as rows of their own, so appending a recipe to a
+    cookbook is one insert rather than a rewrite of the document. Every call to
+    ``apply`` runs in one transaction.
+
+    Attributes:
+        path (str): Path to the SQLite database.
+    """
+
+    # Stay well below SQLite's limit on bound parameters per statement.
+    MAX_PARAMETERS = 500
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH) -> None:
+        """
+        Initialize the SQLiteDocumentStore.
+
+        Args:
+            path (str): Path to the SQLite database, or ":memory:".
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " collection TEXT NOT NULL,"
+            " id TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " PRIMARY KEY (collection, id)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS array_members ("
+            " collection TEXT NOT NULL,"
+            " id TEXT NOT NULL,"
+            " field TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " position INTEGER NOT NULL,"
+            " PRIMARY KEY (collection, id, field, value)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def _select(
+        self, collection: str, document_ids: Optional[List[str]]
+    ) -> Dict[str, Dict]:
+        # Caller must hold self._lock.
+        documents: Dict[str, Dict] = {}
+        members: List[Tuple[str, str, str]] = []
+        if document_ids is None:
+            rows = self._conn.execute(
+                "SELECT id, data FROM documents WHERE collection = ?", (collection,)
+            ).fetchall()
+            members = self._conn.execute(
+                "SELECT id, field, value FROM array_members WHERE collection = ?"
+                " ORDER BY id, field, position",
+                (collection,),
+            ).fetchall()
+        else:
+            rows = []
+            unique_ids = list(dict.fromkeys(document_ids))
+            for start in range(0, len(unique_ids), self.MAX_PARAMETERS):
+                chunk = unique_ids[start : start + self.MAX_PARAMETERS]
+                placeholders = ", ".join("?" * len(chunk))
+                rows += self._conn.execute(
+                    "SELECT id, data FROM documents"
+                    f" WHERE collection = ? AND id IN ({placeholders})",
+                    (collection, *chunk),
+                ).fetchall()
+                members += self._conn.execute(
+                    "SELECT id, field, value FROM array_members"
+                    f" WHERE collection = ? AND id IN ({placeholders})"
+                    " ORDER BY id, field, position",
+                    (collection, *chunk),
+                ).fetchall()
+        for document_id, data in rows:
+            documents[document_id] = json.loads(data)
+        for document_id, field, value in members:
+            values = documents[document_id].setdefault(field, [])
+            value = json.loads(value)
+            if value not in values:
+                values.append(value)
+        return documents
+
+    def get(
+        self,
+        collection: str,
+        document_ids: List[str],
+        field_paths: Optional[List[str]] = None,
+    ) -> Dict[str, Dict]:
+        with self._lock:
+            documents = self._select(collection, document_ids)
+        return {
+            document_id: _project(data, field_paths)
+            for document_id, data in documents.items()
+        }
+
+    def list(self, collection: str) -> Dict[str, Dict]:
+        with self._lock:
+            return self._select(collection, None)
+
+    def updated_since(
+        self,
+        collection: str,
+        since: float,
+        field_paths: Optional[List[str]] = None,
+    ) -> Dict[str, Dict]:
+        with self._lock:
+            document_ids = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT id FROM documents WHERE collection = ?"
+                    " AND json_extract(data, ?) > ?",
+                    (collection, f"$.{UPDATED_AT_FIELD}", since),
+                )
+            ]
+            documents = self._select(collection, document_ids)
+        return {
+            document_id: _project(data, field_paths)
+            for document_id, data in documents.items()
+        }
+
+    def _set(self, collection: str, document_id: str, data: Dict) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents VALUES (?, ?, ?)",
+            (collection, document_id, json.dumps(data)),
+        )
+
+    def _clear_members(
+        self, collection: str, document_id: str, fields: Optional[Iterable[str]]
+    ) -> None:
+        if fields is None:
+            self._conn.execute(
+                "DELETE FROM array_members WHERE collection = ? AND id = ?",
+                (collection, document_id),
+            )
+            return
+        for field in fields:
+            self._conn.execute(
+                "DELETE FROM array_members"
+                " WHERE collection = ? AND id = ? AND field = ?",
+                (collection, document_id, field),
+            )
+
+    def _apply_one(
+        self, kind: str, collection: str, document_id: str, payload: Any
+    ) -> None:
+        if kind == "set":
+            self._clear_members(collection, document_id, None)
+            self._set(collection, document_id, payload)
+        elif kind == "update":
+            data = self._select(collection, [document_id]).get(document_id, {})
+            merge_fields(data, payload)
+            self._clear_members(collection, document_id, payload.keys())
+            self._set(collection, document_id, data)
+        else:
+            field, values = payload
+            self._conn.execute(
+                "INSERT OR IGNORE INTO documents VALUES (?, ?, '{}')",
+                (collection, document_id),
+            )
+            position = self._conn.execute(
+                "SELECT COALESCE(MAX(position), -1) FROM array_members"
+                " WHERE collection = ? AND id = ? AND field = ?",
+                (collection, document_id, field),
+            ).fetchone()[0]
+            for value in values:
+                position += 1
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO array_members VALUES (?, ?, ?, ?, ?)",
+                    (collection, document_id, field, json.dumps(value), position),
+                )
+
+    def apply(self, operations: List[Operation]) -> None:
+        with self._lock:
+            with self._conn:
+                for operation in operations:
+                    self._apply_one(*operation)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _read_legacy_document(path: str) -> Optional[Dict]:
+    with open(path, "r") as file:
+        content = file.read()
+    try:
+        data = ast.literal_eval(content)
+    except (ValueError, SyntaxError):
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError:
+            return None
+    return data if isinstance(data, dict) else None
+
+
+def _read_legacy_directory(directory: str) -> List[Tuple[str, str, Dict]]:
+    """
+    Read the dictionary documents stored as ``{document ID}.json`` in a directory.
+
+    Args:
+        directory (str): Directory to read.
+
+    Returns:
+        list: (document ID, path, data) tuples, sorted by file name.
+    """
+    documents = []
+    for file_name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, file_name)
+        if not file_name.endswith(".json") or not os.path.isfile(path):
+            continue
+        try:
+            data = _read_legacy_document(path)
+        except OSError as e:
+            logging.error(f"Error reading local document {path}: {e}")
+            continue
+        if data is not None:
+            documents.append((file_name[: -len(".json")], path, data))
+    return documents
+
+
+def _nested_cookbook_operations(
+    users_directory: str,
+) -> Tuple[List[Operation], List[str]]:
+    """
+    Build the writes that import the cookbooks stored under their owners.
+
+    The original local layout kept cookbooks at
+    ``users/{user ID}/cookbooks/{cookbook ID}.json``. Each one becomes a
+    ``cookbooks`` document, and its ID is added to the owner's ``cookbooks``
+    array. Recipe IDs are added with an array union so they merge with any
+    top-level ``cookbooks/{cookbook ID}.json`` imported before.
+
+    Args:
+        users_directory (str): The ``users`` collection directory.
+
+    Returns:
+        tuple: The writes and the paths of the files they were read from.
+    """
+    operations: List[Operation] = []
+    paths: List[str] = []
+    for user_id in sorted(os.listdir(users_directory)):
+        directory = os.path.join(users_directory, user_id, "cookbooks")
+        if not os.path.isdir(directory):
+            continue
+        for cookbook_id, path, data in _read_legacy_directory(directory):
+            recipe_ids = data.pop("recipes", None) or []
+            operations.append(("update", "cookbooks", cookbook_id, data))
+            if recipe_ids:
+                operations.append(
+                    ("array_union", "cookbooks", cookbook_id, ("recipes", recipe_ids))
+                )
+            operations.append(
+                ("array_union", "users", user_id, ("cookbooks", [cookbook_id]))
+            )
+            paths.append(path)
+    return operations, paths
+
+
+def migrate_local_tree(
+    store: DocumentStore, root: str = ".", remove: bool = False
+) -> Dict[str, int]:
+    """
+    Import the per-file documents of an old local tree into a document store.
+
+    Every ``{collection}/{document ID}.json`` file under ``root`` that holds a
+    dictionary is imported, as is every cookbook stored under its owner at
+    ``users/{user ID}/cookbooks/{cookbook ID}.json``. Other files, such as
+    uploaded audio and markdown, are left alone.
+
+    Args:
+        store (DocumentStore): Store to import into.
+        root (str): Directory holding the collection directories.
+        remove (bool): Whether to delete the files once they are imported.
+
+    Returns:
+        dict: Number of imported documents keyed by collection.
+    """
+    counts: Dict[str, int] = {}
+    for collection in sorted(os.listdir(root)):
+        directory = os.path.join(root, collection)
+        if not os.path.isdir(directory) or collection.startswith("."):
+            continue
+        documents = _read_legacy_directory(directory)
+        operations: List[Operation] = [
+            ("set", collection, document_id, data) for document_id, _, data in documents
+        ]
+        paths = [path for _, path, _ in documents]
+        nested_paths: List[str] = []
+        if collection == "users":
+            # After the user documents, whose set would drop the array union.
+            nested, nested_paths = _nested_cookbook_operations(directory)
+            operations += nested
+            paths += nested_paths
+        if not operations:
+            continue
+        store.apply(operations)
+        if documents:
+            counts[collection] = len(documents)
+            logging.info(f"Imported {len(documents)} document(s) into {collection}.")
+        if nested_paths:
+            counts["cookbooks"] = counts.get("cookbooks", 0) + len(nested_paths)
+            logging.info(
+                f"Imported {len(nested_paths)} cookbook(s) stored under users."
+            )
+        if remove:
+            for path in paths:
+                os.remove(path)
+    return counts
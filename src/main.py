@@ -1,18 +1,35 @@
 import argparse
+import asyncio
 import logging
 import os
 import uuid
 import warnings
+from typing import List, Optional, Set, Tuple, Union
 
-import instaloader
+# Imported the way the scraper and firebase modules import it, so they all
+# record into the same registry.
+from metrics import get_metrics
 
-from .firebase.client import FirebaseClient
+from .firebase.client import FirebaseClient, WriteBatch
 from .models.cookbook import Cookbook
 from .models.recipe import Recipe
 from .models.user import User
+from .pipeline import Pipeline, Stage
+from .scraper.audio import AUDIO_PROFILES, DEFAULT_AUDIO_PROFILE, get_audio_profile
+from .scraper.completion_cache import CompletionCache
 from .scraper.downloader import InstagramDownloader
+from .scraper.fingerprint import FingerprintIndex, fingerprint_audio
+from .scraper.near_duplicates import (
+    NearDuplicateIndex,
+    minhash_signature,
+    post_text,
+)
+from .scraper.openai_client import AsyncOpenAIClient
+from .scraper.post_cache import PostMetadataCache
+from .scraper.recipe_classifier import RecipeScorer
 from .scraper.recipe_generator import RecipeGenerator
-from .scraper.transcriber import Transcriber
+from .scraper.throttle import RequestScheduler
+from .scraper.transcriber import BatchTranscriber, Transcriber
 
 logging.basicConfig(level=logging.INFO)
 
@@ -24,87 +41,255 @@ warnings.filterwarnings(
 )
 
 
-def get_audio(
-    downloader: InstagramDownloader,
-    post_url: str,
+def audio_metadata_id(shortcode: str) -> str:
+    """
+    Build the ID of the ``audio_metadata`` document of a post.
+
+    The ID keeps the ``.mp3`` suffix of the first archive format whatever the
+    audio is stored as now; the metadata records the actual path and profile.
+
+    Args:
+        shortcode (str): Shortcode of the Instagram post.
+
+    Returns:
+        str: Document ID.
+    """
+    return f"{shortcode}.mp3"
+
+
+def get_cached_audio(
     firebase_client: FirebaseClient,
     shortcode: str,
     audio_path: str,
     local: bool = False,
-) -> str:
+) -> Optional[Tuple[str, str]]:
     """
-    Get the audio file for the Instagram post.
+    Restore a previously stored audio file for the Instagram post.
+
+    The audio is restored in whatever format it was archived in, as recorded in
+    its metadata, so the local path may get a different extension.
 
     Args:
-        downloader (InstagramDownloader): Downloader instance.
-        post_url (str): URL of the Instagram post.
         firebase_client (FirebaseClient): FirebaseClient instance.
         shortcode (str): Shortcode of the Instagram post.
         audio_path (str): Path to save the audio file.
         local (bool): Whether to save files locally or to Firebase.
 
     Returns:
-        str: Caption of the Instagram post.
+        tuple: Caption of the Instagram post and the path of the audio file, or
+            None if no audio is stored yet.
     """
+    try:
+        metadata = firebase_client.get_document(
+            "audio_metadata", audio_metadata_id(shortcode)
+        )
+    except FileNotFoundError:
+        metadata = {}
+    remote_path = metadata.get("audio_path", f"audio/{shortcode}.mp3")
+    audio_path = os.path.splitext(audio_path)[0] + os.path.splitext(remote_path)[1]
     if local and os.path.exists(audio_path):
         logging.info(f"Audio for {shortcode} already exists locally.")
     else:
         try:
-            firebase_client.download_file(f"audio/{shortcode}.mp3", audio_path)
+            firebase_client.download_file(remote_path, audio_path)
             logging.info(f"Audio for {shortcode} downloaded from Firebase Storage.")
         except FileNotFoundError:
             logging.info(f"Audio for {shortcode} does not exist in Firebase Storage.")
-            try:
-                audio_path, caption = downloader.download_content(post_url)
-                firebase_client.upload_file(audio_path, f"audio/{shortcode}.mp3")
-                firebase_client.set_document(
-                    "audio_metadata",
-                    f"{shortcode}.mp3",
-                    {"caption": caption, "audio_path": f"audio/{shortcode}.mp3"},
-                )
-                return caption
-            except Exception as e:
-                logging.error(f"Failed to download audio: {e}")
-                raise e
-    return firebase_client.get_document("audio_metadata", f"{shortcode}.mp3").get(
-        "caption", ""
+            return None
+    return metadata.get("caption", ""), audio_path
+
+
+def store_audio(
+    downloader: InstagramDownloader,
+    firebase_client: FirebaseClient,
+    shortcode: str,
+    audio_path: str,
+    video_url: str,
+    caption: str,
+    batch: Optional[WriteBatch] = None,
+) -> None:
+    """
+    Extract the audio of the Instagram post and store it with its metadata.
+
+    Args:
+        downloader (InstagramDownloader): Downloader instance.
+        firebase_client (FirebaseClient): FirebaseClient instance.
+        shortcode (str): Shortcode of the Instagram post.
+        audio_path (str): Path to save the audio file.
+        video_url (str): URL of the post video.
+        caption (str): Caption of the Instagram post.
+        batch (WriteBatch, optional): Batch to add the metadata write to.
+    """
+    downloader.save_audio(video_url, audio_path)
+    profile = downloader.audio_profile
+    remote_path = f"audio/{shortcode}{profile.extension}"
+    firebase_client.upload_file(audio_path, remote_path)
+    firebase_client.set_document(
+        "audio_metadata",
+        audio_metadata_id(shortcode),
+        {
+            "caption": caption,
+            "audio_path": remote_path,
+            "audio_profile": profile.name,
+            "audio_bytes": os.path.getsize(audio_path),
+        },
+        batch,
     )
 
 
+def get_audio(
+    downloader: InstagramDownloader,
+    post_url: str,
+    firebase_client: FirebaseClient,
+    shortcode: str,
+    audio_path: str,
+    local: bool = False,
+    batch: Optional[WriteBatch] = None,
+) -> Tuple[str, str]:
+    """
+    Get the audio file for the Instagram post.
+
+    Args:
+        downloader (InstagramDownloader): Downloader instance.
+        post_url (str): URL of the Instagram post.
+        firebase_client (FirebaseClient): FirebaseClient instance.
+        shortcode (str): Shortcode of the Instagram post.
+        audio_path (str): Path to save the audio file.
+        local (bool): Whether to save files locally or to Firebase.
+        batch (WriteBatch, optional): Batch to add the metadata write to.
+
+    Returns:
+        tuple: Caption of the Instagram post and the path of the audio file.
+    """
+    cached = get_cached_audio(firebase_client, shortcode, audio_path, local)
+    if cached is not None:
+        return cached
+    try:
+        caption, video_url = downloader.fetch_post(post_url)
+        store_audio(
+            downloader,
+            firebase_client,
+            shortcode,
+            audio_path,
+            video_url,
+            caption,
+            batch,
+        )
+        return caption, audio_path
+    except Exception as e:
+        logging.error(f"Failed to download audio: {e}")
+        raise e
+
+
 def get_transcript(
-    firebase_client: FirebaseClient, shortcode: str, audio_path: str, verbose: bool
+    firebase_client: FirebaseClient,
+    shortcode: str,
+    audio_path: str,
+    verbose: bool,
+    transcriber: Optional[Union[Transcriber, BatchTranscriber]] = None,
+    fingerprints: Optional[FingerprintIndex] = None,
+    batch: Optional[WriteBatch] = None,
 ) -> str:
     """
     Get the transcript for the audio file.
 
+    When a fingerprint index is given, audio that matches an already transcribed
+    post reuses that transcript instead of running Whisper again.
+
     Args:
         firebase_client (FirebaseClient): FirebaseClient instance.
         shortcode (str): Shortcode of the Instagram post.
         audio_path (str): Path to the audio file.
         verbose (bool): Whether to enable verbose output.
+        transcriber (Transcriber, optional): Shared Transcriber instance.
+        fingerprints (FingerprintIndex, optional): Index of known audio.
+        batch (WriteBatch, optional): Batch to add the transcript write to.
 
     Returns:
         str: Transcript of the audio file.
     """
     try:
-        transcript = firebase_client.get_document(
-            "transcripts", shortcode, local_path=f"transcripts/{shortcode}.txt"
-        ).get("transcript", "")
+        transcript = firebase_client.get_document("transcripts", shortcode).get(
+            "transcript", ""
+        )
         logging.info(f"Transcript for {shortcode} already exists.")
     except FileNotFoundError:
         logging.info(f"Transcript for {shortcode} does not exist.")
-        logging.info("Transcribing audio...")
-        transcriber = Transcriber(audio_path)
-        transcript = transcriber.transcribe_audio(verbose)
+        hashes: List[int] = []
+        transcript = ""
+        match: Optional[str] = None
+        if fingerprints is not None:
+            try:
+                hashes = fingerprint_audio(audio_path)
+                match = fingerprints.find_match(hashes)
+            except Exception as e:
+                logging.warning(f"Could not fingerprint audio for {shortcode}: {e}")
+                hashes = []
+            if match and match != shortcode:
+                try:
+                    transcript = firebase_client.get_document("transcripts", match).get(
+                        "transcript", ""
+                    )
+                    logging.info(f"Reusing transcript of {match} for {shortcode}.")
+                except FileNotFoundError:
+                    logging.info(f"Transcript for matching audio {match} is missing.")
+        if not transcript:
+            logging.info("Transcribing audio...")
+            transcriber = transcriber or Transcriber()
+            transcript = transcriber.transcribe_audio(audio_path, verbose)
         if not transcript:
             logging.error("Failed to transcribe audio.")
             raise ValueError("Failed to transcribe audio.")
         firebase_client.set_document(
-            "transcripts", shortcode, {"transcript": transcript}
+            "transcripts", shortcode, {"transcript": transcript}, batch
         )
+        if fingerprints is not None and hashes:
+            fingerprints.add(shortcode, hashes, batch)
     return transcript
 
 
+def find_near_duplicate(
+    near_duplicates: NearDuplicateIndex,
+    shortcode: str,
+    transcript: str,
+    caption: Optional[str],
+    batch: Optional[WriteBatch] = None,
+) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Look for an earlier post with a similar transcript and reuse its outcome.
+
+    A near-duplicate of a post that produced a recipe is linked to that recipe,
+    and a near-duplicate of a classified post reuses its likelihood. Posts
+    without a recipe to link to are added to the index, so later reposts of
+    them are found.
+
+    Args:
+        near_duplicates (NearDuplicateIndex): Index of known transcripts.
+        shortcode (str): Shortcode of the Instagram post.
+        transcript (str): Transcript of the post audio.
+        caption (str, optional): Caption of the post.
+        batch (WriteBatch, optional): Batch to add the signature write to.
+
+    Returns:
+        tuple: ID of the recipe to link the post to, or None to generate one,
+            and the known recipe likelihood of the post, or None to classify it.
+    """
+    signature = minhash_signature(post_text(transcript, caption))
+    match = near_duplicates.find_match(signature)
+    if match is None or match[1] is None:
+        near_duplicates.add(shortcode, signature, batch)
+    if match is None:
+        return None, None
+    matched, recipe_id, likelihood = match
+    if recipe_id is None:
+        get_metrics().increment("near_duplicate_classifications")
+        logging.info(f"Reusing classification of {matched} for {shortcode}.")
+        return None, likelihood
+    get_metrics().increment("near_duplicate_links")
+    logging.info(f"Linking {shortcode} to recipe {recipe_id} of {matched}.")
+    return recipe_id, None
+
+
 def get_caption(downloader: InstagramDownloader, shortcode: str) -> str:
     """
     Get the caption for the Instagram post.
@@ -117,8 +302,7 @@ def get_caption(downloader: InstagramDownloader, shortcode: str) -> str:
         str: Caption of the Instagram post.
     """
     logging.info("Fetching caption...")
-    post = instaloader.Post.from_shortcode(downloader.loader.context, shortcode)
-    return post.caption
+    return downloader.get_post(shortcode)["caption"]
 
 
 def process_post(
@@ -130,10 +314,16 @@ def process_post(
     firebase_client: FirebaseClient,
     verbose: bool = False,
     local: bool = False,
+    transcriber: Optional[Transcriber] = None,
+    fingerprints: Optional[FingerprintIndex] = None,
+    near_duplicates: Optional[NearDuplicateIndex] = None,
 ) -> None:
     """
     Process an Instagram post to generate a recipe.
 
+    A post whose transcript and caption nearly duplicate those of a post a
+    recipe was already generated from is linked to that recipe instead.
+
     Args:
         downloader (InstagramDownloader): Downloader instance.
         post_url (str): URL of the Instagram post.
@@ -143,38 +333,75 @@ def process_post(
         firebase_client (FirebaseClient): FirebaseClient instance.
         verbose (bool): Whether to enable verbose output.
         local (bool): Whether to save files locally or to Firebase.
+        transcriber (Transcriber, optional): Shared Transcriber instance.
+        fingerprints (FingerprintIndex, optional): Index of known audio.
+        near_duplicates (NearDuplicateIndex, optional): Index of known
+            transcripts.
     """
     shortcode = downloader._get_shortcode(post_url)
-    audio_path = os.path.join("downloads", f"{shortcode}.mp3")
+    audio_path = downloader.audio_path(shortcode)
     recipe_path = os.path.join("recipes", f"recipe_{shortcode}.md")
 
     # Check if the recipe already exists for the user
-    user_recipes = user.get_user_recipes()
-    if any(recipe.get("shortcode") == shortcode for recipe in user_recipes):
+    if shortcode in user.shortcodes:
         logging.info(
             f"Recipe for shortcode {shortcode} already exists for user {user.user_id}."
         )
         return
 
-    try:
-        caption = get_audio(
-            downloader, post_url, firebase_client, shortcode, audio_path, local
-        )
-        transcript = get_transcript(firebase_client, shortcode, audio_path, verbose)
-    except Exception as e:
-        logging.error(f"Error processing audio or transcript: {e}")
-        return
-
-    if not caption:
-        caption = get_caption(downloader, shortcode)
-
-    logging.info("Generating recipe...")
-    try:
-        recipe = generator.generate_recipe(transcript, caption, firebase_client)
-        cookbook.add_recipe(recipe)
-    except Exception as e:
-        logging.error(f"Error during recipe generation or saving: {e}")
-        return
+    # Every write for the post is committed together when the block exits.
+    with firebase_client.batch() as batch:
+        try:
+            caption, audio_path = get_audio(
+                downloader,
+                post_url,
+                firebase_client,
+                shortcode,
+                audio_path,
+                local,
+                batch,
+            )
+            transcript = get_transcript(
+                firebase_client,
+                shortcode,
+                audio_path,
+                verbose,
+                transcriber,
+                fingerprints,
+                batch,
+            )
+        except Exception as e:
+            logging.error(f"Error processing audio or transcript: {e}")
+            return
+
+        if not caption:
+            caption = get_caption(downloader, shortcode)
+
+        likelihood: Optional[int] = None
+        if near_duplicates is not None:
+            recipe_id, likelihood = find_near_duplicate(
+                near_duplicates, shortcode, transcript, caption, batch
+            )
+            if recipe_id is not None:
+                user.link_recipe(cookbook, recipe_id, shortcode, batch)
+                logging.info("Done!")
+                return
+
+        logging.info("Generating recipe...")
+        try:
+            if likelihood is None:
+                likelihood = generator.classify_transcript(transcript, caption)
+                if near_duplicates is not None:
+                    near_duplicates.set_likelihood(shortcode, likelihood, batch)
+            recipe = generator.generate_recipe(
+                transcript, caption, firebase_client, shortcode, likelihood
+            )
+            user.add_recipe(cookbook, recipe, batch)
+            if near_duplicates is not None:
+                near_duplicates.set_recipe(shortcode, recipe.recipe_id, batch)
+        except Exception as e:
+            logging.error(f"Error during recipe generation or saving: {e}")
+            return
 
     if verbose or logging.getLogger().getEffectiveLevel() == logging.DEBUG:
         logging.info(f"Generated recipe:\n{recipe}")
@@ -182,6 +409,189 @@ def process_post(
     logging.info("Done!")
 
 
+class PostJob:
+    """
+    The state of one Instagram post as it moves through the pipeline.
+
+    Attributes:
+        post_url (str): URL of the Instagram post.
+        shortcode (str): Shortcode of the Instagram post.
+        audio_path (str): Path of the local audio file.
+        caption (str, optional): Caption of the post.
+        video_url (str, optional): URL of the post video, set when audio is missing.
+        transcript (str, optional): Transcript of the post audio.
+        recipe (Recipe, optional): Generated recipe.
+        linked_recipe_id (str, optional): ID of an existing recipe the post
+            is a near-duplicate of.
+        batch (WriteBatch): Writes for the post, committed when it leaves the
+            pipeline and discarded when a stage fails on it.
+    """
+
+    def __init__(
+        self, post_url: str, shortcode: str, batch: WriteBatch, audio_path: str
+    ) -> None:
+        self.post_url = post_url
+        self.shortcode = shortcode
+        self.batch = batch
+        self.audio_path = audio_path
+        self.caption: Optional[str] = None
+        self.video_url: Optional[str] = None
+        self.transcript: Optional[str] = None
+        self.recipe: Optional[Recipe] = None
+        self.linked_recipe_id: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"PostJob({self.shortcode})"
+
+
+def build_pipeline(
+    downloader: InstagramDownloader,
+    user: User,
+    cookbook: Cookbook,
+    generator: RecipeGenerator,
+    firebase_client: FirebaseClient,
+    transcriber: Union[Transcriber, BatchTranscriber],
+    verbose: bool = False,
+    local: bool = False,
+    concurrency: int = 4,
+    duplicate_threshold: Optional[float] = 0.8,
+) -> Pipeline:
+    """
+    Build the staged pipeline that processes many Instagram posts concurrently.
+
+    Args:
+        downloader (InstagramDownloader): Downloader instance.
+        user (User): User instance.
+        cookbook (Cookbook): Cookbook instance.
+        generator (RecipeGenerator): RecipeGenerator instance.
+        firebase_client (FirebaseClient): FirebaseClient instance.
+        transcriber (Transcriber | BatchTranscriber): Transcriber to use. A
+            BatchTranscriber runs one transcription per worker process at a time;
+            a Transcriber runs on a stage thread and holds the GIL while it works.
+        verbose (bool): Whether to enable verbose output.
+        local (bool): Whether to save files locally or to Firebase.
+        concurrency (int): Concurrency limit of the network-bound stages.
+        duplicate_threshold (float, optional): Transcript similarity above which
+            a post is linked to an existing recipe instead of generating one, or
+            None to always generate.
+
+    Returns:
+        Pipeline: Pipeline taking PostJob items.
+    """
+    fingerprints = FingerprintIndex(firebase_client)
+    near_duplicates = (
+        None
+        if duplicate_threshold is None
+        else NearDuplicateIndex(firebase_client, duplicate_threshold)
+    )
+
+    def fetch(job: PostJob) -> Optional[PostJob]:
+        if job.shortcode in user.shortcodes:
+            logging.info(
+                f"Recipe for shortcode {job.shortcode} already exists for user {user.user_id}."
+            )
+            return None
+        cached = get_cached_audio(firebase_client, job.shortcode, job.audio_path, local)
+        if cached is None:
+            job.caption, job.video_url = downloader.fetch_post(job.post_url)
+        else:
+            job.caption, job.audio_path = cached
+        return job
+
+    def extract(job: PostJob) -> PostJob:
+        if job.video_url:
+            store_audio(
+                downloader,
+                firebase_client,
+                job.shortcode,
+                job.audio_path,
+                job.video_url,
+                job.caption or "",
+                job.batch,
+            )
+        return job
+
+    def transcribe(job: PostJob) -> PostJob:
+        job.transcript = get_transcript(
+            firebase_client,
+            job.shortcode,
+            job.audio_path,
+            verbose,
+            transcriber,
+            fingerprints,
+            job.batch,
+        )
+        return job
+
+    async def generate(job: PostJob) -> PostJob:
+        if not job.caption:
+            job.caption = await asyncio.to_thread(
+                get_caption, downloader, job.shortcode
+            )
+        likelihood: Optional[int] = None
+        if near_duplicates is not None:
+            job.linked_recipe_id, likelihood = await asyncio.to_thread(
+                find_near_duplicate,
+                near_duplicates,
+                job.shortcode,
+                job.transcript or "",
+                job.caption,
+                job.batch,
+            )
+            if job.linked_recipe_id is not None:
+                return job
+            if likelihood is None:
+                likelihood = await generator.aclassify_transcript(
+                    job.transcript or "", job.caption
+                )
+                near_duplicates.set_likelihood(job.shortcode, likelihood, job.batch)
+        job.recipe = await generator.agenerate_recipe(
+            job.transcript or "",
+            job.caption,
+            firebase_client,
+            job.shortcode,
+            likelihood,
+        )
+        return job
+
+    def persist(job: PostJob) -> PostJob:
+        if job.linked_recipe_id is not None:
+            user.link_recipe(cookbook, job.linked_recipe_id, job.shortcode, job.batch)
+            return job
+        assert job.recipe is not None
+        user.add_recipe(cookbook, job.recipe, job.batch)
+        if near_duplicates is not None:
+            near_duplicates.set_recipe(job.shortcode, job.recipe.recipe_id, job.batch)
+        if verbose or logging.getLogger().getEffectiveLevel() == logging.DEBUG:
+            logging.info(f"Generated recipe:\n{job.recipe}")
+        return job
+
+    def commit(job: PostJob, error: Optional[Exception]) -> None:
+        if error is not None:
+            # Commit nothing for a failed post, so it is retried in full.
+            job.batch.discard()
+            return
+        job.batch.commit()
+        if job.recipe is not None or job.linked_recipe_id is not None:
+            logging.info(f"Done with {job.shortcode}!")
+
+    transcribe_concurrency = (
+        transcriber.workers if isinstance(transcriber, BatchTranscriber) else 1
+    )
+    return Pipeline(
+        [
+            Stage("fetch", fetch, concurrency=concurrency),
+            Stage("extract", extract, concurrency=concurrency),
+            # Each transcription thread just waits on its worker process.
+            Stage("transcribe", transcribe, concurrency=transcribe_concurrency),
+            Stage("generate", generate, concurrency=concurrency),
+            Stage("persist", persist, concurrency=concurrency),
+        ],
+        queue_size=2 * concurrency,
+        finalize=commit,
+    )
+
+
 def main() -> None:
     """
     Main function to parse arguments and process Instagram posts.
@@ -199,16 +609,108 @@ def main() -> None:
         default=False,
         help="Save files locally instead of Firestore",
     )
+    parser.add_argument(
+        "--transcribe-workers",
+        type=int,
+        default=1,
+        help="Number of worker processes used to transcribe posts in parallel",
+    )
+    parser.add_argument(
+        "--no-vad",
+        dest="vad",
+        action="store_false",
+        default=True,
+        help="Transcribe the whole clip instead of skipping silence and music",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of posts each network-bound stage works on at once",
+    )
+    parser.add_argument(
+        "--no-prefilter",
+        action="store_true",
+        default=False,
+        help="Send every post to the LLM classifier instead of scoring it locally",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="Always call OpenAI instead of reusing cached completions",
+    )
+    parser.add_argument(
+        "--audio-profile",
+        choices=sorted(AUDIO_PROFILES),
+        default=DEFAULT_AUDIO_PROFILE,
+        help="Encoding of the audio archived for new posts",
+    )
+    parser.add_argument(
+        "--duplicate-threshold",
+        type=float,
+        default=0.8,
+        help="Transcript and caption similarity (0-1) above which a post is "
+        "linked to the recipe of an earlier post instead of generating one",
+    )
+    parser.add_argument(
+        "--no-dedupe",
+        action="store_true",
+        default=False,
+        help="Generate a recipe for every post, even reposts of earlier ones",
+    )
+    parser.add_argument(
+        "--post-cache-ttl",
+        type=float,
+        default=24.0,
+        metavar="HOURS",
+        help="Reuse Instagram post metadata fetched within this many hours "
+        "(0 disables the cache)",
+    )
+    parser.add_argument(
+        "--instagram-rpm",
+        type=float,
+        default=10.0,
+        help="Instagram requests per minute; requests beyond it are spread out "
+        "rather than sent in a burst",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="Record timing spans and write them to PATH; a .prom suffix writes "
+        "the Prometheus text format, anything else JSON (repeatable)",
+    )
 
     args: argparse.Namespace = parser.parse_args()
 
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
+    if args.metrics_out:
+        get_metrics().enabled = True
 
     firebase_client: FirebaseClient = FirebaseClient(local=args.local)
-    downloader: InstagramDownloader = InstagramDownloader(local=args.local)
+    post_cache: Optional[PostMetadataCache] = (
+        PostMetadataCache(ttl=args.post_cache_ttl * 3600)
+        if args.post_cache_ttl > 0
+        else None
+    )
+    downloader: InstagramDownloader = InstagramDownloader(
+        local=args.local,
+        audio_profile=get_audio_profile(args.audio_profile),
+        cache=post_cache,
+        scheduler=RequestScheduler(requests_per_minute=args.instagram_rpm),
+    )
+    cache: Optional[CompletionCache] = None if args.no_cache else CompletionCache()
+    async_client = AsyncOpenAIClient(max_concurrency=args.concurrency)
     generator: RecipeGenerator = RecipeGenerator(
-        output_dir="recipes", local=args.local, firebase_client=firebase_client
+        output_dir="recipes",
+        local=args.local,
+        firebase_client=firebase_client,
+        cache=cache,
+        scorer=None if args.no_prefilter else RecipeScorer(),
+        async_client=async_client,
     )
 
     # Prompt user for their information or generate IDs
@@ -226,7 +728,6 @@ def main() -> None:
         email=user_email,
         firebase_client=firebase_client,
     )
-    user.save()
 
     # Create or select a cookbook
     cookbook_name: str = input("Enter the name of your cookbook: ")
@@ -240,19 +741,64 @@ def main() -> None:
         description=cookbook_description,
         firebase_client=firebase_client,
     )
-    user.create_cookbook(cookbook)
-
+    with firebase_client.batch() as batch:
+        user.save(batch)
+        user.create_cookbook(cookbook, batch)
+
+    # Whisper holds the GIL for long stretches, so even a single transcription
+    # runs in a worker process to keep the other stages moving.
+    transcriber = BatchTranscriber(workers=args.transcribe_workers, vad=args.vad)
+    pipeline = build_pipeline(
+        downloader,
+        user,
+        cookbook,
+        generator,
+        firebase_client,
+        transcriber,
+        verbose=args.debug,
+        local=args.local,
+        concurrency=args.concurrency,
+        duplicate_threshold=None if args.no_dedupe else args.duplicate_threshold,
+    )
+    seen: Set[str] = set()
+    jobs: List[PostJob] = []
     for post_url in args.post_urls:
-        process_post(
-            downloader,
-            post_url,
-            user,
-            cookbook,
-            generator,
-            firebase_client,
-            verbose=args.debug,
-            local=args.local,
+        shortcode = downloader._get_shortcode(post_url)
+        if shortcode not in seen:
+            seen.add(shortcode)
+            jobs.append(
+                PostJob(
+                    post_url,
+                    shortcode,
+                    firebase_client.batch(),
+                    downloader.audio_path(shortcode),
+                )
+            )
+
+    async def run_jobs() -> None:
+        async with async_client:
+            await pipeline.run_async(jobs)
+
+    try:
+        asyncio.run(run_jobs())
+    finally:
+        transcriber.close()
+    logging.info(pipeline.report())
+    if generator.scorer is not None:
+        stats = generator.scorer.stats()
+        logging.info(
+            f"Classification: {stats['accepted']} accepted and "
+            f"{stats['rejected']} rejected locally, {stats['deferred']} sent to the LLM."
         )
+    if cache is not None:
+        cache.close()
+    if post_cache is not None:
+        post_cache.close()
+    if args.metrics_out:
+        logging.info(get_metrics().summary())
+        for path in args.metrics_out:
+            get_metrics().write(path)
+            logging.info(f"Metrics written to {path}.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,287 @@
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Histogram bucket upper bounds per recorded unit.
+BUCKETS: Dict[str, Tuple[float, ...]] = {
+    "seconds": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+    "bytes": tuple(float(4**power) for power in range(5, 16)),
+    "bytes_per_second": tuple(float(4**power) for power in range(7, 15)),
+    "audio_seconds": (1, 5, 10, 15, 30, 60, 90, 120, 300, 600, 1800, 3600),
+    "tokens": tuple(float(2**power) for power in range(4, 18)),
+}
+DEFAULT_BUCKETS = tuple(float(10**power) for power in range(0, 7))
+
+
+class Histogram:
+    """
+    A cumulative histogram with fixed bucket bounds.
+
+    Attributes:
+        bounds (tuple): Upper bounds of the buckets.
+        counts (list): Observations per bucket; the last entry counts values
+            above every bound.
+        count (int): Number of observations.
+        sum (float): Sum of the observations.
+    """
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else f"{bound:.12g}"] = cumulative
+        return {"count": self.count, "sum": round(self.sum, 6), "buckets": buckets}
+
+
+class Span:
+    """
+    A timed step of work that can also record quantities such as bytes.
+
+    Use ``Metrics.span`` to create one. On exit the duration and every added
+    quantity are observed into the ``{name}_{unit}`` histograms.
+
+    Attributes:
+        name (str): Name of the step.
+        quantities (dict): Quantities recorded so far, keyed by unit.
+    """
+
+    def __init__(self, metrics: "Metrics", name: str) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.quantities: Dict[str, float] = {}
+        self._started = 0.0
+
+    def __enter__(self) -> "Span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        self.quantities["seconds"] = time.perf_counter() - self._started
+        self.metrics._record(self.name, self.quantities, failed=exc_type is not None)
+
+    def add(self, **quantities: Optional[float]) -> None:
+        """
+        Add quantities to the span, e.g. ``bytes=...`` or ``tokens=...``.
+
+        Args:
+            **quantities: Amounts keyed by unit. None values are ignored.
+        """
+        for unit, amount in quantities.items():
+            if amount is not None:
+                self.quantities[unit] = self.quantities.get(unit, 0.0) + amount
+
+
+class _NullSpan:
+    # Shared stand-in returned while metrics are disabled.
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+    def add(self, **quantities: Optional[float]) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """
+    A registry of span histograms and counters for one process.
+
+    While disabled, spans are a shared no-op object and nothing is recorded.
+
+    Attributes:
+        enabled (bool): Whether spans are recorded.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str) -> Any:
+        """
+        Start a span.
+
+        Args:
+            name (str): Name of the step, e.g. "transcribe".
+
+        Returns:
+            Span: Context manager timing the step.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name)
+
+    def timed(self, name: str) -> Callable[[F], F]:
+        """
+        Decorate a function so every call is recorded as a span.
+
+        Args:
+            name (str): Name of the step.
+
+        Returns:
+            callable: Decorator.
+        """
+
+        def decorator(func: F) -> F:
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, name):
+                    return func(*args, **kwargs)
+
+            wrapper.__name__ = func.__name__
+            wrapper.__qualname__ = func.__qualname__
+            wrapper.__doc__ = func.__doc__
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+    def increment(self, name: str, amount: float = 1.0) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name (str): Counter name.
+            amount (float): Amount to add.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0.0) + amount
+
+    def _record(self, name: str, quantities: Dict[str, float], failed: bool) -> None:
+        with self._lock:
+            for unit, amount in quantities.items():
+                key = f"{name}_{unit}"
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = Histogram(BUCKETS.get(unit, DEFAULT_BUCKETS))
+                    self._histograms[key] = histogram
+                histogram.observe(amount)
+            if failed:
+                key = f"{name}_errors"
+                self._counters[key] = self._counters.get(key, 0.0) + 1
+
+    def reset(self) -> None:
+        """
+        Drop everything recorded so far.
+        """
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Snapshot the recorded metrics.
+
+        Returns:
+            dict: Histograms and counters keyed by name.
+        """
+        with self._lock:
+            return {
+                "histograms": {
+                    name: histogram.to_dict()
+                    for name, histogram in sorted(self._histograms.items())
+                },
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def to_prometheus(self, prefix: str = "recipe_bot") -> str:
+        """
+        Render the recorded metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): Prefix added to every metric name.
+
+        Returns:
+            str: Metrics text.
+        """
+        snapshot = self.to_dict()
+        lines: List[str] = []
+        for name, histogram in snapshot["histograms"].items():
+            metric = _metric_name(prefix, name)
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, count in histogram["buckets"].items():
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{metric}_sum {histogram['sum']}")
+            lines.append(f"{metric}_count {histogram['count']}")
+        for name, value in snapshot["counters"].items():
+            metric = _metric_name(prefix, name) + "_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Write the recorded metrics to a file.
+
+        Args:
+            path (str): Output path. Files ending in ``.prom`` get the Prometheus
+                text format; anything else gets JSON.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file:
+            if path.endswith(".prom"):
+                file.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), file, indent=2)
+
+    def summary(self) -> str:
+        """
+        Summarize the span durations.
+
+        Returns:
+            str: One line per span.
+        """
+        lines = ["Spans:"]
+        for name, histogram in self.to_dict()["histograms"].items():
+            if not name.endswith("_seconds") or name.endswith("_audio_seconds"):
+                continue
+            count = histogram["count"]
+            mean = histogram["sum"] / count if count else 0.0
+            lines.append(
+                f"  {name[: -len('_seconds')]:<20} n={count} "
+                f"total={histogram['sum']:.1f}s mean={mean:.3f}s"
+            )
+        return "\n".join(lines)
+
+
+def _metric_name(prefix: str, name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}_{name}")
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """
+    Get the process-wide metrics registry.
+
+    Returns:
+        Metrics: Shared registry, disabled until ``enabled`` is set.
+    """
+    return _metrics
@@ -0,0 +1,42 @@
+import argparse
+import logging
+
+from firebase.store import DEFAULT_STORE_PATH, SQLiteDocumentStore, migrate_local_tree
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main() -> None:
+    """
+    Main function to import an old file-per-document local tree into SQLite.
+    """
+    parser = argparse.ArgumentParser(
+        description="Import local {collection}/{id}.json documents into SQLite."
+    )
+    parser.add_argument(
+        "--root", default=".", help="Directory holding the collection directories"
+    )
+    parser.add_argument(
+        "--database", default=DEFAULT_STORE_PATH, help="SQLite database to import into"
+    )
+    parser.add_argument(
+        "--remove",
+        action="store_true",
+        default=False,
+        help="Delete the document files once they are imported",
+    )
+    args = parser.parse_args()
+
+    store = SQLiteDocumentStore(args.database)
+    try:
+        counts = migrate_local_tree(store, args.root, remove=args.remove)
+    finally:
+        store.close()
+    logging.info(
+        f"Imported {sum(counts.values())} document(s) from {len(counts)} "
+        f"collection(s) into {args.database}."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
 from .cookbook import Cookbook
+from .ingredients import normalize_ingredients
+from .library_cache import LibraryCache
 from .recipe import Recipe
+from .search_index import SearchIndex, get_search_index
+from .shortcode_index import ShortcodeIndex
 from .user import User
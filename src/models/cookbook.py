@@ -1,10 +1,8 @@
 import logging
-import os
-from typing import Optional
+import time
+from typing import Dict, List, Optional
 
-from google.cloud import firestore  # type: ignore
-
-from firebase.client import FirebaseClient
+from firebase.client import FirebaseClient, WriteBatch
 
 from .recipe import Recipe
 
@@ -22,42 +20,111 @@ class Cookbook:
         self.description = description
         self.firebase_client = firebase_client or FirebaseClient()
 
-    def save(self, user_id: str) -> None:
+    def save(self, user_id: str, batch: Optional[WriteBatch] = None) -> None:
         cookbook_data = {
             "name": self.name,
             "description": self.description,
             "recipes": [],  # Initialize recipes as an empty array
+            "updated_at": time.time(),
         }
-        self.firebase_client.create_cookbook(user_id, self.cookbook_id, cookbook_data)
-
-    def add_recipe(self, recipe: Recipe) -> None:
-        recipe.save()
-        if self.firebase_client.local:
-            local_path = f"cookbooks/{self.cookbook_id}.json"
-            if os.path.exists(local_path):
-                try:
-                    with open(local_path, "r") as file:
-                        cookbook_data = eval(file.read())
-                    cookbook_data["recipes"].append(recipe.recipe_id)
-                    with open(local_path, "w") as file:
-                        file.write(str(cookbook_data))
-                    logging.info(
-                        f"Recipe {recipe.recipe_id} associated with cookbook {self.cookbook_id} locally."
-                    )
-                except Exception as e:
-                    logging.error(f"Error associating recipe locally: {e}")
-            else:
-                logging.error(f"Cookbook {self.cookbook_id} does not exist locally.")
-        else:
+        self.firebase_client.create_cookbook(
+            user_id, self.cookbook_id, cookbook_data, batch
+        )
+
+    def add_recipe(self, recipe: Recipe, batch: Optional[WriteBatch] = None) -> None:
+        """
+        Save a recipe and associate it with the cookbook in one batched write.
+
+        Args:
+            recipe (Recipe): Recipe to add.
+            batch (WriteBatch, optional): Batch to add the writes to instead of
+                committing them immediately.
+        """
+        if batch is None:
             try:
-                cookbook_ref = self.firebase_client.db.collection("cookbooks").document(
-                    self.cookbook_id
-                )
-                cookbook_ref.update(
-                    {"recipes": firestore.ArrayUnion([recipe.recipe_id])}
-                )
+                with self.firebase_client.batch() as batch:
+                    self.add_recipe(recipe, batch)
                 logging.info(
                     f"Recipe {recipe.recipe_id} associated with cookbook {self.cookbook_id}."
                 )
             except Exception as e:
                 logging.error(f"Error associating recipe: {e}")
+            return
+        recipe.save(batch)
+        self.link_recipe(recipe.recipe_id, batch)
+
+    def link_recipe(self, recipe_id: str, batch: WriteBatch) -> None:
+        """
+        Associate an already saved recipe with the cookbook.
+
+        Args:
+            recipe_id (str): ID of the recipe.
+            batch (WriteBatch): Batch to add the writes to.
+        """
+        batch.array_union("cookbooks", self.cookbook_id, "recipes", [recipe_id])
+        batch.update("cookbooks", self.cookbook_id, {"updated_at": time.time()})
+
+    def get_recipes(self, field_paths: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Retrieve every recipe in the cookbook.
+
+        Args:
+            field_paths (list, optional): Recipe fields to return. Defaults to
+                the whole recipe.
+
+        Returns:
+            list: Recipe data, each with its ``recipe_id``.
+        """
+        return self.load_recipes(self.firebase_client, [self.cookbook_id], field_paths)
+
+    @staticmethod
+    def load_recipe_ids(
+        firebase_client: FirebaseClient, cookbook_ids: List[str]
+    ) -> List[str]:
+        """
+        Retrieve the IDs of the recipes in several cookbooks in one bulk read.
+
+        Args:
+            firebase_client (FirebaseClient): Firebase client instance.
+            cookbook_ids (list): IDs of the cookbooks.
+
+        Returns:
+            list: Unique recipe IDs in cookbook order.
+        """
+        cookbooks = firebase_client.get_documents(
+            "cookbooks", cookbook_ids, field_paths=["recipes"]
+        )
+        return list(
+            dict.fromkeys(
+                recipe_id
+                for cookbook in cookbooks
+                if cookbook is not None
+                for recipe_id in cookbook.get("recipes", [])
+            )
+        )
+
+    @staticmethod
+    def load_recipes(
+        firebase_client: FirebaseClient,
+        cookbook_ids: List[str],
+        field_paths: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        """
+        Retrieve the recipes of several cookbooks in two bulk reads.
+
+        Args:
+            firebase_client (FirebaseClient): Firebase client instance.
+            cookbook_ids (list): IDs of the cookbooks.
+            field_paths (list, optional): Recipe fields to return. Defaults to
+                the whole recipe.
+
+        Returns:
+            list: Recipe data, each with its ``recipe_id``, in cookbook order.
+        """
+        recipe_ids = Cookbook.load_recipe_ids(firebase_client, cookbook_ids)
+        recipes = firebase_client.get_documents("recipes", recipe_ids, field_paths)
+        return [
+            {**recipe, "recipe_id": recipe_id}
+            for recipe_id, recipe in zip(recipe_ids, recipes)
+            if recipe is not None
+        ]
@@ -0,0 +1,186 @@
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .ingredients import normalize_ingredient, normalize_ingredients
+
+
+class IngredientIndex:
+    """
+    An in-memory bitset index from canonical ingredients to recipes.
+
+    Each ingredient is a row of bits with one column per recipe, packed eight
+    recipes to a byte, so set queries over thousands of recipes are a handful
+    of vectorized AND, OR and bit-count operations and never touch storage.
+
+    A queried name matches every indexed name that contains its words in
+    order, so "chicken" finds "chicken breast" and "pepper" finds "red bell
+    pepper".
+
+    Attributes:
+        recipe_ids (list): Recipe ID of every column.
+    """
+
+    def __init__(self) -> None:
+        self.recipe_ids: List[str] = []
+        self._columns: Dict[str, int] = {}
+        self._rows: Dict[str, int] = {}
+        self._bits = np.zeros((8, 8), dtype=np.uint8)
+        self._counts = np.zeros(64, dtype=np.int32)
+
+    @classmethod
+    def from_recipes(cls, recipes: Iterable[Dict]) -> "IngredientIndex":
+        """
+        Build an index from recipe data.
+
+        Recipes without ``canonical_ingredients``, such as ones generated
+        before normalization existed, are normalized from ``ingredients``.
+
+        Args:
+            recipes (iterable): Recipe data, each with its ``recipe_id``.
+
+        Returns:
+            IngredientIndex: New index.
+        """
+        index = cls()
+        for recipe in recipes:
+            names = recipe.get("canonical_ingredients")
+            if names is None:
+                names = normalize_ingredients(recipe.get("ingredients") or [])
+            index.add(recipe["recipe_id"], names)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.recipe_ids)
+
+    def __contains__(self, recipe_id: object) -> bool:
+        return recipe_id in self._columns
+
+    @property
+    def ingredients(self) -> List[str]:
+        """
+        Every indexed ingredient name.
+        """
+        return list(self._rows)
+
+    def _row(self, name: str) -> int:
+        row = self._rows.get(name)
+        if row is None:
+            row = len(self._rows)
+            if row == self._bits.shape[0]:
+                self._bits = np.vstack([self._bits, np.zeros_like(self._bits)])
+            self._rows[name] = row
+        return row
+
+    def _column(self, recipe_id: str) -> int:
+        column = self._columns.get(recipe_id)
+        if column is None:
+            column = len(self.recipe_ids)
+            if column == self._bits.shape[1] * 8:
+                self._bits = np.hstack([self._bits, np.zeros_like(self._bits)])
+                self._counts = np.concatenate(
+                    [self._counts, np.zeros_like(self._counts)]
+                )
+            self._columns[recipe_id] = column
+            self.recipe_ids.append(recipe_id)
+        return column
+
+    def add(self, recipe_id: str, ingredients: Iterable[str]) -> None:
+        """
+        Index a recipe, replacing its previous ingredients if it was indexed.
+
+        Args:
+            recipe_id (str): ID of the recipe.
+            ingredients (iterable): Canonical ingredient names.
+        """
+        column = self._column(recipe_id)
+        byte, mask = column >> 3, np.uint8(0x80 >> (column & 7))
+        self._bits[:, byte] &= ~mask
+        rows = {self._row(name) for name in ingredients}
+        for row in rows:
+            self._bits[row, byte] |= mask
+        self._counts[column] = len(rows)
+
+    def _matching_rows(self, name: str) -> List[int]:
+        # Rows of the indexed names containing ``name`` as whole words.
+        padded = f" {name} "
+        return [
+            row
+            for indexed, row in self._rows.items()
+            if indexed == name or padded in f" {indexed} "
+        ]
+
+    def _lookup(self, ingredients: Iterable[str]) -> List[List[int]]:
+        # Matching rows of each distinct normalized name.
+        names = dict.fromkeys(
+            name
+            for ingredient in ingredients
+            for name in normalize_ingredient(ingredient)
+        )
+        return [self._matching_rows(name) for name in names]
+
+    def _width(self) -> int:
+        return (len(self.recipe_ids) + 7) // 8
+
+    def _recipes(self, bits: np.ndarray) -> List[str]:
+        columns = np.flatnonzero(np.unpackbits(bits, count=len(self.recipe_ids)))
+        return [self.recipe_ids[column] for column in columns]
+
+    def contains_all(self, ingredients: Iterable[str]) -> List[str]:
+        """
+        Find the recipes that use every one of the ingredients.
+
+        Args:
+            ingredients (iterable): Ingredient names; they are normalized first.
+
+        Returns:
+            list: Recipe IDs.
+        """
+        groups = self._lookup(ingredients)
+        if not groups or not all(groups):
+            return []
+        width = self._width()
+        masks = [
+            np.bitwise_or.reduce(self._bits[rows, :width], axis=0) for rows in groups
+        ]
+        return self._recipes(np.bitwise_and.reduce(masks, axis=0))
+
+    def contains_any(self, ingredients: Iterable[str]) -> List[str]:
+        """
+        Find the recipes that use at least one of the ingredients.
+
+        Args:
+            ingredients (iterable): Ingredient names; they are normalized first.
+
+        Returns:
+            list: Recipe IDs.
+        """
+        rows = sorted({row for group in self._lookup(ingredients) for row in group})
+        if not rows:
+            return []
+        masks = self._bits[rows, : self._width()]
+        return self._recipes(np.bitwise_or.reduce(masks, axis=0))
+
+    def missing_at_most(
+        self, ingredients: Iterable[str], missing: int = 0
+    ) -> List[Tuple[str, int]]:
+        """
+        Find the recipes that can be cooked with the ingredients at hand.
+
+        Args:
+            ingredients (iterable): Ingredient names at hand; they are normalized
+                first.
+            missing (int): Number of a recipe's ingredients that may be missing.
+
+        Returns:
+            list: (recipe ID, number of missing ingredients) pairs, fewest
+                missing first.
+        """
+        count = len(self.recipe_ids)
+        rows = sorted({row for group in self._lookup(ingredients) for row in group})
+        masks = self._bits[rows, : self._width()]
+        have = np.unpackbits(masks, axis=1, count=count).sum(axis=0, dtype=np.int32)
+        lacking = self._counts[:count] - have
+        columns = np.flatnonzero((lacking <= missing) & (self._counts[:count] > 0))
+        columns = columns[np.argsort(lacking[columns], kind="stable")]
+        return [(self.recipe_ids[column], int(lacking[column])) for column in columns]
@@ -0,0 +1,120 @@
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+# fmt: off
+# Words dropped from ingredient lines: units and containers...
+UNITS = {
+    "bag", "bunch", "can", "clove", "cup", "dash", "drop", "g", "gallon", "gram",
+    "handful", "head", "jar", "kg", "kilogram", "l", "lb", "liter", "litre", "mg",
+    "ml", "ounce", "oz", "pack", "package", "packet", "piece", "pinch", "pint",
+    "pound", "quart", "slice", "sprig", "stalk", "stick", "tablespoon", "tbsp",
+    "teaspoon", "tin", "tsp", "x",
+}
+# ...and words describing size, preparation or state rather than the ingredient.
+DESCRIPTORS = {
+    "about", "beaten", "boneless", "chopped", "cold", "cooked", "crushed", "cubed",
+    "diced", "divided", "dried", "extra", "finely", "fresh", "freshly", "frozen",
+    "grated", "ground", "halved", "heaping", "large", "lukewarm", "medium",
+    "melted", "minced", "optional", "packed", "peeled", "quartered", "raw", "ripe",
+    "roughly", "shredded", "skinless", "sliced", "small", "softened", "taste",
+    "thinly", "virgin", "warm", "whole",
+}
+# fmt: on
+FILLER = {"a", "an", "of", "the", "some", "few", "to", "for", "plus", "more"}
+# Words ending in "s" that are not plurals.
+NOT_PLURAL = {"asparagus", "couscous", "hummus", "molasses", "swiss", "grits", "oats"}
+
+
+def _singular(word: str) -> str:
+    if word in NOT_PLURAL or len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    # leaves, halves, loaves; but not olives, cloves or chives.
+    if word.endswith(("eaves", "alves", "oaves")):
+        return word[:-3] + "f"
+    if word.endswith(("oes", "ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def _canonical_name(text: str) -> Optional[str]:
+    words = []
+    units = []
+    for word in re.findall(r"[a-z]+", text):
+        if _singular(word) in UNITS:
+            units.append(word)
+        elif word not in DESCRIPTORS and word not in FILLER:
+            words.append(word)
+    if not words:
+        # A unit word can be the ingredient itself, as in "ground cloves".
+        if not units:
+            return None
+        words = units[-1:]
+    # Only the head noun is singularized: "cherry tomatoes" -> "cherry tomato".
+    words[-1] = _singular(words[-1])
+    return " ".join(words)
+
+
+def _split_ingredients(text: str) -> List[str]:
+    # Split on "and" and "&", except between a repeated word ("half and half").
+    parts = re.split(r"(\band\b)", text.replace("&", " and "))
+    merged = [parts[0]]
+    for separator, part in zip(parts[1::2], parts[2::2]):
+        before, after = merged[-1].split(), part.split()
+        if before and after and before[-1] == after[0]:
+            merged[-1] += separator + part
+        else:
+            merged.append(part)
+    return merged
+
+
+def normalize_ingredient(line: str) -> List[str]:
+    """
+    Extract canonical ingredient names from a free-text ingredient line.
+
+    Quantities, units, preparation notes and plurals are removed, so
+    "2 large Tomatoes, diced" becomes "tomato". Lines naming several
+    ingredients ("salt and pepper") give one name each, unless "and" joins a
+    word to itself ("half and half"); of alternatives ("butter or margarine")
+    only the first is kept.
+
+    Args:
+        line (str): Ingredient line, e.g. "3 cloves garlic, minced".
+
+    Returns:
+        list: Canonical names, possibly empty.
+    """
+    text = "".join(
+        char
+        for char in unicodedata.normalize("NFKD", line.lower())
+        if not unicodedata.combining(char)
+    )
+    text = re.sub(r"\([^)]*\)", " ", text)
+    text = text.split(",")[0].split(";")[0]
+    names = []
+    for part in _split_ingredients(text):
+        name = _canonical_name(re.split(r"\bor\b", part)[0])
+        if name is not None and name not in names:
+            names.append(name)
+    return names
+
+
+def normalize_ingredients(lines: Iterable[str]) -> List[str]:
+    """
+    Extract the canonical ingredient names of a recipe.
+
+    Args:
+        lines (iterable): Ingredient lines.
+
+    Returns:
+        list: Unique canonical names in order of appearance.
+    """
+    names: Dict[str, None] = {}
+    for line in lines:
+        for name in normalize_ingredient(str(line)):
+            names[name] = None
+    return list(names)
@@ -0,0 +1,310 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+from firebase.client import FirebaseClient
+
+from .search_index import SearchIndex
+
+DEFAULT_LIBRARY_CACHE_PATH = os.path.join(".cache", "library.sqlite3")
+# Documents written up to this many seconds before the last sync are fetched
+# again, so writes from clients with a slightly different clock are not missed.
+CLOCK_SKEW_SECONDS = 300.0
+RECIPE_FIELDS = ["title", "categories", "updated_at"]
+COOKBOOK_FIELDS = ["name", "recipes", "updated_at"]
+
+
+class LibraryCache:
+    """
+    A local cache of a user's cookbook and recipe metadata backed by SQLite.
+
+    The cache holds what the viewer lists (IDs, titles, categories and update
+    times) so it can be shown before anything is read over the network.
+    ``sync`` reconciles it with the document store: the first sync reads the
+    whole library, later ones only the cookbooks and recipes written since the
+    previous sync's watermark. With a search index attached, the recipes it
+    fetches are read in full and indexed as well, as is any recipe of the
+    library the index does not hold yet.
+
+    Attributes:
+        firebase_client (FirebaseClient): Firebase client instance.
+        user_id (str): ID of the user the library belongs to.
+        path (str): Path to the SQLite database.
+        search_index (SearchIndex): Index kept up to date by ``sync``, or None.
+    """
+
+    def __init__(
+        self,
+        firebase_client: FirebaseClient,
+        user_id: str,
+        path: str = DEFAULT_LIBRARY_CACHE_PATH,
+        search_index: Optional[SearchIndex] = None,
+    ) -> None:
+        """
+        Initialize the LibraryCache.
+
+        Args:
+            firebase_client (FirebaseClient): Firebase client instance.
+            user_id (str): ID of the user the library belongs to.
+            path (str): Path to the SQLite database, or ":memory:".
+            search_index (SearchIndex, optional): Index to keep up to date.
+        """
+        self.firebase_client = firebase_client
+        self.user_id = user_id
+        self.path = path
+        self.search_index = search_index
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS libraries ("
+            " user_id TEXT PRIMARY KEY,"
+            " cookbooks TEXT NOT NULL,"
+            " watermark REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cookbooks ("
+            " user_id TEXT NOT NULL,"
+            " cookbook_id TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " recipes TEXT NOT NULL,"
+            " updated_at REAL,"
+            " PRIMARY KEY (user_id, cookbook_id)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS recipes ("
+            " user_id TEXT NOT NULL,"
+            " recipe_id TEXT NOT NULL,"
+            " title TEXT NOT NULL,"
+            " categories TEXT NOT NULL,"
+            " updated_at REAL,"
+            " PRIMARY KEY (user_id, recipe_id)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    @property
+    def watermark(self) -> Optional[float]:
+        """
+        Start time of the last successful sync, or None if it never synced.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT watermark FROM libraries WHERE user_id = ?", (self.user_id,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def recipes(self) -> List[Dict]:
+        """
+        List the cached recipes in cookbook order.
+
+        Returns:
+            list: Recipe metadata with ``recipe_id``, ``title``, ``categories``
+                and ``updated_at``.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cookbooks FROM libraries WHERE user_id = ?", (self.user_id,)
+            ).fetchone()
+            if row is None:
+                return []
+            cookbooks = dict(
+                self._conn.execute(
+                    "SELECT cookbook_id, recipes FROM cookbooks WHERE user_id = ?",
+                    (self.user_id,),
+                ).fetchall()
+            )
+            metadata = {
+                recipe_id: (title, categories, updated_at)
+                for recipe_id, title, categories, updated_at in self._conn.execute(
+                    "SELECT recipe_id, title, categories, updated_at FROM recipes"
+                    " WHERE user_id = ?",
+                    (self.user_id,),
+                )
+            }
+        recipes = []
+        seen = set()
+        for cookbook_id in json.loads(row[0]):
+            for recipe_id in json.loads(cookbooks.get(cookbook_id, "[]")):
+                if recipe_id in seen or recipe_id not in metadata:
+                    continue
+                seen.add(recipe_id)
+                title, categories, updated_at = metadata[recipe_id]
+                recipes.append(
+                    {
+                        "recipe_id": recipe_id,
+                        "title": title,
+                        "categories": json.loads(categories),
+                        "updated_at": updated_at,
+                    }
+                )
+        return recipes
+
+    def _cached_ids(self, table: str, column: str) -> Set[str]:
+        with self._lock:
+            return {
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT {column} FROM {table} WHERE user_id = ?", (self.user_id,)
+                )
+            }
+
+    def _fetch(
+        self,
+        collection: str,
+        ids: List[str],
+        since: Optional[float],
+        fields: Optional[List[str]],
+        known: Set[str],
+    ) -> Dict[str, Dict]:
+        # Everything on the first sync; afterwards only documents written since
+        # the watermark, plus any IDs the cache has never seen.
+        if since is None:
+            found = self.firebase_client.get_documents(collection, ids, fields)
+            return {
+                document_id: data
+                for document_id, data in zip(ids, found)
+                if data is not None
+            }
+        wanted = set(ids)
+        documents = {
+            document_id: data
+            for document_id, data in self.firebase_client.get_updated_documents(
+                collection, since, fields
+            ).items()
+            if document_id in wanted
+        }
+        unseen = [
+            document_id
+            for document_id in ids
+            if document_id not in known and document_id not in documents
+        ]
+        if unseen:
+            found = self.firebase_client.get_documents(collection, unseen, fields)
+            documents.update(
+                (document_id, data)
+                for document_id, data in zip(unseen, found)
+                if data is not None
+            )
+        return documents
+
+    def sync(self) -> int:
+        """
+        Reconcile the cache with the document store.
+
+        Returns:
+            int: Number of recipes fetched.
+
+        Raises:
+            Exception: If a read fails; the cache is left as it was.
+        """
+        started = time.time()
+        watermark = self.watermark
+        since = None if watermark is None else watermark - CLOCK_SKEW_SECONDS
+        user_data = self.firebase_client.get_documents(
+            "users", [self.user_id], field_paths=["cookbooks"]
+        )[0]
+        cookbook_ids = list((user_data or {}).get("cookbooks", []))
+        cookbooks = self._fetch(
+            "cookbooks",
+            cookbook_ids,
+            since,
+            COOKBOOK_FIELDS,
+            self._cached_ids("cookbooks", "cookbook_id"),
+        )
+        with self._lock:
+            cached = dict(
+                self._conn.execute(
+                    "SELECT cookbook_id, recipes FROM cookbooks WHERE user_id = ?",
+                    (self.user_id,),
+                ).fetchall()
+            )
+        recipe_ids = list(
+            dict.fromkeys(
+                recipe_id
+                for cookbook_id in cookbook_ids
+                for recipe_id in (
+                    cookbooks[cookbook_id].get("recipes", [])
+                    if cookbook_id in cookbooks
+                    else json.loads(cached.get(cookbook_id, "[]"))
+                )
+            )
+        )
+        recipes = self._fetch(
+            "recipes",
+            recipe_ids,
+            since,
+            RECIPE_FIELDS if self.search_index is None else None,
+            self._cached_ids("recipes", "recipe_id"),
+        )
+        if self.search_index is not None:
+            self.search_index.add_many(recipes)
+            # Recipes the index never saw, e.g. when it is new or was deleted.
+            self.search_index.add_missing(
+                recipe_ids, lambda ids: self._fetch("recipes", ids, None, None, set())
+            )
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cookbooks VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            self.user_id,
+                            cookbook_id,
+                            data.get("name", ""),
+                            json.dumps(data.get("recipes", [])),
+                            data.get("updated_at"),
+                        )
+                        for cookbook_id, data in cookbooks.items()
+                    ],
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO recipes VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            self.user_id,
+                            recipe_id,
+                            data.get("title", ""),
+                            json.dumps(data.get("categories", [])),
+                            data.get("updated_at"),
+                        )
+                        for recipe_id, data in recipes.items()
+                    ],
+                )
+                # Drop cookbooks and recipes that left the library.
+                self._delete_except("cookbooks", "cookbook_id", cookbook_ids)
+                self._delete_except("recipes", "recipe_id", recipe_ids)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO libraries VALUES (?, ?, ?)",
+                    (self.user_id, json.dumps(cookbook_ids), started),
+                )
+        logging.info(
+            f"Synced library of user {self.user_id}: {len(cookbooks)} cookbook(s) "
+            f"and {len(recipes)} recipe(s) fetched."
+        )
+        return len(recipes)
+
+    def _delete_except(self, table: str, column: str, keep: List[str]) -> None:
+        # Caller must hold self._lock inside a transaction.
+        self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep (id TEXT PRIMARY KEY)")
+        self._conn.execute("DELETE FROM keep")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO keep VALUES (?)", [(key,) for key in keep]
+        )
+        self._conn.execute(
+            f"DELETE FROM {table} WHERE user_id = ?"
+            f" AND {column} NOT IN (SELECT id FROM keep)",
+            (self.user_id,),
+        )
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._conn.close()
@@ -1,6 +1,10 @@
+import logging
+import time
 from typing import Dict, List, Optional, Union
 
-from firebase.client import FirebaseClient
+from firebase.client import FirebaseClient, WriteBatch
+
+from .search_index import get_search_index
 
 
 class Recipe:
@@ -12,25 +16,54 @@ class Recipe:
         instructions: List[str],
         categories: List[str],
         notes: Optional[str] = None,
+        shortcode: Optional[str] = None,
         firebase_client: Optional[FirebaseClient] = None,
+        canonical_ingredients: Optional[List[str]] = None,
     ) -> None:
         self.recipe_id = recipe_id
         self.title = title
         self.ingredients = ingredients
         self.instructions = instructions
         self.notes = notes
+        self.shortcode = shortcode
         self.firebase_client = firebase_client or FirebaseClient()
         self.categories = categories
+        self.canonical_ingredients = canonical_ingredients
+
+    def save(self, batch: Optional[WriteBatch] = None) -> None:
+        """
+        Save the recipe and add it to the search index once it is committed.
 
-    def save(self) -> None:
+        Args:
+            batch (WriteBatch, optional): Batch to add the write to instead of
+                committing it immediately.
+        """
+        if batch is None:
+            try:
+                with self.firebase_client.batch() as batch:
+                    self.save(batch)
+                logging.info(f"Recipe {self.recipe_id} saved in 'recipes' collection.")
+            except Exception as e:
+                logging.error(f"Error saving recipe: {e}")
+            return
         recipe_data = {
             "title": self.title,
             "ingredients": self.ingredients,
             "instructions": self.instructions,
             "notes": self.notes,
             "categories": self.categories,
+            "shortcode": self.shortcode,
+            "canonical_ingredients": self.canonical_ingredients,
+            "updated_at": time.time(),
         }
-        self.firebase_client.save_recipe(self.recipe_id, recipe_data)
+        self.firebase_client.save_recipe(self.recipe_id, recipe_data, batch)
+        batch.on_commit(self._index)
+
+    def _index(self) -> None:
+        try:
+            get_search_index().add(self.recipe_id, self.get_data())
+        except Exception as e:
+            logging.error(f"Error indexing recipe {self.recipe_id}: {e}")
 
     def get_data(self) -> Dict[str, Union[str, List[str]]]:
         return {
@@ -39,6 +72,8 @@ class Recipe:
             "instructions": self.instructions,
             "notes": self.notes,
             "categories": self.categories,
+            "shortcode": self.shortcode,
+            "canonical_ingredients": self.canonical_ingredients,
         }
 
     # ...additional methods...
@@ -0,0 +1,379 @@
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+DEFAULT_SEARCH_INDEX_PATH = os.path.join(".cache", "search.sqlite3")
+# Matches in the title count three times as much as matches in the instructions.
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "categories": 2.0,
+    "ingredients": 1.5,
+    "notes": 1.0,
+    "instructions": 1.0,
+}
+STOPWORDS = {"a", "an", "and", "the", "of", "to", "in", "on", "with", "for", "or"}
+# A query word is expanded to at most this many indexed words it prefixes.
+MAX_EXPANSIONS = 64
+# Completions of a prefix score a little lower than exact word matches.
+PREFIX_FACTOR = 0.8
+# Term-frequency saturation, as in BM25.
+SATURATION = 1.2
+# Stay well below SQLite's limit on bound parameters per statement.
+MAX_PARAMETERS = 500
+
+
+def tokenize(text: str, keep_stopwords: bool = False) -> List[str]:
+    """
+    Split text into lowercase words with accents removed, skipping stopwords.
+
+    Args:
+        text (str): Text to split.
+        keep_stopwords (bool): Whether to keep stopwords too.
+
+    Returns:
+        list: Words in order of appearance.
+    """
+    folded = "".join(
+        char
+        for char in unicodedata.normalize("NFKD", text.lower())
+        if not unicodedata.combining(char)
+    )
+    return [
+        word
+        for word in re.findall(r"[^\W_]+", folded)
+        if keep_stopwords or word not in STOPWORDS
+    ]
+
+
+def query_words(query: str) -> List[str]:
+    """
+    Split a search query into the words to look up.
+
+    Stopwords are skipped, except for a last word that may still be being
+    typed: "to" is the start of "tomato" until a space follows it.
+
+    Args:
+        query (str): Search text.
+
+    Returns:
+        list: Distinct words in order of appearance.
+    """
+    words = tokenize(query, keep_stopwords=True)
+    typing = words[-1:] if query[-1:].isalnum() else []
+    complete = words[: len(words) - len(typing)]
+    return list(
+        dict.fromkeys([word for word in complete if word not in STOPWORDS] + typing)
+    )
+
+
+def _field_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return " ".join(str(item) for item in value)
+    return ""
+
+
+class SearchIndex:
+    """
+    A persistent inverted index over recipes backed by SQLite.
+
+    Every word of a recipe's title, ingredients, instructions, notes and
+    categories is posted with a weight that depends on the fields it appears
+    in. Queries match every word as a prefix, so results update as a word is
+    typed, and are ranked by BM25-style scores.
+
+    Attributes:
+        path (str): Path to the SQLite database.
+    """
+
+    def __init__(self, path: str = DEFAULT_SEARCH_INDEX_PATH) -> None:
+        """
+        Initialize the SearchIndex.
+
+        Args:
+            path (str): Path to the SQLite database, or ":memory:".
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " recipe_id TEXT PRIMARY KEY,"
+            " title TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS terms ("
+            " term TEXT PRIMARY KEY,"
+            " df INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL,"
+            " recipe_id TEXT NOT NULL,"
+            " weight REAL NOT NULL,"
+            " PRIMARY KEY (term, recipe_id)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS postings_recipe_id ON postings (recipe_id)"
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def __contains__(self, recipe_id: object) -> bool:
+        with self._lock:
+            return (
+                self._conn.execute(
+                    "SELECT 1 FROM documents WHERE recipe_id = ?", (recipe_id,)
+                ).fetchone()
+                is not None
+            )
+
+    def _remove_one(self, recipe_id: str) -> None:
+        # Caller must hold self._lock inside a transaction.
+        self._conn.execute(
+            "UPDATE terms SET df = df - 1 WHERE term IN ("
+            " SELECT term FROM postings WHERE recipe_id = ?)",
+            (recipe_id,),
+        )
+        self._conn.execute("DELETE FROM postings WHERE recipe_id = ?", (recipe_id,))
+        self._conn.execute("DELETE FROM documents WHERE recipe_id = ?", (recipe_id,))
+
+    def _add_one(self, recipe_id: str, data: Dict) -> None:
+        # Caller must hold self._lock inside a transaction.
+        self._remove_one(recipe_id)
+        weights: Dict[str, float] = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for word in tokenize(_field_text(data.get(field))):
+                weights[word] += weight
+        self._conn.executemany(
+            "INSERT INTO postings VALUES (?, ?, ?)",
+            [(word, recipe_id, weight) for word, weight in weights.items()],
+        )
+        self._conn.executemany(
+            "INSERT INTO terms VALUES (?, 1)"
+            " ON CONFLICT (term) DO UPDATE SET df = df + 1",
+            [(word,) for word in weights],
+        )
+        self._conn.execute(
+            "INSERT INTO documents VALUES (?, ?)",
+            (recipe_id, str(data.get("title") or "")),
+        )
+
+    def add_many(self, recipes: Dict[str, Dict]) -> None:
+        """
+        Index or re-index recipes in one transaction.
+
+        Args:
+            recipes (dict): Recipe data, as from ``Recipe.get_data``, keyed by
+                recipe ID.
+        """
+        with self._lock:
+            with self._conn:
+                for recipe_id, data in recipes.items():
+                    self._add_one(recipe_id, data)
+                self._conn.execute("DELETE FROM terms WHERE df <= 0")
+
+    def add(self, recipe_id: str, data: Dict) -> None:
+        """
+        Index or re-index a recipe.
+
+        Args:
+            recipe_id (str): ID of the recipe.
+            data (dict): Recipe data, as from ``Recipe.get_data``.
+        """
+        self.add_many({recipe_id: data})
+
+    def missing(self, recipe_ids: Iterable[str]) -> List[str]:
+        """
+        Find the recipes that are not in the index.
+
+        Args:
+            recipe_ids (iterable): Recipe IDs to check.
+
+        Returns:
+            list: The IDs that are not indexed, in their original order.
+        """
+        wanted = list(dict.fromkeys(recipe_ids))
+        indexed: Set[str] = set()
+        with self._lock:
+            for start in range(0, len(wanted), MAX_PARAMETERS):
+                chunk = wanted[start : start + MAX_PARAMETERS]
+                placeholders = ", ".join("?" * len(chunk))
+                indexed.update(
+                    row[0]
+                    for row in self._conn.execute(
+                        "SELECT recipe_id FROM documents"
+                        f" WHERE recipe_id IN ({placeholders})",
+                        chunk,
+                    )
+                )
+        return [recipe_id for recipe_id in wanted if recipe_id not in indexed]
+
+    def add_missing(
+        self,
+        recipe_ids: Iterable[str],
+        fetch: Callable[[List[str]], Dict[str, Dict]],
+    ) -> int:
+        """
+        Index the recipes of a library that the index does not hold yet.
+
+        This fills a new or emptied index with the whole library, and catches
+        recipes saved by other clients, without re-reading indexed recipes.
+
+        Args:
+            recipe_ids (iterable): IDs of every recipe in the library.
+            fetch (callable): Reads the full data of recipes, keyed by ID.
+
+        Returns:
+            int: Number of recipes indexed.
+        """
+        missing = self.missing(recipe_ids)
+        if not missing:
+            return 0
+        recipes = fetch(missing)
+        self.add_many(recipes)
+        logging.info(f"Indexed {len(recipes)} recipe(s) missing from search.")
+        return len(recipes)
+
+    def remove(self, recipe_id: str) -> None:
+        """
+        Drop a recipe from the index.
+
+        Args:
+            recipe_id (str): ID of the recipe.
+        """
+        with self._lock:
+            with self._conn:
+                self._remove_one(recipe_id)
+                self._conn.execute("DELETE FROM terms WHERE df <= 0")
+
+    def _word_scores(self, word: str, documents: int) -> Dict[str, float]:
+        # Caller must hold self._lock. Scores every recipe with a word that
+        # starts with ``word``, keeping the best matching word per recipe.
+        expansions = self._conn.execute(
+            "SELECT term, df FROM terms WHERE term >= ? AND term < ?"
+            " ORDER BY term = ? DESC, df DESC LIMIT ?",
+            (word, word + "\U0010ffff", word, MAX_EXPANSIONS),
+        ).fetchall()
+        if not expansions:
+            return {}
+        idf = {
+            term: math.log(1 + (documents - df + 0.5) / (df + 0.5))
+            for term, df in expansions
+        }
+        placeholders = ", ".join("?" * len(expansions))
+        scores: Dict[str, float] = {}
+        for term, recipe_id, weight in self._conn.execute(
+            "SELECT term, recipe_id, weight FROM postings"
+            f" WHERE term IN ({placeholders})",
+            [term for term, _ in expansions],
+        ):
+            score = idf[term] * weight * (SATURATION + 1) / (weight + SATURATION)
+            if term != word:
+                score *= PREFIX_FACTOR
+            if score > scores.get(recipe_id, 0.0):
+                scores[recipe_id] = score
+        return scores
+
+    def search(
+        self,
+        query: str,
+        limit: int = 50,
+        recipe_ids: Optional[Iterable[str]] = None,
+    ) -> List[Dict]:
+        """
+        Find the recipes matching every word of a query, best matches first.
+
+        Each query word matches indexed words it is a prefix of.
+
+        Args:
+            query (str): Search text.
+            limit (int): Maximum number of results.
+            recipe_ids (iterable, optional): Only return these recipes, e.g. the
+                ones in a user's library.
+
+        Returns:
+            list: Results with ``recipe_id``, ``title`` and ``score``.
+        """
+        words = query_words(query)
+        if not words:
+            return []
+        allowed: Optional[Set[str]] = None if recipe_ids is None else set(recipe_ids)
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[
+                0
+            ]
+            totals: Optional[Dict[str, float]] = None
+            for word in words:
+                scores = self._word_scores(word, documents)
+                if totals is None:
+                    totals = {
+                        recipe_id: score
+                        for recipe_id, score in scores.items()
+                        if allowed is None or recipe_id in allowed
+                    }
+                else:
+                    totals = {
+                        recipe_id: total + scores[recipe_id]
+                        for recipe_id, total in totals.items()
+                        if recipe_id in scores
+                    }
+                if not totals:
+                    return []
+            assert totals is not None
+            best = sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            placeholders = ", ".join("?" * len(best))
+            titles = dict(
+                self._conn.execute(
+                    "SELECT recipe_id, title FROM documents"
+                    f" WHERE recipe_id IN ({placeholders})",
+                    [recipe_id for recipe_id, _ in best],
+                ).fetchall()
+            )
+        return [
+            {
+                "recipe_id": recipe_id,
+                "title": titles.get(recipe_id, ""),
+                "score": round(score, 4),
+            }
+            for recipe_id, score in best
+        ]
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+_search_index: Optional[SearchIndex] = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """
+    Get the process-wide search index, opening it on first use.
+
+    Returns:
+        SearchIndex: Shared index at the default path.
+    """
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex()
+            logging.debug(f"Opened search index at {_search_index.path}.")
+        return _search_index
@@ -0,0 +1,103 @@
+import logging
+import threading
+from typing import Dict, Optional, Set
+
+from firebase.client import FirebaseClient, WriteBatch
+
+
+class ShortcodeIndex:
+    """
+    A per-user index from Instagram shortcodes to the recipes made from them.
+
+    The index is one document in the ``shortcode_index`` collection, keyed by
+    user ID, holding a ``recipes`` map. It is read once on first use and kept
+    up to date in memory as recipes are added, so checking whether a post was
+    already processed needs no further reads.
+
+    Attributes:
+        firebase_client (FirebaseClient): Firebase client instance.
+        user_id (str): ID of the user the index belongs to.
+    """
+
+    COLLECTION = "shortcode_index"
+
+    def __init__(self, firebase_client: FirebaseClient, user_id: str) -> None:
+        self.firebase_client = firebase_client
+        self.user_id = user_id
+        self._recipes: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def all_shortcodes(cls, firebase_client: FirebaseClient) -> Set[str]:
+        """
+        Collect the shortcodes processed for any user.
+
+        Args:
+            firebase_client (FirebaseClient): Firebase client instance.
+
+        Returns:
+            set: Shortcodes that already have a recipe.
+        """
+        return {
+            shortcode
+            for document in firebase_client.list_documents(cls.COLLECTION).values()
+            for shortcode in document.get("recipes", {})
+        }
+
+    def _load(self) -> Dict[str, str]:
+        # Caller must hold self._lock.
+        if self._recipes is None:
+            document = self.firebase_client.get_documents(
+                self.COLLECTION, [self.user_id]
+            )[0]
+            self._recipes = dict((document or {}).get("recipes", {}))
+            logging.info(
+                f"Loaded {len(self._recipes)} processed shortcode(s) for user "
+                f"{self.user_id}."
+            )
+        return self._recipes
+
+    def __contains__(self, shortcode: object) -> bool:
+        with self._lock:
+            return shortcode in self._load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    def get(self, shortcode: str) -> Optional[str]:
+        """
+        Look up the recipe made from a post.
+
+        Args:
+            shortcode (str): Shortcode of the Instagram post.
+
+        Returns:
+            str: Recipe ID, or None if the post has not been processed.
+        """
+        with self._lock:
+            return self._load().get(shortcode)
+
+    def add(
+        self, shortcode: str, recipe_id: str, batch: Optional[WriteBatch] = None
+    ) -> None:
+        """
+        Record the recipe made from a post.
+
+        Args:
+            shortcode (str): Shortcode of the Instagram post.
+            recipe_id (str): ID of the recipe.
+            batch (WriteBatch, optional): Batch to add the write to instead of
+                committing it immediately.
+        """
+        with self._lock:
+            self._load()[shortcode] = recipe_id
+        data = {"recipes": {shortcode: recipe_id}}
+        if batch is not None:
+            batch.update(self.COLLECTION, self.user_id, data)
+            return
+        try:
+            with self.firebase_client.batch() as batch:
+                batch.update(self.COLLECTION, self.user_id, data)
+        except Exception as e:
+            logging.error(f"Error updating shortcode index: {e}")
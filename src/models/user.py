@@ -1,10 +1,14 @@
 import logging
-import os
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-from firebase.client import FirebaseClient
+from firebase.client import FirebaseClient, WriteBatch
 
 from .cookbook import Cookbook
+from .recipe import Recipe
+from .shortcode_index import ShortcodeIndex
+
+if TYPE_CHECKING:
+    from .ingredient_index import IngredientIndex
 
 
 class User:
@@ -19,63 +23,127 @@ class User:
         self.name = name
         self.email = email
         self.firebase_client = firebase_client or FirebaseClient()
+        self.shortcodes = ShortcodeIndex(self.firebase_client, user_id)
 
-    def save(self) -> None:
+    def save(self, batch: Optional[WriteBatch] = None) -> None:
         user_data = {
             "name": self.name,
             "email": self.email,
             "cookbooks": [],  # Initialize cookbooks as an empty array
         }
-        self.firebase_client.create_user(self.user_id, user_data)
+        self.firebase_client.create_user(self.user_id, user_data, batch)
 
-    def create_cookbook(self, cookbook: Cookbook) -> None:
-        cookbook.save(self.user_id)
+    def create_cookbook(
+        self, cookbook: Cookbook, batch: Optional[WriteBatch] = None
+    ) -> None:
+        cookbook.save(self.user_id, batch)
 
-    def get_user_recipes(self) -> List[Dict]:
+    def add_recipe(
+        self, cookbook: Cookbook, recipe: Recipe, batch: Optional[WriteBatch] = None
+    ) -> None:
         """
-        Retrieve all recipes for the user from their cookbooks.
+        Add a recipe to one of the user's cookbooks and index its shortcode.
 
-        Returns:
-            list: List of recipes.
+        Args:
+            cookbook (Cookbook): Cookbook to add the recipe to.
+            recipe (Recipe): Recipe to add.
+            batch (WriteBatch, optional): Batch to add the writes to instead of
+                committing them immediately.
         """
-        recipes = []
-        if self.firebase_client.local:
-            local_path = f"users/{self.user_id}/cookbooks"
-            if os.path.exists(local_path):
-                try:
-                    for cookbook_file in os.listdir(local_path):
-                        cookbook_path = os.path.join(local_path, cookbook_file)
-                        with open(cookbook_path, "r") as file:
-                            cookbook_data = eval(file.read())
-                            recipes.extend(cookbook_data.get("recipes", []))
-                    logging.info(
-                        f"Recipes for user {self.user_id} downloaded from local storage."
-                    )
-                except Exception as e:
-                    logging.error(f"Error downloading recipes from local storage: {e}")
-                    raise e
-            else:
-                logging.error(f"Local path {local_path} does not exist.")
-        else:
+        if batch is None:
             try:
-                user_ref = self.firebase_client.db.collection("users").document(
-                    self.user_id
-                )
-                user_doc = user_ref.get()
-                if not user_doc.exists:
-                    logging.error(f"User {self.user_id} does not exist.")
-                    return []
-                user_data = user_doc.to_dict()
-                for cookbook_id in user_data.get("cookbooks", []):
-                    cookbook_ref = self.firebase_client.db.collection(
-                        "cookbooks"
-                    ).document(cookbook_id)
-                    cookbook_doc = cookbook_ref.get()
-                    if cookbook_doc.exists:
-                        cookbook_data = cookbook_doc.to_dict()
-                        recipes.extend(cookbook_data.get("recipes", []))
-                    else:
-                        logging.error(f"Cookbook with ID {cookbook_id} does not exist.")
+                with self.firebase_client.batch() as batch:
+                    self.add_recipe(cookbook, recipe, batch)
             except Exception as e:
-                logging.error(f"Error retrieving recipes for user {self.user_id}: {e}")
+                logging.error(f"Error adding recipe for user {self.user_id}: {e}")
+            return
+        cookbook.add_recipe(recipe, batch)
+        if recipe.shortcode:
+            self.shortcodes.add(recipe.shortcode, recipe.recipe_id, batch)
+
+    def link_recipe(
+        self, cookbook: Cookbook, recipe_id: str, shortcode: str, batch: WriteBatch
+    ) -> None:
+        """
+        Add an existing recipe to one of the user's cookbooks for another post,
+        such as a repost of the one the recipe was generated from.
+
+        Args:
+            cookbook (Cookbook): Cookbook to add the recipe to.
+            recipe_id (str): ID of the existing recipe.
+            shortcode (str): Shortcode of the post to index the recipe under.
+            batch (WriteBatch): Batch to add the writes to.
+        """
+        cookbook.link_recipe(recipe_id, batch)
+        self.shortcodes.add(shortcode, recipe_id, batch)
+
+    def get_recipe_ids(self) -> List[str]:
+        """
+        Retrieve the IDs of every recipe in the user's cookbooks.
+
+        Only the user and their cookbooks are read, so this stays cheap for
+        large libraries; fetch the recipes themselves as they are needed.
+
+        Returns:
+            list: Unique recipe IDs in cookbook order.
+        """
+        try:
+            user_data = self.firebase_client.get_documents(
+                "users", [self.user_id], field_paths=["cookbooks"]
+            )[0]
+            if user_data is None:
+                logging.error(f"User {self.user_id} does not exist.")
+                return []
+            return Cookbook.load_recipe_ids(
+                self.firebase_client, user_data.get("cookbooks", [])
+            )
+        except Exception as e:
+            logging.error(f"Error retrieving recipes for user {self.user_id}: {e}")
+            return []
+
+    def get_user_recipes(self, field_paths: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Retrieve all recipes for the user from their cookbooks.
+
+        The whole library is loaded in three bulk reads: the user, their
+        cookbooks and the recipes.
+
+        Args:
+            field_paths (list, optional): Recipe fields to return. Defaults to
+                the whole recipe.
+
+        Returns:
+            list: Recipe data, each with its ``recipe_id``.
+        """
+        try:
+            user_data = self.firebase_client.get_documents(
+                "users", [self.user_id], field_paths=["cookbooks"]
+            )[0]
+            if user_data is None:
+                logging.error(f"User {self.user_id} does not exist.")
+                return []
+            recipes = Cookbook.load_recipes(
+                self.firebase_client, user_data.get("cookbooks", []), field_paths
+            )
+        except Exception as e:
+            logging.error(f"Error retrieving recipes for user {self.user_id}: {e}")
+            return []
+        logging.info(f"Loaded {len(recipes)} recipe(s) for user {self.user_id}.")
         return recipes
+
+    def get_ingredient_index(self) -> "IngredientIndex":
+        """
+        Build an ingredient index over the user's recipes.
+
+        The recipes are read once with only their ingredient fields; queries
+        on the index then run in memory.
+
+        Returns:
+            IngredientIndex: Index of the user's recipes.
+        """
+        # Imported here so that loading the models does not load numpy.
+        from .ingredient_index import IngredientIndex
+
+        return IngredientIndex.from_recipes(
+            self.get_user_recipes(field_paths=["ingredients", "canonical_ingredients"])
+        )
@@ -0,0 +1,65 @@
+import argparse
+import logging
+from typing import Dict, List
+
+from firebase.client import FirebaseClient
+from models.user import User
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main() -> None:
+    """
+    Main function to find the recipes that can be cooked with some ingredients.
+    """
+    parser = argparse.ArgumentParser(
+        description="Find recipes in a user's library by their ingredients."
+    )
+    parser.add_argument("ingredients", nargs="+", help="Ingredients, e.g. garlic")
+    parser.add_argument("--user-id", required=True, help="ID of the user")
+    parser.add_argument(
+        "--match",
+        choices=("all", "any", "pantry"),
+        default="pantry",
+        help="Recipes using all of the ingredients, any of them, or only them "
+        "(pantry, allowing --missing others)",
+    )
+    parser.add_argument(
+        "--missing",
+        type=int,
+        default=0,
+        help="With --match pantry, how many other ingredients a recipe may need",
+    )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        default=False,
+        help="Use local storage instead of Firebase",
+    )
+    args = parser.parse_args()
+
+    firebase_client = FirebaseClient(local=args.local)
+    user = User(
+        user_id=args.user_id, name="", email="", firebase_client=firebase_client
+    )
+    index = user.get_ingredient_index()
+    missing: Dict[str, int] = {}
+    if args.match == "all":
+        recipe_ids: List[str] = index.contains_all(args.ingredients)
+    elif args.match == "any":
+        recipe_ids = index.contains_any(args.ingredients)
+    else:
+        matches = index.missing_at_most(args.ingredients, args.missing)
+        recipe_ids = [recipe_id for recipe_id, _ in matches]
+        missing = dict(matches)
+
+    titles = firebase_client.get_documents("recipes", recipe_ids, ["title"])
+    for recipe_id, recipe in zip(recipe_ids, titles):
+        title = (recipe or {}).get("title", recipe_id)
+        suffix = f" (missing {missing[recipe_id]})" if missing.get(recipe_id) else ""
+        print(f"{title}{suffix}")
+    logging.info(f"{len(recipe_ids)} of {len(index)} recipe(s) match.")
+
+
+if __name__ == "__main__":
+    main()
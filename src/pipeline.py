@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Queue item marking the end of the input for one stage worker.
+_DONE = object()
+
+
+class StageStats:
+    """
+    Counters collected for one pipeline stage.
+
+    Attributes:
+        processed (int): Items the stage finished and passed on.
+        skipped (int): Items the stage finished early (returned None).
+        failed (int): Items the stage raised on.
+        busy_seconds (float): Total time spent inside the stage function.
+        started_at (float): Monotonic time the first item entered the stage.
+        finished_at (float): Monotonic time the last item left the stage.
+    """
+
+    def __init__(self) -> None:
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def completed(self) -> int:
+        return self.processed + self.skipped + self.failed
+
+    @property
+    def wall_seconds(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    @property
+    def per_minute(self) -> float:
+        """
+        Items completed per minute of stage wall time.
+
+        Returns:
+            float: Throughput of the stage.
+        """
+        if not self.wall_seconds:
+            return 0.0
+        return self.completed / self.wall_seconds * 60.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wall_seconds": round(self.wall_seconds, 3),
+            "per_minute": round(self.per_minute, 2),
+        }
+
+
+class Stage:
+    """
+    One step of a pipeline with its own concurrency limit and executor.
+
+    The stage function receives an item and returns the item for the next
+    stage, or None to finish that item early. Coroutine functions are awaited
+    on the event loop; plain functions run on ``executor``.
+
+    Attributes:
+        name (str): Stage name used in logs and reports.
+        func (callable): Function applied to each item.
+        concurrency (int): Number of items processed at the same time.
+        executor (Executor, optional): Executor for plain functions. Defaults to
+            the event loop's thread pool.
+        stats (StageStats): Counters for this stage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        concurrency: int = 1,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.concurrency = max(1, concurrency)
+        self.executor = executor
+        self.stats = StageStats()
+
+    async def apply(self, item: Any) -> Any:
+        """
+        Run the stage function on one item.
+
+        Args:
+            item: Item produced by the previous stage.
+
+        Returns:
+            The item for the next stage, or None.
+        """
+        if asyncio.iscoroutinefunction(self.func):
+            return await self.func(item)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.func, item)
+
+
+class Pipeline:
+    """
+    Runs items through a sequence of stages connected by bounded queues.
+
+    Every stage works on different items at the same time, so network-bound
+    and CPU-bound steps overlap. A failure only drops the item it happened on.
+
+    Attributes:
+        stages (list): Stages in the order items pass through them.
+        queue_size (int): Capacity of each queue between stages.
+        finalize (callable, optional): Called with every item once it leaves
+            the pipeline, whether it finished, was skipped or failed, and with
+            the exception it failed on, or None.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        queue_size: int = 8,
+        finalize: Optional[Callable[[Any, Optional[Exception]], Any]] = None,
+    ) -> None:
+        self.stages = stages
+        self.queue_size = queue_size
+        self.finalize = finalize
+        self.wall_seconds = 0.0
+
+    def run(self, items: Iterable[Any]) -> List[Any]:
+        """
+        Run every item through the pipeline.
+
+        Args:
+            items (iterable): Items for the first stage.
+
+        Returns:
+            list: Items that made it out of the last stage, in completion order.
+        """
+        return asyncio.run(self.run_async(items))
+
+    async def run_async(self, items: Iterable[Any]) -> List[Any]:
+        """
+        Run every item through the pipeline on the current event loop.
+
+        Args:
+            items (iterable): Items for the first stage.
+
+        Returns:
+            list: Items that made it out of the last stage, in completion order.
+        """
+        started = time.monotonic()
+        queues: List[asyncio.Queue] = [
+            asyncio.Queue(maxsize=self.queue_size) for _ in self.stages
+        ]
+        results: List[Any] = []
+
+        async def feed() -> None:
+            for item in items:
+                await queues[0].put(item)
+            for _ in range(self.stages[0].concurrency):
+                await queues[0].put(_DONE)
+
+        async def run_stage(index: int) -> None:
+            stage = self.stages[index]
+            workers = [
+                asyncio.create_task(self._worker(stage, queues, index, results))
+                for _ in range(stage.concurrency)
+            ]
+            await asyncio.gather(*workers)
+            if index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].concurrency):
+                    await queues[index + 1].put(_DONE)
+
+        await asyncio.gather(feed(), *(run_stage(i) for i in range(len(self.stages))))
+        self.wall_seconds = time.monotonic() - started
+        return results
+
+    async def _worker(
+        self, stage: Stage, queues: List[asyncio.Queue], index: int, results: List[Any]
+    ) -> None:
+        while True:
+            item = await queues[index].get()
+            if item is _DONE:
+                return
+            stats = stage.stats
+            start = time.monotonic()
+            if stats.started_at is None:
+                stats.started_at = start
+            error: Optional[Exception] = None
+            try:
+                output = await stage.apply(item)
+            except Exception as e:
+                stats.failed += 1
+                logging.error(f"Stage '{stage.name}' failed on {item}: {e}")
+                error = e
+                output = None
+            else:
+                if output is None:
+                    stats.skipped += 1
+                else:
+                    stats.processed += 1
+            finally:
+                stats.finished_at = time.monotonic()
+                stats.busy_seconds += stats.finished_at - start
+
+            if output is None:
+                await self._finalize(item, error)
+            elif index + 1 < len(queues):
+                await queues[index + 1].put(output)
+            else:
+                await self._finalize(output, None)
+                results.append(output)
+
+    async def _finalize(self, item: Any, error: Optional[Exception]) -> None:
+        if self.finalize is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.finalize, item, error)
+        except Exception as e:
+            logging.error(f"Finalizing {item} failed: {e}")
+
+    def report(self) -> str:
+        """
+        Summarize the throughput of every stage.
+
+        Returns:
+            str: One line per stage.
+        """
+        lines = [f"Pipeline finished in {self.wall_seconds:.1f}s:"]
+        for stage in self.stages:
+            stats = stage.stats
+            lines.append(
+                f"  {stage.name:<11} ok={stats.processed} skipped={stats.skipped} "
+                f"failed={stats.failed} busy={stats.busy_seconds:.1f}s "
+                f"throughput={stats.per_minute:.1f}/min"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,188 @@
+import argparse
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from firebase.client import FirebaseClient
+from scraper.audio import (
+    AUDIO_PROFILES,
+    DEFAULT_AUDIO_PROFILE,
+    LEGACY_AUDIO_PROFILE,
+    AudioProfile,
+    extract_audio,
+    get_audio_profile,
+)
+
+logging.basicConfig(level=logging.INFO)
+
+
+def reencode_one(
+    firebase_client: FirebaseClient,
+    document_id: str,
+    metadata: Dict,
+    profile: AudioProfile,
+    keep_originals: bool = False,
+) -> Tuple[int, int]:
+    """
+    Re-encode the archived audio of one post into a profile.
+
+    The new file is uploaded and the metadata updated before the original is
+    deleted, so an interrupted job leaves every post readable and is simply
+    run again.
+
+    Args:
+        firebase_client (FirebaseClient): FirebaseClient instance.
+        document_id (str): ID of the post's ``audio_metadata`` document.
+        metadata (dict): The post's audio metadata.
+        profile (AudioProfile): Profile to re-encode into.
+        keep_originals (bool): Whether to keep the original file in storage.
+
+    Returns:
+        tuple: Sizes in bytes of the original and the re-encoded audio.
+
+    Raises:
+        Exception: If downloading, re-encoding or uploading fails.
+    """
+    shortcode = document_id.removesuffix(".mp3")
+    old_path = metadata.get("audio_path", f"audio/{shortcode}.mp3")
+    new_path = f"audio/{shortcode}{profile.extension}"
+    with tempfile.TemporaryDirectory(prefix="reencode-") as work_dir:
+        original = os.path.join(work_dir, "original" + os.path.splitext(old_path)[1])
+        reencoded = os.path.join(work_dir, "reencoded" + profile.extension)
+        firebase_client.download_file(old_path, original)
+        extract_audio(original, reencoded, profile)
+        sizes = os.path.getsize(original), os.path.getsize(reencoded)
+        firebase_client.upload_file(reencoded, new_path)
+    with firebase_client.batch() as batch:
+        batch.update(
+            "audio_metadata",
+            document_id,
+            {
+                "audio_path": new_path,
+                "audio_profile": profile.name,
+                "audio_bytes": sizes[1],
+            },
+        )
+    if old_path != new_path and not keep_originals:
+        firebase_client.delete_file(old_path)
+    logging.info(
+        f"Re-encoded {shortcode} from {metadata.get('audio_profile', LEGACY_AUDIO_PROFILE)} "
+        f"to {profile.name}: {sizes[0]} -> {sizes[1]} bytes."
+    )
+    return sizes
+
+
+def reencode_archive(
+    firebase_client: FirebaseClient,
+    profile: AudioProfile,
+    shortcodes: Optional[Set[str]] = None,
+    workers: int = 2,
+    limit: Optional[int] = None,
+    keep_originals: bool = False,
+) -> Dict[str, int]:
+    """
+    Re-encode every archived post audio that is not yet in a profile.
+
+    Posts already in the profile are skipped, so the job can be stopped and
+    restarted at any time, and runs alongside the scraper.
+
+    Args:
+        firebase_client (FirebaseClient): FirebaseClient instance.
+        profile (AudioProfile): Profile to re-encode into.
+        shortcodes (set, optional): Only re-encode these posts. Defaults to all.
+        workers (int): Posts re-encoded at the same time.
+        limit (int, optional): Maximum number of posts to re-encode in this run.
+        keep_originals (bool): Whether to keep the original files in storage.
+
+    Returns:
+        dict: Counts of ``reencoded`` and ``failed`` posts, and the total
+            ``bytes_before`` and ``bytes_after`` of the re-encoded ones.
+    """
+    pending: List[Tuple[str, Dict]] = [
+        (document_id, metadata)
+        for document_id, metadata in sorted(
+            firebase_client.list_documents("audio_metadata").items()
+        )
+        if metadata.get("audio_profile", LEGACY_AUDIO_PROFILE) != profile.name
+        and (not shortcodes or document_id.removesuffix(".mp3") in shortcodes)
+    ][:limit]
+    logging.info(f"Re-encoding {len(pending)} audio file(s) to {profile.name}...")
+
+    def run(item: Tuple[str, Dict]) -> Optional[Tuple[int, int]]:
+        document_id, metadata = item
+        try:
+            return reencode_one(
+                firebase_client, document_id, metadata, profile, keep_originals
+            )
+        except Exception as e:
+            logging.error(f"Error re-encoding {document_id}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(run, pending))
+    done = [sizes for sizes in results if sizes is not None]
+    return {
+        "reencoded": len(done),
+        "failed": len(results) - len(done),
+        "bytes_before": sum(before for before, _ in done),
+        "bytes_after": sum(after for _, after in done),
+    }
+
+
+def main() -> None:
+    """
+    Main function to re-encode the audio archive into another profile.
+    """
+    parser = argparse.ArgumentParser(
+        description="Re-encode archived post audio into a compact profile."
+    )
+    parser.add_argument(
+        "shortcodes", nargs="*", help="Only re-encode these posts (default: all)"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=sorted(AUDIO_PROFILES),
+        default=DEFAULT_AUDIO_PROFILE,
+        help="Profile to re-encode into",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=2, help="Posts re-encoded at the same time"
+    )
+    parser.add_argument(
+        "--limit", type=int, help="Stop after this many posts (default: all)"
+    )
+    parser.add_argument(
+        "--keep-originals",
+        action="store_true",
+        default=False,
+        help="Keep the original files in storage",
+    )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        default=False,
+        help="Use local storage instead of Firebase",
+    )
+    args = parser.parse_args()
+
+    firebase_client = FirebaseClient(local=args.local)
+    shortcodes: List[str] = args.shortcodes
+    counts = reencode_archive(
+        firebase_client,
+        get_audio_profile(args.profile),
+        shortcodes=set(shortcodes),
+        workers=args.workers,
+        limit=args.limit,
+        keep_originals=args.keep_originals,
+    )
+    saved = counts["bytes_before"] - counts["bytes_after"]
+    logging.info(
+        f"Re-encoded {counts['reencoded']} file(s), {counts['failed']} failed; "
+        f"{saved / 1e6:.1f} MB saved."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import logging
+import os
+import subprocess
+from typing import Dict, Iterator, List, Optional
+
+# Whisper operates on 16 kHz mono audio.
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # bytes per signed 16-bit PCM sample
+
+
+class AudioProfile:
+    """
+    An encoding used to archive post audio.
+
+    Every profile stores 16 kHz mono audio, which is all Whisper uses, in a
+    format ffmpeg (and so Whisper) reads directly.
+
+    Attributes:
+        name (str): Name recorded in ``audio_metadata``.
+        extension (str): File extension, which also selects the container.
+        codec (str): ffmpeg audio encoder.
+        bitrate (str): Target bitrate.
+        options (list): Extra encoder arguments.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        extension: str,
+        codec: str,
+        bitrate: str,
+        options: Optional[List[str]] = None,
+    ) -> None:
+        self.name = name
+        self.extension = extension
+        self.codec = codec
+        self.bitrate = bitrate
+        self.options = options or []
+
+    def encoder_args(self) -> List[str]:
+        """
+        Build the ffmpeg output arguments of the profile.
+
+        Returns:
+            list: Codec, bitrate and option arguments.
+        """
+        return ["-c:a", self.codec, "-b:a", self.bitrate] + self.options
+
+    def __repr__(self) -> str:
+        return f"AudioProfile({self.name})"
+
+
+AUDIO_PROFILES: Dict[str, AudioProfile] = {
+    "mp3": AudioProfile("mp3", ".mp3", "libmp3lame", "32k"),
+    # Opus tuned for speech is intelligible to Whisper at a fraction of the size.
+    "opus": AudioProfile("opus", ".opus", "libopus", "16k", ["-application", "voip"]),
+}
+DEFAULT_AUDIO_PROFILE = "opus"
+# Audio archived before profiles existed is MP3 at audio/{shortcode}.mp3, and
+# its metadata names no profile.
+LEGACY_AUDIO_PROFILE = "legacy-mp3"
+
+
+def get_audio_profile(name: str = DEFAULT_AUDIO_PROFILE) -> AudioProfile:
+    """
+    Look up an archival audio profile by name.
+
+    Args:
+        name (str): Name of the profile.
+
+    Returns:
+        AudioProfile: The profile.
+
+    Raises:
+        ValueError: If there is no such profile.
+    """
+    try:
+        return AUDIO_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown audio profile {name!r}; choose from {', '.join(AUDIO_PROFILES)}."
+        ) from None
+
+
+def _input_args(source: str) -> List[str]:
+    """
+    Build the ffmpeg input arguments for a local path or a remote URL.
+
+    Args:
+        source (str): Local file path or HTTP(S) URL.
+
+    Returns:
+        list: ffmpeg arguments up to and including the input.
+    """
+    args = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if source.startswith(("http://", "https://")):
+        # Survive dropped connections on long CDN reads.
+        args += ["-reconnect", "1", "-reconnect_streamed", "1"]
+        args += ["-reconnect_delay_max", "5"]
+    return args + ["-i", source, "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE)]
+
+
+def extract_audio(
+    source: str, output_path: str, profile: Optional[AudioProfile] = None
+) -> None:
+    """
+    Extract the audio track of a video into a 16 kHz mono file in one ffmpeg pass.
+
+    The source is streamed by ffmpeg, so neither the video nor the decoded track
+    is ever held in memory or written to disk in full. Audio files are accepted
+    as sources too, which re-encodes them.
+
+    Args:
+        source (str): Local file path or URL of the video.
+        output_path (str): Path to save the audio file.
+        profile (AudioProfile, optional): Encoding of the output. Defaults to
+            the default profile.
+
+    Raises:
+        RuntimeError: If ffmpeg fails.
+    """
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    root, ext = os.path.splitext(output_path)
+    partial_path = f"{root}.part{ext}"
+    profile = profile or get_audio_profile()
+    command = _input_args(source) + profile.encoder_args() + ["-y", partial_path]
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise RuntimeError(
+            f"ffmpeg failed to extract audio: {result.stderr.decode().strip()}"
+        )
+    # Only publish complete files; callers treat an existing path as cached.
+    os.replace(partial_path, output_path)
+    logging.info(f"Audio extracted to {output_path}")
+
+
+def stream_pcm(source: str, chunk_seconds: float = 30.0) -> Iterator[bytes]:
+    """
+    Decode a local file or URL to 16 kHz mono signed 16-bit PCM, chunk by chunk.
+
+    Only one chunk is held in memory at a time.
+
+    Args:
+        source (str): Local file path or URL of the audio or video.
+        chunk_seconds (float): Duration of audio per yielded chunk.
+
+    Yields:
+        bytes: Little-endian PCM samples.
+
+    Raises:
+        RuntimeError: If ffmpeg fails.
+    """
+    chunk_size = int(chunk_seconds * SAMPLE_RATE) * SAMPLE_WIDTH
+    command = _input_args(source) + ["-f", "s16le", "-acodec", "pcm_s16le", "-"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert process.stdout is not None and process.stderr is not None
+    try:
+        while True:
+            chunk = process.stdout.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode audio: {stderr.decode().strip()}")
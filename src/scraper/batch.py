@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+from scraper.openai_client import load_openai
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+
+class BatchBackend(ABC):
+    """
+    Interface for services that run a JSONL file of chat requests as one job.
+
+    The input and output files use the OpenAI Batch API line format.
+    """
+
+    @abstractmethod
+    def submit(self, input_path: str) -> str:
+        """
+        Submit a batch file.
+
+        Args:
+            input_path (str): Path to the JSONL request file.
+
+        Returns:
+            str: Job ID.
+        """
+
+    @abstractmethod
+    def status(self, job_id: str) -> str:
+        """
+        Get the status of a job.
+
+        Args:
+            job_id (str): Job ID.
+
+        Returns:
+            str: "completed", "failed", "expired", "cancelled" or an in-progress
+                status.
+        """
+
+    @abstractmethod
+    def download_results(self, job_id: str, output_path: str) -> None:
+        """
+        Save the results of a completed job.
+
+        Args:
+            job_id (str): Job ID.
+            output_path (str): Path to write the JSONL result file to.
+        """
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """
+    Runs batch files through the OpenAI Batch API.
+    """
+
+    def __init__(self, completion_window: str = "24h") -> None:
+        self.completion_window = completion_window
+
+    def submit(self, input_path: str) -> str:
+        openai = load_openai()
+        with open(input_path, "rb") as file:
+            input_file = openai.files.create(file=file, purpose="batch")
+        batch = openai.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,  # type: ignore[arg-type]
+        )
+        logging.info(f"Submitted OpenAI batch {batch.id} from {input_path}.")
+        return batch.id
+
+    def status(self, job_id: str) -> str:
+        return load_openai().batches.retrieve(job_id).status
+
+    def download_results(self, job_id: str, output_path: str) -> None:
+        openai = load_openai()
+        batch = openai.batches.retrieve(job_id)
+        if not batch.output_file_id:
+            raise FileNotFoundError(f"Batch {job_id} has no output file.")
+        content = openai.files.content(batch.output_file_id)
+        with open(output_path, "wb") as file:
+            file.write(content.read())
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    Runs batch files in-process, for offline runs and tests.
+
+    Attributes:
+        responder (callable): Maps a request body to the response text.
+    """
+
+    def __init__(self, responder: Callable[[Dict], str]) -> None:
+        """
+        Initialize the LocalBatchBackend.
+
+        Args:
+            responder (callable): Maps a chat completion request body to the
+                assistant message it should answer with.
+        """
+        self.responder = responder
+        self._results: Dict[str, List[Dict]] = {}
+
+    def submit(self, input_path: str) -> str:
+        job_id = f"local-batch-{uuid.uuid4()}"
+        results = []
+        with open(input_path, "r") as file:
+            for line in file:
+                request = json.loads(line)
+                content = self.responder(request["body"])
+                results.append(
+                    {
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {"choices": [{"message": {"content": content}}]},
+                        },
+                        "error": None,
+                    }
+                )
+        self._results[job_id] = results
+        return job_id
+
+    def status(self, job_id: str) -> str:
+        return "completed" if job_id in self._results else "failed"
+
+    def download_results(self, job_id: str, output_path: str) -> None:
+        with open(output_path, "w") as file:
+            for result in self._results[job_id]:
+                file.write(json.dumps(result) + "\n")
+
+
+def write_batch_file(path: str, requests: Dict[str, Dict]) -> None:
+    """
+    Write chat completion requests to a JSONL batch file.
+
+    Args:
+        path (str): Path to write the file to.
+        requests (dict): Request bodies keyed by custom ID.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as file:
+        for custom_id, body in requests.items():
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": body,
+            }
+            file.write(json.dumps(line) + "\n")
+
+
+def run_batch(
+    backend: BatchBackend,
+    requests: Dict[str, Dict],
+    batch_dir: str = "batches",
+    poll_interval: float = 30.0,
+    timeout: Optional[float] = None,
+) -> Dict[str, str]:
+    """
+    Run chat completion requests as one batch job and wait for the results.
+
+    Args:
+        backend (BatchBackend): Service that runs the job.
+        requests (dict): Request bodies keyed by custom ID.
+        batch_dir (str): Directory for the request and result files.
+        poll_interval (float): Seconds between status checks.
+        timeout (float, optional): Seconds to wait before giving up.
+
+    Returns:
+        dict: Response text keyed by custom ID. Failed requests are left out.
+
+    Raises:
+        RuntimeError: If the job fails, expires or is cancelled.
+        TimeoutError: If the job does not finish within ``timeout``.
+    """
+    if not requests:
+        return {}
+    name = f"batch_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+    input_path = os.path.join(batch_dir, f"{name}.jsonl")
+    output_path = os.path.join(batch_dir, f"{name}.results.jsonl")
+    write_batch_file(input_path, requests)
+
+    job_id = backend.submit(input_path)
+    started = time.monotonic()
+    while True:
+        status = backend.status(job_id)
+        if status == "completed":
+            break
+        if status in ("failed", "expired", "cancelled"):
+            raise RuntimeError(f"Batch {job_id} ended with status {status}.")
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(f"Batch {job_id} did not finish in {timeout}s.")
+        logging.info(f"Batch {job_id} is {status}; checking again shortly.")
+        time.sleep(poll_interval)
+
+    backend.download_results(job_id, output_path)
+    responses: Dict[str, str] = {}
+    with open(output_path, "r") as file:
+        for line in file:
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                logging.error(
+                    f"Batch request {result.get('custom_id')} failed: "
+                    f"{result.get('error') or response}"
+                )
+                continue
+            content = response["body"]["choices"][0]["message"]["content"]
+            responses[result["custom_id"]] = content.strip()
+    logging.info(f"Batch {job_id} returned {len(responses)} of {len(requests)}.")
+    return responses
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "completions.sqlite3")
+
+
+class CompletionCache:
+    """
+    A persistent, content-addressed cache of chat completions backed by SQLite.
+
+    Entries are keyed by a hash of the model, messages and sampling parameters.
+    The least recently used entries are evicted once ``max_entries`` is exceeded,
+    and entries older than ``ttl`` seconds are treated as missing.
+
+    Attributes:
+        path (str): Path to the SQLite database.
+        max_entries (int): Maximum number of cached completions.
+        ttl (float, optional): Lifetime of an entry in seconds, or None to keep
+            entries until they are evicted.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that were not cached.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = 10000,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize the CompletionCache.
+
+        Args:
+            path (str): Path to the SQLite database, or ":memory:".
+            max_entries (int): Maximum number of cached completions.
+            ttl (float, optional): Lifetime of an entry in seconds.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS completions_accessed_at"
+            " ON completions (accessed_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], **params: Any) -> str:
+        """
+        Hash a completion request into a cache key.
+
+        Args:
+            model (str): Model name.
+            messages (list): Chat messages.
+            **params: Sampling parameters, e.g. temperature and max_tokens.
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached completion.
+
+        Args:
+            key (str): Cache key from ``make_key``.
+
+        Returns:
+            str: Cached response text, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """
+        Store a completion, evicting the least recently used entries if needed.
+
+        Args:
+            key (str): Cache key from ``make_key``.
+            response (str): Response text to cache.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM completions WHERE key IN ("
+                " SELECT key FROM completions ORDER BY accessed_at DESC"
+                " LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        """
+        Remove a completion, e.g. one that turned out to be unusable.
+
+        Args:
+            key (str): Cache key from ``make_key``.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report the hit and miss counters.
+
+        Returns:
+            dict: Hits, misses and current number of entries.
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+    def close(self) -> None:
+        """
+        Close the underlying database.
+        """
+        with self._lock:
+            self._conn.close()
+        logging.info(f"Completion cache: {self.hits} hit(s), {self.misses} miss(es).")
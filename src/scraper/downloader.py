@@ -1,10 +1,89 @@
 import logging
 import os
-from typing import Tuple
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 import instaloader
 import requests
-from pydub import AudioSegment  # type: ignore
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import get_metrics
+from scraper.audio import (
+    SAMPLE_RATE,
+    AudioProfile,
+    extract_audio,
+    get_audio_profile,
+)
+from scraper.post_cache import PostMetadataCache
+from scraper.throttle import RequestScheduler, get_request_scheduler
+
+CHUNK_SIZE = 256 * 1024
+# Videos at least this large are fetched in parallel byte-range segments.
+SEGMENT_THRESHOLD = 8 * 1024 * 1024
+# Attempts per file or segment when the connection drops mid-transfer; each
+# attempt resumes where the previous one stopped.
+MAX_ATTEMPTS = 4
+TIMEOUT = (10, 60)
+# Seconds Instagram gets no requests after it answers one with HTTP 429.
+RATE_LIMIT_BACKOFF = 120.0
+
+
+def create_session(pool_size: int = 16) -> requests.Session:
+    """
+    Create an HTTP session with a connection pool and retries.
+
+    Args:
+        pool_size (int): Connections kept open per host.
+
+    Returns:
+        requests.Session: Session that retries failed connections and transient
+            server errors with backoff.
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class ScheduledRateController(instaloader.RateController):
+    """
+    An Instaloader rate controller that defers to a RequestScheduler.
+
+    Instaloader calls it before every request it makes, including the ones
+    behind lazily loaded post properties, so all of them share one budget.
+
+    Attributes:
+        scheduler (RequestScheduler): Scheduler the requests go through.
+    """
+
+    def __init__(
+        self, context: "instaloader.InstaloaderContext", scheduler: RequestScheduler
+    ) -> None:
+        super().__init__(context)
+        self.scheduler = scheduler
+
+    @staticmethod
+    def _host(query_type: str) -> str:
+        # Instaloader sends "iphone" queries to the mobile API host.
+        return "i.instagram.com" if query_type == "iphone" else "www.instagram.com"
+
+    def wait_before_query(self, query_type: str) -> None:
+        self.scheduler.acquire(self._host(query_type))
+
+    def handle_429(self, query_type: str) -> None:
+        self.scheduler.backoff(self._host(query_type), RATE_LIMIT_BACKOFF)
 
 
 class InstagramDownloader:
@@ -13,18 +92,55 @@ class InstagramDownloader:
 
     Attributes:
         local (bool): Whether to save files locally or to Firebase.
+        streaming (bool): Whether to stream audio straight from the video URL.
+        segments (int): Parallel byte-range requests per large video.
+        audio_profile (AudioProfile): Encoding of the saved audio.
+        cache (PostMetadataCache): Cache of post metadata, or None to disable.
+        scheduler (RequestScheduler): Scheduler every Instaloader request goes
+            through.
         loader (instaloader.Instaloader): Instaloader instance for downloading posts.
+        session (requests.Session): Pooled session used for video downloads.
     """
 
-    def __init__(self, local: bool = False) -> None:
+    def __init__(
+        self,
+        local: bool = False,
+        streaming: bool = True,
+        segments: int = 4,
+        pool_size: int = 16,
+        audio_profile: Optional[AudioProfile] = None,
+        cache: Optional[PostMetadataCache] = None,
+        scheduler: Optional[RequestScheduler] = None,
+    ) -> None:
         """
         Initialize the InstagramDownloader.
 
         Args:
             local (bool): Whether to save files locally or to Firebase.
+            streaming (bool): Whether to stream audio straight from the video URL
+                instead of downloading and converting the full video.
+            segments (int): Parallel byte-range requests per large video; 1
+                downloads every video in one request.
+            pool_size (int): Connections kept open per host.
+            audio_profile (AudioProfile, optional): Encoding of the saved audio.
+                Defaults to the default profile.
+            cache (PostMetadataCache, optional): Cache of post metadata.
+                Defaults to None.
+            scheduler (RequestScheduler, optional): Scheduler for Instaloader
+                requests. Defaults to the process-wide one.
         """
-        self.loader = instaloader.Instaloader()
+        self.cache = cache
+        self.scheduler = scheduler or get_request_scheduler()
+        self.loader = instaloader.Instaloader(
+            rate_controller=lambda context: ScheduledRateController(
+                context, self.scheduler
+            )
+        )
         self.local = local
+        self.streaming = streaming
+        self.segments = max(1, segments)
+        self.session = create_session(pool_size)
+        self.audio_profile = audio_profile or get_audio_profile()
         if not local:
             logging.info("Firebase initialized successfully.")
 
@@ -44,29 +160,95 @@ class InstagramDownloader:
         Raises:
             Exception: If there is an error during download.
         """
-        os.makedirs(output_dir, exist_ok=True)
         try:
-            post = instaloader.Post.from_shortcode(
-                self.loader.context, self._get_shortcode(post_url)
-            )
-            caption = post.caption
-            video_url = post.video_url
-
-            audio_path = os.path.join(
-                output_dir, f"{self._get_shortcode(post_url)}.mp3"
-            )
-            if not os.path.exists(audio_path):
-                video_path = os.path.join(
-                    output_dir, f"{self._get_shortcode(post_url)}.mp4"
-                )
-                self._download_video(video_url, video_path)
-                self._convert_to_audio(video_path, audio_path)
-
+            caption, video_url = self.fetch_post(post_url)
+            audio_path = self.audio_path(self._get_shortcode(post_url), output_dir)
+            self.save_audio(video_url, audio_path)
             return audio_path, caption
         except Exception as e:
             logging.error(f"Error downloading content: {e}")
             raise e
 
+    def fetch_post(self, post_url: str) -> Tuple[str, str]:
+        """
+        Fetch the metadata of an Instagram post.
+
+        Args:
+            post_url (str): URL of the Instagram post.
+
+        Returns:
+            tuple: The post caption and the URL of its video.
+        """
+        post = self.get_post(self._get_shortcode(post_url))
+        return post["caption"], post["video_url"]
+
+    def get_post(self, shortcode: str) -> Dict[str, Any]:
+        """
+        Get the metadata of an Instagram post, from the cache if possible.
+
+        Args:
+            shortcode (str): Shortcode of the Instagram post.
+
+        Returns:
+            dict: ``caption``, ``video_url``, ``owner``, ``duration`` (in seconds)
+                and ``fetched_at`` of the post.
+        """
+        if self.cache is not None:
+            post = self.cache.get(shortcode)
+            if post is not None:
+                logging.debug(f"Metadata for {shortcode} found in the post cache.")
+                return post
+        with get_metrics().span("instagram_fetch"):
+            node = instaloader.Post.from_shortcode(self.loader.context, shortcode)
+            post = {
+                "caption": node.caption or "",
+                "video_url": node.video_url,
+                "owner": node.owner_username,
+                "duration": node.video_duration,
+                "fetched_at": time.time(),
+            }
+        if self.cache is not None:
+            self.cache.put(shortcode, post)
+        return post
+
+    def audio_path(self, shortcode: str, output_dir: str = "downloads") -> str:
+        """
+        Build the local path of the audio of a post.
+
+        Args:
+            shortcode (str): Shortcode of the Instagram post.
+            output_dir (str): Directory of the audio files.
+
+        Returns:
+            str: Path with the extension of the audio profile.
+        """
+        return os.path.join(output_dir, f"{shortcode}{self.audio_profile.extension}")
+
+    def save_audio(self, video_url: str, audio_path: str) -> None:
+        """
+        Save the audio track of a post video, unless it already exists.
+
+        Args:
+            video_url (str): URL of the video.
+            audio_path (str): Path to save the audio file.
+
+        Raises:
+            Exception: If there is an error during download or conversion.
+        """
+        output_dir = os.path.dirname(audio_path) or "."
+        os.makedirs(output_dir, exist_ok=True)
+        if not os.path.exists(audio_path) and self.streaming:
+            try:
+                with get_metrics().span("extract_audio") as span:
+                    extract_audio(video_url, audio_path, self.audio_profile)
+                    span.add(bytes=os.path.getsize(audio_path))
+            except Exception as e:
+                logging.warning(f"Streaming extraction failed, falling back: {e}")
+        if not os.path.exists(audio_path):
+            video_path = os.path.splitext(audio_path)[0] + ".mp4"
+            self._download_video(video_url, video_path)
+            self._convert_to_audio(video_path, audio_path)
+
     def _get_shortcode(self, post_url: str) -> str:
         """
         Extract the shortcode from the post URL.
@@ -79,10 +261,115 @@ class InstagramDownloader:
         """
         return post_url.split("/")[-2]
 
+    def _probe(self, video_url: str) -> Tuple[Optional[int], bool]:
+        """
+        Ask the server for the size of a video and whether it serves ranges.
+
+        Args:
+            video_url (str): URL of the video.
+
+        Returns:
+            tuple: Size in bytes, or None if unknown, and whether byte-range
+                requests are supported.
+        """
+        try:
+            response = self.session.head(
+                video_url, allow_redirects=True, timeout=TIMEOUT
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logging.debug(f"HEAD request for video failed: {e}")
+            return None, False
+        length = response.headers.get("Content-Length")
+        ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+        return (int(length) if length and length.isdigit() else None), ranges
+
+    def _fetch_range(
+        self, video_url: str, part_path: str, start: int, end: Optional[int]
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Download bytes ``start`` to ``end`` of a video into a part file,
+        resuming from whatever the part file already holds.
+
+        Args:
+            video_url (str): URL of the video.
+            part_path (str): Path of the part file.
+            start (int): Offset of the first byte of the range.
+            end (int, optional): Offset of the last byte, or None for the end of
+                the video.
+
+        Returns:
+            tuple: Bytes fetched by this call and the total size of the video
+                if the server reported it.
+
+        Raises:
+            requests.RequestException: If every attempt fails.
+        """
+        fetched = 0
+        total: Optional[int] = None
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if end is not None and start + offset > end:
+                break
+            headers = {}
+            if start + offset > 0 or end is not None:
+                headers["Range"] = (
+                    f"bytes={start + offset}-{'' if end is None else end}"
+                )
+            try:
+                with self.session.get(
+                    video_url, headers=headers, stream=True, timeout=TIMEOUT
+                ) as response:
+                    if response.status_code == 416 and offset:
+                        # The part file already holds the whole range.
+                        break
+                    response.raise_for_status()
+                    if headers and response.status_code != 206:
+                        # The server ignored the range and sent everything.
+                        if start > 0 or end is not None:
+                            raise requests.RequestException(
+                                "Server does not support byte ranges."
+                            )
+                        offset = 0
+                    content_range = response.headers.get("Content-Range", "")
+                    match = re.search(r"/(\d+)$", content_range)
+                    if match:
+                        total = int(match.group(1))
+                    elif response.status_code == 200:
+                        length = response.headers.get("Content-Length")
+                        total = int(length) if length and length.isdigit() else None
+                    with open(part_path, "ab" if offset else "wb") as part_file:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            part_file.write(chunk)
+                            fetched += len(chunk)
+                expected = total if end is None else end - start + 1
+                if expected is None or os.path.getsize(part_path) >= expected:
+                    break
+                logging.warning(
+                    f"Video download ended early, resuming (attempt {attempt})."
+                )
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ) as e:
+                if attempt == MAX_ATTEMPTS:
+                    raise e
+                logging.warning(
+                    f"Video download interrupted, resuming (attempt {attempt}): {e}"
+                )
+        return fetched, total
+
     def _download_video(self, video_url: str, output_path: str) -> None:
         """
         Download video from the given URL.
 
+        Videos are written to part files next to ``output_path`` and moved into
+        place once complete, so an interrupted download resumes with HTTP range
+        requests on the next call. Large videos are split into ``segments``
+        byte ranges fetched in parallel. The size of the result is checked
+        against the size reported by the server.
+
         Args:
             video_url (str): URL of the video.
             output_path (str): Path to save the downloaded video.
@@ -91,20 +378,80 @@ class InstagramDownloader:
             Exception: If there is an error during download.
         """
         try:
-            response = requests.get(video_url, stream=True)
-            response.raise_for_status()
-            with open(output_path, "wb") as video_file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        video_file.write(chunk)
-            logging.info(f"Video successfully downloaded to {output_path}")
-        except requests.RequestException as e:
+            with get_metrics().span("download_video") as span:
+                started = time.perf_counter()
+                size, ranges = self._probe(video_url)
+                count = (
+                    self.segments
+                    if ranges and size is not None and size >= SEGMENT_THRESHOLD
+                    else 1
+                )
+                if count > 1:
+                    assert size is not None
+                    bounds = [size * index // count for index in range(count + 1)]
+                    parts = [
+                        (f"{output_path}.part{index + 1}of{count}", start, stop - 1)
+                        for index, (start, stop) in enumerate(zip(bounds, bounds[1:]))
+                    ]
+                else:
+                    parts = [(f"{output_path}.part", 0, None)]
+                with ThreadPoolExecutor(max_workers=len(parts)) as executor:
+                    results = list(
+                        executor.map(
+                            lambda part: self._fetch_range(video_url, *part), parts
+                        )
+                    )
+                fetched = sum(result[0] for result in results)
+                size = size or results[0][1]
+                self._join_parts([path for path, _, _ in parts], output_path, size)
+                elapsed = time.perf_counter() - started
+                span.add(bytes=fetched, bytes_per_second=fetched / max(elapsed, 1e-6))
+                get_metrics().increment("download_video_bytes", fetched)
+            logging.info(
+                f"Video successfully downloaded to {output_path} "
+                f"({fetched / max(elapsed, 1e-6) / 1e6:.1f} MB/s, {count} segment(s))"
+            )
+        except (requests.RequestException, IOError) as e:
             logging.error(f"Error downloading video: {e}")
             raise e
 
+    @staticmethod
+    def _join_parts(
+        part_paths: List[str], output_path: str, size: Optional[int]
+    ) -> None:
+        """
+        Concatenate downloaded parts into the output file and check its size.
+
+        Args:
+            part_paths (list): Part files in order.
+            output_path (str): Path of the complete video.
+            size (int, optional): Expected size in bytes, if known.
+
+        Raises:
+            IOError: If the parts do not add up to the expected size. Short parts
+                are kept so the next download resumes them; parts holding more
+                bytes than expected are corrupt and removed.
+        """
+        actual = sum(os.path.getsize(path) for path in part_paths)
+        if size is not None and actual != size:
+            if actual > size:
+                for path in part_paths:
+                    os.remove(path)
+            raise IOError(f"Downloaded {actual} bytes, expected {size}.")
+        if len(part_paths) == 1:
+            os.replace(part_paths[0], output_path)
+            return
+        with open(output_path, "wb") as video_file:
+            for path in part_paths:
+                with open(path, "rb") as part_file:
+                    while chunk := part_file.read(CHUNK_SIZE):
+                        video_file.write(chunk)
+        for path in part_paths:
+            os.remove(path)
+
     def _convert_to_audio(self, video_path: str, audio_path: str) -> None:
         """
-        Convert video to audio.
+        Convert video to audio in the audio profile's encoding.
 
         Args:
             video_path (str): Path to the video file.
@@ -113,9 +460,22 @@ class InstagramDownloader:
         Raises:
             Exception: If there is an error during conversion.
         """
+        from pydub import AudioSegment  # type: ignore
+
         try:
-            audio = AudioSegment.from_file(video_path, format="mp4")
-            audio.export(audio_path, format="mp3", bitrate="192k")
+            with get_metrics().span("convert_audio") as span:
+                audio = AudioSegment.from_file(video_path, format="mp4")
+                profile = self.audio_profile
+                audio.export(
+                    audio_path,
+                    format=profile.extension.lstrip("."),
+                    codec=profile.codec,
+                    bitrate=profile.bitrate,
+                    parameters=["-ac", "1", "-ar", str(SAMPLE_RATE)] + profile.options,
+                )
+                span.add(
+                    bytes=os.path.getsize(audio_path), audio_seconds=len(audio) / 1000
+                )
             logging.info(f"Audio extracted to {audio_path}")
         except Exception as e:
             logging.error(f"Error converting video to audio: {e}")
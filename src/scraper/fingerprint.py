@@ -0,0 +1,208 @@
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from firebase.client import FirebaseClient, WriteBatch
+from scraper.audio import stream_pcm
+
+FRAME_LENGTH = 1024
+HOP_LENGTH = 512
+# Frequency bands (in FFT bins at 16 kHz) that each contribute one peak per frame.
+BANDS = ((10, 20), (20, 40), (40, 80), (80, 160), (160, 320))
+FAN_OUT = 3
+MAX_DELTA_FRAMES = 63
+# Peaks must be the loudest in their band within this many frames either side.
+PEAK_NEIGHBORHOOD = 3
+# Keep one hash in SUBSAMPLE; consistent subsampling preserves overlap ratios.
+SUBSAMPLE = 2
+
+
+def _spectral_peaks(chunks: Iterable[bytes]) -> np.ndarray:
+    """
+    Find the strongest spectral peak per band in every frame of a PCM stream.
+
+    Args:
+        chunks (iterable): 16 kHz mono signed 16-bit PCM chunks.
+
+    Returns:
+        np.ndarray: Array of shape (peaks, 2) holding (frame index, frequency bin).
+    """
+    window = np.hanning(FRAME_LENGTH).astype(np.float32)
+    tail = np.zeros(0, dtype=np.float32)
+    bins: List[np.ndarray] = []
+    levels: List[np.ndarray] = []
+    for chunk in chunks:
+        pcm = np.frombuffer(chunk, dtype="<i2").astype(np.float32) / 32768.0
+        samples = np.concatenate((tail, pcm))
+        if len(samples) < FRAME_LENGTH:
+            tail = samples
+            continue
+        frames = sliding_window_view(samples, FRAME_LENGTH)[::HOP_LENGTH]
+        spectrum = np.log1p(np.abs(np.fft.rfft(frames * window, axis=1)))
+
+        band_bins = np.stack(
+            [lo + spectrum[:, lo:hi].argmax(axis=1) for lo, hi in BANDS], axis=1
+        )
+        bins.append(band_bins)
+        levels.append(np.take_along_axis(spectrum, band_bins, axis=1))
+        tail = samples[len(frames) * HOP_LENGTH :]
+    if not bins:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    # Peaks are picked over the whole clip rather than per chunk, so the
+    # fingerprint does not depend on where the stream was split.
+    band_bins = np.concatenate(bins)
+    band_levels = np.concatenate(levels)
+    # Keep peaks that stand out from the other bands of the same frame and
+    # are local maxima over time, so sustained tones yield one landmark.
+    padded = np.pad(
+        band_levels, ((PEAK_NEIGHBORHOOD, PEAK_NEIGHBORHOOD), (0, 0)), "edge"
+    )
+    local_max = sliding_window_view(padded, 2 * PEAK_NEIGHBORHOOD + 1, axis=0).max(
+        axis=2
+    )
+    strong = (band_levels >= band_levels.mean(axis=1, keepdims=True)) & (
+        band_levels >= local_max
+    )
+    frame_index, band_index = np.nonzero(strong)
+    return np.stack((frame_index, band_bins[frame_index, band_index]), axis=1).astype(
+        np.int64
+    )
+
+
+def fingerprint_audio(source: str) -> List[int]:
+    """
+    Compute a compact acoustic fingerprint of an audio or video file.
+
+    Args:
+        source (str): Local path or URL of the audio.
+
+    Returns:
+        list: Sorted, de-duplicated 32-bit landmark hashes.
+    """
+    return fingerprint_pcm(stream_pcm(source))
+
+
+def fingerprint_pcm(chunks: Iterable[bytes]) -> List[int]:
+    """
+    Compute a compact acoustic fingerprint of a PCM stream.
+
+    Pairs of nearby spectral peaks are hashed as (frequency, frequency, time
+    delta), which survives re-encoding, volume changes and trimming.
+
+    Args:
+        chunks (iterable): 16 kHz mono signed 16-bit PCM chunks.
+
+    Returns:
+        list: Sorted, de-duplicated 32-bit landmark hashes.
+    """
+    peaks = _spectral_peaks(chunks)
+    hashes: List[np.ndarray] = []
+    for step in range(1, FAN_OUT + 1):
+        anchors, targets = peaks[:-step], peaks[step:]
+        delta = targets[:, 0] - anchors[:, 0]
+        valid = (delta > 0) & (delta <= MAX_DELTA_FRAMES)
+        hashes.append(
+            (anchors[valid, 1] << 20) | (targets[valid, 1] << 8) | delta[valid]
+        )
+    if not hashes:
+        return []
+    landmarks = np.unique(np.concatenate(hashes))
+    mixed = (landmarks * 2654435761) & 0xFFFFFFFF
+    return landmarks[(mixed >> 16) % SUBSAMPLE == 0].tolist()
+
+
+class FingerprintIndex:
+    """
+    An index of acoustic fingerprints for matching reposted audio.
+
+    Fingerprints are stored in the ``audio_fingerprints`` collection, one
+    document per shortcode, and loaded into an in-memory inverted index on first
+    use.
+
+    Attributes:
+        firebase_client (FirebaseClient): Firebase client instance.
+        min_similarity (float): Share of the shorter fingerprint that must match.
+        min_matches (int): Minimum number of shared hashes for a match.
+    """
+
+    COLLECTION = "audio_fingerprints"
+
+    def __init__(
+        self,
+        firebase_client: FirebaseClient,
+        min_similarity: float = 0.25,
+        min_matches: int = 15,
+    ) -> None:
+        self.firebase_client = firebase_client
+        self.min_similarity = min_similarity
+        self.min_matches = min_matches
+        self._postings: Dict[int, Set[str]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        # Caller must hold self._lock.
+        if self._loaded:
+            return
+        documents = self.firebase_client.list_documents(self.COLLECTION)
+        for shortcode, data in documents.items():
+            self._index(shortcode, data.get("hashes", []))
+        self._loaded = True
+        logging.info(f"Loaded {len(documents)} audio fingerprint(s).")
+
+    def _index(self, shortcode: str, hashes: List[int]) -> None:
+        self._sizes[shortcode] = len(hashes)
+        for value in hashes:
+            self._postings.setdefault(value, set()).add(shortcode)
+
+    def find_match(self, hashes: List[int]) -> Optional[str]:
+        """
+        Find the stored audio that best matches a fingerprint.
+
+        Args:
+            hashes (list): Fingerprint to look up.
+
+        Returns:
+            str: Shortcode of the matching audio, or None.
+        """
+        if not hashes:
+            return None
+        with self._lock:
+            self._load()
+            counts: Counter = Counter()
+            for value in hashes:
+                counts.update(self._postings.get(value, ()))
+            for shortcode, matches in counts.most_common(5):
+                similarity = matches / max(1, min(len(hashes), self._sizes[shortcode]))
+                if matches >= self.min_matches and similarity >= self.min_similarity:
+                    logging.info(
+                        f"Audio matches {shortcode} ({similarity:.0%} of landmarks)."
+                    )
+                    return shortcode
+        return None
+
+    def add(
+        self, shortcode: str, hashes: List[int], batch: Optional[WriteBatch] = None
+    ) -> None:
+        """
+        Store a fingerprint and add it to the index.
+
+        Args:
+            shortcode (str): Shortcode of the Instagram post.
+            hashes (list): Fingerprint of the post audio.
+            batch (WriteBatch, optional): Batch to add the write to.
+        """
+        with self._lock:
+            self._load()
+            if shortcode in self._sizes:
+                return
+            self._index(shortcode, hashes)
+        self.firebase_client.set_document(
+            self.COLLECTION, shortcode, {"hashes": hashes}, batch
+        )
@@ -0,0 +1,279 @@
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from firebase.client import FirebaseClient, WriteBatch
+
+# Posts are compared by the sets of word n-grams of their transcript and caption.
+SHINGLE_SIZE = 3
+NUM_PERMUTATIONS = 128
+# LSH splits signatures into BANDS bands of NUM_PERMUTATIONS / BANDS rows. Two
+# posts become candidates if any band matches, which is likely from about
+# (1 / BANDS) ** (BANDS / NUM_PERMUTATIONS) = 42% similarity.
+BANDS = 32
+ROWS = NUM_PERMUTATIONS // BANDS
+
+
+def _permutation_seed(index: int, salt: str) -> int:
+    digest = hashlib.blake2b(f"minhash-{salt}-{index}".encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), "little")
+
+
+# Multiply-shift hash functions: the top 32 bits of (a * x + b) mod 2**64 with
+# a odd. Seeds come from a fixed hash so stored signatures stay comparable.
+_MULTIPLIERS = np.array(
+    [_permutation_seed(i, "a") | 1 for i in range(NUM_PERMUTATIONS)],
+    dtype=np.uint64,
+)
+_INCREMENTS = np.array(
+    [_permutation_seed(i, "b") for i in range(NUM_PERMUTATIONS)], dtype=np.uint64
+)
+
+
+def shingles(text: str) -> Set[str]:
+    """
+    Split text into overlapping word n-grams.
+
+    Case, accents and punctuation are ignored. Texts shorter than an n-gram
+    give a single shingle of all their words.
+
+    Args:
+        text (str): Text to split.
+
+    Returns:
+        set: Shingles of ``SHINGLE_SIZE`` words.
+    """
+    folded = "".join(
+        char
+        for char in unicodedata.normalize("NFKD", text.lower())
+        if not unicodedata.combining(char)
+    )
+    words = re.findall(r"[^\W_]+", folded)
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {
+        " ".join(words[i : i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash_signature(text: str) -> List[int]:
+    """
+    Compute the MinHash signature of a text.
+
+    The share of equal positions in two signatures estimates the Jaccard
+    similarity of the texts' shingle sets.
+
+    Args:
+        text (str): Text to sign.
+
+    Returns:
+        list: ``NUM_PERMUTATIONS`` 32-bit minimums, or an empty list for text
+            without words.
+    """
+    values = shingles(text)
+    if not values:
+        return []
+    hashes = np.array(
+        [zlib.crc32(value.encode("utf-8")) for value in values], dtype=np.uint64
+    )
+    with np.errstate(over="ignore"):
+        permuted = (
+            _MULTIPLIERS[:, None] * hashes[None, :] + _INCREMENTS[:, None]
+        ) >> np.uint64(32)
+    return permuted.min(axis=1).tolist()
+
+
+def post_text(transcript: str, caption: Optional[str]) -> str:
+    """
+    Combine the texts of a post that its signature is computed from.
+
+    Args:
+        transcript (str): Transcript of the post audio.
+        caption (str, optional): Caption of the post.
+
+    Returns:
+        str: Text to sign.
+    """
+    return f"{transcript}\n{caption or ''}"
+
+
+class NearDuplicateIndex:
+    """
+    A MinHash/LSH index for finding reposts with similar transcripts.
+
+    Signatures of transcript and caption text are stored in the
+    ``transcript_signatures`` collection, one document per shortcode together
+    with how the post was classified and the ID of the recipe generated from
+    it, and loaded into in-memory LSH buckets on first use. New posts are added
+    as their transcripts are stored, so the index grows incrementally.
+
+    Attributes:
+        firebase_client (FirebaseClient): Firebase client instance.
+        threshold (float): Estimated Jaccard similarity above which a post is a
+            near-duplicate.
+    """
+
+    COLLECTION = "transcript_signatures"
+
+    def __init__(self, firebase_client: FirebaseClient, threshold: float = 0.8) -> None:
+        self.firebase_client = firebase_client
+        self.threshold = threshold
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._recipes: Dict[str, str] = {}
+        self._likelihoods: Dict[str, int] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        # Caller must hold self._lock.
+        if self._loaded:
+            return
+        documents = self.firebase_client.list_documents(self.COLLECTION)
+        for shortcode, data in documents.items():
+            if data.get("signature"):
+                self._index(shortcode, data["signature"])
+            if data.get("recipe_id"):
+                self._recipes[shortcode] = data["recipe_id"]
+            if data.get("likelihood") is not None:
+                self._likelihoods[shortcode] = data["likelihood"]
+        self._loaded = True
+        logging.info(f"Loaded {len(documents)} transcript signature(s).")
+
+    @staticmethod
+    def _bands(signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * ROWS : (band + 1) * ROWS].tobytes())
+            for band in range(BANDS)
+        ]
+
+    def _index(self, shortcode: str, signature: List[int]) -> None:
+        values = np.array(signature, dtype=np.uint32)
+        self._signatures[shortcode] = values
+        for key in self._bands(values):
+            self._buckets.setdefault(key, set()).add(shortcode)
+
+    def find_match(
+        self, signature: List[int]
+    ) -> Optional[Tuple[str, Optional[str], Optional[int]]]:
+        """
+        Find the most similar stored post that was classified or made a recipe.
+
+        Args:
+            signature (list): MinHash signature of the new post.
+
+        Returns:
+            tuple: Shortcode of the matching post, its recipe ID or None, and its
+                recipe likelihood or None; or None if there is no match.
+        """
+        if len(signature) != NUM_PERMUTATIONS:
+            return None
+        values = np.array(signature, dtype=np.uint32)
+        with self._lock:
+            self._load()
+            candidates: Set[str] = set()
+            for key in self._bands(values):
+                candidates.update(self._buckets.get(key, ()))
+            best: Optional[Tuple[float, str]] = None
+            for shortcode in candidates:
+                if (
+                    shortcode not in self._recipes
+                    and shortcode not in self._likelihoods
+                ):
+                    continue
+                similarity = float(np.mean(self._signatures[shortcode] == values))
+                if similarity >= self.threshold and (
+                    best is None or (similarity, shortcode) > best
+                ):
+                    best = (similarity, shortcode)
+            if best is None:
+                return None
+            similarity, shortcode = best
+            logging.info(
+                f"Transcript is a near-duplicate of {shortcode} ({similarity:.0%})."
+            )
+            return (
+                shortcode,
+                self._recipes.get(shortcode),
+                self._likelihoods.get(shortcode),
+            )
+
+    def add(
+        self,
+        shortcode: str,
+        signature: List[int],
+        batch: Optional[WriteBatch] = None,
+    ) -> None:
+        """
+        Store the signature of a post and add it to the index.
+
+        Args:
+            shortcode (str): Shortcode of the Instagram post.
+            signature (list): MinHash signature of the post.
+            batch (WriteBatch, optional): Batch to add the write to.
+        """
+        if len(signature) != NUM_PERMUTATIONS:
+            return
+        with self._lock:
+            self._load()
+            if shortcode in self._signatures:
+                return
+            self._index(shortcode, signature)
+        self.firebase_client.set_document(
+            self.COLLECTION, shortcode, {"signature": signature}, batch
+        )
+
+    def _record(self, shortcode: str, data: Dict, batch: Optional[WriteBatch]) -> None:
+        if batch is not None:
+            batch.update(self.COLLECTION, shortcode, data)
+            return
+        try:
+            with self.firebase_client.batch() as batch:
+                batch.update(self.COLLECTION, shortcode, data)
+        except Exception as e:
+            logging.error(f"Error recording outcome of {shortcode}: {e}")
+
+    def set_likelihood(
+        self, shortcode: str, likelihood: int, batch: Optional[WriteBatch] = None
+    ) -> None:
+        """
+        Record how an indexed post was classified, so later near-duplicates
+        reuse the result instead of classifying again.
+
+        Args:
+            shortcode (str): Shortcode of the Instagram post.
+            likelihood (int): Likelihood percentage that the post has a recipe.
+            batch (WriteBatch, optional): Batch to add the write to.
+        """
+        with self._lock:
+            self._load()
+            if shortcode not in self._signatures:
+                return
+            self._likelihoods[shortcode] = likelihood
+        self._record(shortcode, {"likelihood": likelihood}, batch)
+
+    def set_recipe(
+        self, shortcode: str, recipe_id: str, batch: Optional[WriteBatch] = None
+    ) -> None:
+        """
+        Record the recipe generated from an indexed post, so later
+        near-duplicates link to it.
+
+        Args:
+            shortcode (str): Shortcode of the Instagram post.
+            recipe_id (str): ID of the recipe.
+            batch (WriteBatch, optional): Batch to add the write to.
+        """
+        with self._lock:
+            self._load()
+            if shortcode not in self._signatures:
+                return
+            self._recipes[shortcode] = recipe_id
+        self._record(shortcode, {"recipe_id": recipe_id}, batch)
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from config.config import OPENAI_API_KEY
+from metrics import get_metrics
+
+# Status codes worth retrying: rate limits and transient server errors.
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def load_openai() -> Any:
+    """
+    Import the OpenAI SDK on first use and configure its default API key.
+
+    The SDK takes a noticeable time to import, so modules that only need it
+    for API calls load it through this function instead of at import time.
+
+    Returns:
+        module: The ``openai`` module.
+    """
+    import openai
+
+    if openai.api_key is None:
+        openai.api_key = OPENAI_API_KEY
+    return openai
+
+
+class TokenBucket:
+    """
+    An asyncio token bucket that refills continuously at a per-minute rate.
+
+    Attributes:
+        rate_per_minute (float): Tokens added per minute.
+        capacity (float): Maximum number of tokens the bucket holds.
+    """
+
+    def __init__(
+        self, rate_per_minute: float, capacity: Optional[float] = None
+    ) -> None:
+        """
+        Initialize the TokenBucket.
+
+        Args:
+            rate_per_minute (float): Tokens added per minute.
+            capacity (float, optional): Burst size. Defaults to one minute of tokens.
+        """
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._tokens = min(
+            self.capacity, self._tokens + elapsed * self.rate_per_minute / 60.0
+        )
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """
+        Wait until ``amount`` tokens are available and take them.
+
+        Requests larger than the capacity are clamped so they can still proceed.
+
+        Args:
+            amount (float): Number of tokens to take.
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                deficit = amount - self._tokens
+                await asyncio.sleep(deficit * 60.0 / self.rate_per_minute)
+
+
+class AsyncOpenAIClient:
+    """
+    An async OpenAI chat client with pooling, rate limiting and retries.
+
+    All requests share one HTTP connection pool, pass through token buckets for
+    requests and tokens per minute, and are retried with jittered exponential
+    backoff on rate limits and server errors.
+
+    Attributes:
+        max_concurrency (int): Maximum number of requests in flight.
+        max_retries (int): Retries per request after the first attempt.
+        base_delay (float): Backoff delay before the first retry, in seconds.
+        max_delay (float): Upper bound on a single backoff delay, in seconds.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 8,
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 200000,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        timeout: float = 60.0,
+    ) -> None:
+        """
+        Initialize the AsyncOpenAIClient.
+
+        Args:
+            api_key (str, optional): OpenAI API key. Defaults to the configured key.
+            base_url (str, optional): API base URL, e.g. a local fake server.
+            max_concurrency (int): Maximum number of requests in flight.
+            requests_per_minute (float): Request rate limit.
+            tokens_per_minute (float): Token rate limit.
+            max_retries (int): Retries per request after the first attempt.
+            base_delay (float): Backoff delay before the first retry, in seconds.
+            max_delay (float): Upper bound on a single backoff delay, in seconds.
+            timeout (float): Per-request timeout, in seconds.
+        """
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        import httpx
+
+        openai = load_openai()
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+            timeout=timeout,
+        )
+        self._client = openai.AsyncOpenAI(
+            api_key=api_key or OPENAI_API_KEY,
+            base_url=base_url,
+            http_client=self._http,
+            max_retries=0,  # Retries are handled here, with rate-limit awareness.
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+
+    async def __aenter__(self) -> "AsyncOpenAIClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    @staticmethod
+    def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int = 0) -> int:
+        """
+        Roughly estimate the tokens a request will consume.
+
+        Args:
+            messages (list): Chat messages.
+            max_tokens (int): Completion token limit of the request.
+
+        Returns:
+            int: Estimated prompt plus completion tokens.
+        """
+        characters = sum(len(message.get("content", "")) for message in messages)
+        return characters // 4 + (max_tokens or 256)
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(self.max_delay, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        openai = load_openai()
+        if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in RETRYABLE_STATUS
+        return False
+
+    async def chat(
+        self, model: str, messages: List[Dict[str, str]], **params: Any
+    ) -> str:
+        """
+        Run a chat completion and return its text.
+
+        Args:
+            model (str): OpenAI model name.
+            messages (list): Chat messages.
+            **params: Sampling parameters passed to the API.
+
+        Returns:
+            str: Stripped response text.
+
+        Raises:
+            openai.OpenAIError: If the request fails permanently or retries run out.
+        """
+        estimate = self.estimate_tokens(messages, params.get("max_tokens", 0))
+        metrics = get_metrics()
+        with metrics.span("openai_chat") as span:
+            for attempt in range(self.max_retries + 1):
+                await self._requests.acquire()
+                await self._tokens.acquire(estimate)
+                try:
+                    async with self._semaphore:
+                        response = await self._client.chat.completions.create(
+                            model=model,
+                            messages=messages,  # type: ignore[arg-type]
+                            **params,
+                        )
+                    if response.usage is not None:
+                        span.add(tokens=response.usage.total_tokens)
+                    return response.choices[0].message.content.strip()
+                except Exception as e:
+                    if attempt == self.max_retries or not self._is_retryable(e):
+                        raise e
+                    delay = self._retry_delay(attempt, e)
+                    logging.warning(
+                        f"OpenAI request failed ({e}); retrying in {delay:.1f}s "
+                        f"(attempt {attempt + 1}/{self.max_retries})."
+                    )
+                    metrics.increment("openai_retries")
+                    await asyncio.sleep(delay)
+        raise RuntimeError("OpenAI request retries exhausted.")
+
+    async def aclose(self) -> None:
+        """
+        Close the shared HTTP connection pool.
+        """
+        await self._http.aclose()
@@ -0,0 +1,145 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_POST_CACHE_PATH = os.path.join(".cache", "posts.sqlite3")
+FIELDS = ("caption", "video_url", "owner", "duration", "fetched_at")
+
+
+def url_expiry(url: Optional[str]) -> Optional[float]:
+    """
+    Read the expiry time of a signed Instagram CDN URL.
+
+    Args:
+        url (str, optional): Media URL.
+
+    Returns:
+        float: Expiry in seconds since the epoch, from the hexadecimal ``oe``
+            query parameter, or None if the URL does not carry one.
+    """
+    if not url:
+        return None
+    try:
+        return float(int(parse_qs(urlparse(url).query)["oe"][0], 16))
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
+class PostMetadataCache:
+    """
+    A persistent cache of Instagram post metadata backed by SQLite.
+
+    Entries are keyed by shortcode and hold the caption, video URL, owner,
+    video duration and fetch time of a post. They are treated as missing once
+    older than ``ttl`` seconds, or once their signed video URL has expired.
+
+    Attributes:
+        path (str): Path to the SQLite database.
+        ttl (float, optional): Lifetime of an entry in seconds, or None to keep
+            entries until their video URL expires.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that were not cached.
+    """
+
+    def __init__(
+        self, path: str = DEFAULT_POST_CACHE_PATH, ttl: Optional[float] = 86400.0
+    ) -> None:
+        """
+        Initialize the PostMetadataCache.
+
+        Args:
+            path (str): Path to the SQLite database, or ":memory:".
+            ttl (float, optional): Lifetime of an entry in seconds.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS posts ("
+            " shortcode TEXT PRIMARY KEY,"
+            " caption TEXT NOT NULL,"
+            " video_url TEXT,"
+            " owner TEXT,"
+            " duration REAL,"
+            " fetched_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def get(self, shortcode: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the metadata of a post.
+
+        Args:
+            shortcode (str): Shortcode of the Instagram post.
+
+        Returns:
+            dict: Cached ``caption``, ``video_url``, ``owner``, ``duration`` and
+                ``fetched_at``, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM posts WHERE shortcode = ?",
+                (shortcode,),
+            ).fetchone()
+            if row is not None:
+                post = dict(zip(FIELDS, row))
+                expiry = url_expiry(post["video_url"])
+                if (self.ttl is not None and now - post["fetched_at"] > self.ttl) or (
+                    expiry is not None and now >= expiry
+                ):
+                    self._conn.execute(
+                        "DELETE FROM posts WHERE shortcode = ?", (shortcode,)
+                    )
+                    self._conn.commit()
+                    row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return post
+
+    def put(self, shortcode: str, post: Dict[str, Any]) -> None:
+        """
+        Store the metadata of a post.
+
+        Args:
+            shortcode (str): Shortcode of the Instagram post.
+            post (dict): Metadata with ``caption``, ``video_url``, ``owner`` and
+                ``duration``. ``fetched_at`` defaults to now.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    shortcode,
+                    post.get("caption") or "",
+                    post.get("video_url"),
+                    post.get("owner"),
+                    post.get("duration"),
+                    post.get("fetched_at") or time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Close the underlying database.
+        """
+        with self._lock:
+            self._conn.close()
+        logging.info(f"Post cache: {self.hits} hit(s), {self.misses} miss(es).")
@@ -0,0 +1,153 @@
+import math
+import re
+import threading
+from typing import Dict, Optional
+
+from config.config import RECIPE_ACCEPT_SCORE, RECIPE_REJECT_SCORE
+
+UNITS = (
+    "cups?|tablespoons?|tbsps?|teaspoons?|tsps?|grams?|g|kilograms?|kg|ounces?|oz|"
+    "pounds?|lbs?|ml|milliliters?|liters?|l|pinch(?:es)?|cloves?|sticks?|cans?|"
+    "slices?|dash(?:es)?"
+)
+QUANTITY = r"(?:\d+(?:[./]\d+)?|[½¼¾⅓⅔]|two|three|four|five|half|quarter)"
+QUANTITY_UNIT = re.compile(rf"\b{QUANTITY}\s*(?:{UNITS})\b", re.IGNORECASE)
+
+COOKING_VERBS = {
+    "bake", "boil", "broil", "chop", "dice", "fold", "fry", "grate", "grill",
+    "knead", "marinate", "mince", "mix", "preheat", "roast", "saute", "sauté",
+    "season", "sear", "simmer", "slice", "stir", "whisk", "blend", "drizzle",
+}
+FOOD_WORDS = {
+    "butter", "cheese", "chicken", "cream", "dough", "egg", "eggs", "flour",
+    "garlic", "ginger", "honey", "lemon", "milk", "oil", "onion", "pasta",
+    "pepper", "rice", "salt", "sauce", "sugar", "tomato", "vanilla", "vinegar",
+    "recipe", "ingredients", "oven", "pan", "skillet", "bowl",
+}
+OFF_TOPIC_WORDS = {
+    "dance", "dancing", "workout", "gym", "makeup", "skincare", "outfit",
+    "prank", "giveaway", "song", "lyrics", "vlog", "unboxing", "gaming",
+}
+
+# Weights of a small hand-tuned logistic model over the lexicon features.
+BIAS = -1.5
+WEIGHTS = {
+    "quantity_units": 1.2,
+    "cooking_verbs": 1.5,
+    "food_words": 1.0,
+    "off_topic_words": -2.0,
+}
+# A post needs at least one of these before it can be anything but a non-recipe.
+RECIPE_EVIDENCE = ("quantity_units", "cooking_verbs", "food_words")
+WORD = re.compile(r"[a-zà-ÿ]+")
+
+
+class RecipeScorer:
+    """
+    An offline scorer that decides clear recipe and non-recipe posts locally.
+
+    Posts scoring between the reject and accept thresholds are left for the LLM.
+
+    Attributes:
+        accept_threshold (float): Score at or above which a post is a recipe.
+        reject_threshold (float): Score at or below which a post is not a recipe.
+        accepted (int): Posts accepted locally.
+        rejected (int): Posts rejected locally.
+        deferred (int): Posts left for the LLM.
+    """
+
+    def __init__(
+        self,
+        accept_threshold: float = RECIPE_ACCEPT_SCORE,
+        reject_threshold: float = RECIPE_REJECT_SCORE,
+    ) -> None:
+        """
+        Initialize the RecipeScorer.
+
+        Args:
+            accept_threshold (float): Score at or above which a post is a recipe.
+            reject_threshold (float): Score at or below which a post is not a recipe.
+        """
+        self.accept_threshold = accept_threshold
+        self.reject_threshold = reject_threshold
+        self.accepted = 0
+        self.rejected = 0
+        self.deferred = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def features(transcript: str, caption: str) -> Dict[str, float]:
+        """
+        Extract the lexicon features of a post.
+
+        Args:
+            transcript (str): Transcribed text.
+            caption (str): Instagram post caption.
+
+        Returns:
+            dict: Log-scaled feature counts keyed like ``WEIGHTS``.
+        """
+        text = f"{transcript}\n{caption or ''}".lower()
+        words = WORD.findall(text)
+        counts = {
+            "quantity_units": len(QUANTITY_UNIT.findall(text)),
+            "cooking_verbs": sum(word in COOKING_VERBS for word in words),
+            "food_words": sum(word in FOOD_WORDS for word in words),
+            "off_topic_words": sum(word in OFF_TOPIC_WORDS for word in words),
+        }
+        return {name: math.log1p(count) for name, count in counts.items()}
+
+    def score(self, transcript: str, caption: str) -> float:
+        """
+        Estimate the probability that a post contains a recipe.
+
+        Posts without a single quantity, cooking verb or food word score 0.
+
+        Args:
+            transcript (str): Transcribed text.
+            caption (str): Instagram post caption.
+
+        Returns:
+            float: Score between 0 and 1.
+        """
+        features = self.features(transcript, caption)
+        if not any(features[name] for name in RECIPE_EVIDENCE):
+            return 0.0
+        z = BIAS + sum(WEIGHTS[name] * value for name, value in features.items())
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def classify(self, transcript: str, caption: str) -> Optional[int]:
+        """
+        Classify a post locally when the answer is clear.
+
+        Args:
+            transcript (str): Transcribed text.
+            caption (str): Instagram post caption.
+
+        Returns:
+            int: 100 for a clear recipe, 0 for a clear non-recipe, or None when
+                the post is ambiguous and should go to the LLM.
+        """
+        score = self.score(transcript, caption)
+        with self._lock:
+            if score >= self.accept_threshold:
+                self.accepted += 1
+                return 100
+            if score <= self.reject_threshold:
+                self.rejected += 1
+                return 0
+            self.deferred += 1
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report how often each classification path was taken.
+
+        Returns:
+            dict: Counts of locally accepted, locally rejected and deferred posts.
+        """
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "deferred": self.deferred,
+        }
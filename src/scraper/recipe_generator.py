@@ -2,15 +2,18 @@ import json
 import logging
 import os
 import uuid
-from typing import Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
-import openai
-
-from config.config import OPENAI_API_KEY
 from firebase.client import FirebaseClient
+from metrics import get_metrics
+from models.cookbook import Cookbook
+from models.ingredients import normalize_ingredients
 from models.recipe import Recipe
-
-openai.api_key = OPENAI_API_KEY
+from models.user import User
+from scraper.batch import BatchBackend, run_batch
+from scraper.completion_cache import CompletionCache
+from scraper.openai_client import AsyncOpenAIClient, load_openai
+from scraper.recipe_classifier import RecipeScorer
 
 
 class RecipeGenerator:
@@ -21,6 +24,9 @@ class RecipeGenerator:
         output_dir (str): Directory to save the generated recipes.
         local (bool): Whether to save files locally or to Firebase.
         firebase_client (FirebaseClient): Firebase client instance.
+        cache (CompletionCache): Cache of OpenAI completions, or None to disable.
+        scorer (RecipeScorer): Local pre-classifier, or None to always ask the LLM.
+        async_client (AsyncOpenAIClient): Client used by the async methods.
     """
 
     def __init__(
@@ -28,6 +34,9 @@ class RecipeGenerator:
         output_dir: str = "recipes",
         local: bool = False,
         firebase_client: Optional[FirebaseClient] = None,
+        cache: Optional[CompletionCache] = None,
+        scorer: Optional[RecipeScorer] = None,
+        async_client: Optional[AsyncOpenAIClient] = None,
     ) -> None:
         """
         Initialize the RecipeGenerator.
@@ -36,63 +45,145 @@ class RecipeGenerator:
             output_dir (str): Directory to save the generated recipes.
             local (bool): Whether to save files locally or to Firebase.
             firebase_client (FirebaseClient, optional): Firebase client instance. Defaults to None.
+            cache (CompletionCache, optional): Cache of OpenAI completions. Defaults to None.
+            scorer (RecipeScorer, optional): Local pre-classifier. Defaults to None.
+            async_client (AsyncOpenAIClient, optional): Client for the async methods.
+                Defaults to one created on first use.
         """
         self.output_dir = output_dir
         self.local = local
         self.firebase_client = firebase_client or FirebaseClient()
+        self.cache = cache
+        self.scorer = scorer
+        self.async_client = async_client
         if not local:
             logging.info("Firebase initialized successfully.")
 
-    def classify_transcript(self, transcript: str, caption: str) -> int:
+    def _cached(self, key: str, validate: Callable[[str], Any]) -> Optional[str]:
         """
-        Classify the likelihood that the transcript contains a recipe.
+        Look up a completion, dropping cached responses that no longer parse.
 
         Args:
-            transcript (str): Transcribed text.
-            caption (str): Instagram post caption.
+            key (str): Cache key from ``CompletionCache.make_key``.
+            validate (callable): Parser that raises if the response is unusable.
 
         Returns:
-            int: Likelihood percentage that the transcript contains a recipe.
+            str: Cached response text, or None if it must be requested.
         """
-        prompt = (
-            f"Determine if the following transcript and instagram caption is related to cooking and likely to contain a recipe. "
-            f"Respond with a percentage likelihood:\n\n"
-            f"Transcript:\n{transcript}\n\n"
-            f"Caption:\n{caption}\n\n"
-            f"Response format: 'Likelihood: X%'"
-        )
+        if self.cache is None:
+            return None
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
         try:
-            response = openai.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-            )
-            likelihood_str = response.choices[0].message.content.strip()
-            likelihood = int(likelihood_str.split(":")[1].strip().replace("%", ""))
-            return likelihood
+            validate(cached)
         except Exception as e:
-            logging.error(f"Error during classification: {e}")
-            return 0
+            logging.warning(f"Dropping unusable cached completion {key[:12]}: {e}")
+            self.cache.delete(key)
+            return None
+        get_metrics().increment("completion_cache_hits")
+        return cached
 
-    def generate_recipe(
-        self, transcript: str, caption: str, firebase_client: FirebaseClient
-    ) -> Recipe:
+    def _store(self, key: str, content: str, validate: Callable[[str], Any]) -> None:
         """
-        Generate a recipe from the transcript and caption.
+        Cache a completion once it has parsed successfully.
 
         Args:
-            transcript (str): Transcribed text.
-            caption (str): Instagram post caption.
-            firebase_client (FirebaseClient): Firebase client instance.
+            key (str): Cache key from ``CompletionCache.make_key``.
+            content (str): Response text.
+            validate (callable): Parser that raises if the response is unusable.
+
+        Raises:
+            Exception: Whatever ``validate`` raises; nothing is cached then.
+        """
+        validate(content)
+        if self.cache is not None:
+            self.cache.put(key, content)
+
+    def _complete(
+        self, model: str, prompt: str, validate: Callable[[str], Any], **params: Any
+    ) -> str:
+        """
+        Run a chat completion, answering from the cache when possible.
+
+        Only responses that ``validate`` accepts are cached, so a malformed
+        answer is requested again next time instead of being replayed.
+
+        Args:
+            model (str): OpenAI model name.
+            prompt (str): User prompt.
+            validate (callable): Parser that raises if the response is unusable.
+            **params: Sampling parameters passed to the API.
 
         Returns:
-            Recipe: Generated recipe instance.
+            str: Stripped response text.
         """
-        likelihood = self.classify_transcript(transcript, caption)
-        if likelihood < 85:
-            logging.info("Transcript is unlikely to contain a recipe.")
-            raise ValueError("Transcript does not contain a recipe.")
+        messages = [{"role": "user", "content": prompt}]
+        key = CompletionCache.make_key(model, messages, **params)
+        cached = self._cached(key, validate)
+        if cached is not None:
+            return cached
+        with get_metrics().span("openai_chat") as span:
+            response = load_openai().chat.completions.create(
+                model=model, messages=messages, **params  # type: ignore[arg-type]
+            )
+            if response.usage is not None:
+                span.add(tokens=response.usage.total_tokens)
+        content = response.choices[0].message.content.strip()
+        self._store(key, content, validate)
+        return content
+
+    async def _acomplete(
+        self, model: str, prompt: str, validate: Callable[[str], Any], **params: Any
+    ) -> str:
+        """
+        Run a chat completion on the async client, using the cache when possible.
+
+        Args:
+            model (str): OpenAI model name.
+            prompt (str): User prompt.
+            validate (callable): Parser that raises if the response is unusable.
+            **params: Sampling parameters passed to the API.
+
+        Returns:
+            str: Stripped response text.
+        """
+        messages = [{"role": "user", "content": prompt}]
+        key = CompletionCache.make_key(model, messages, **params)
+        cached = self._cached(key, validate)
+        if cached is not None:
+            return cached
+        if self.async_client is None:
+            self.async_client = AsyncOpenAIClient()
+        content = await self.async_client.chat(model, messages, **params)
+        self._store(key, content, validate)
+        return content
+
+    def _classify_locally(self, transcript: str, caption: str) -> Optional[int]:
+        if self.scorer is None:
+            return None
+        likelihood = self.scorer.classify(transcript, caption)
+        if likelihood is not None:
+            logging.info(f"Classified locally with likelihood {likelihood}%.")
+        return likelihood
+
+    @staticmethod
+    def _classification_prompt(transcript: str, caption: str) -> str:
+        return (
+            f"Determine if the following transcript and instagram caption is related to cooking and likely to contain a recipe. "
+            f"Respond with a percentage likelihood:\n\n"
+            f"Transcript:\n{transcript}\n\n"
+            f"Caption:\n{caption}\n\n"
+            f"Response format: 'Likelihood: X%'"
+        )
+
+    @staticmethod
+    def _parse_likelihood(likelihood_str: str) -> int:
+        return int(likelihood_str.split(":")[1].strip().replace("%", ""))
 
-        prompt = (
+    @staticmethod
+    def _recipe_prompt(transcript: str, caption: str) -> str:
+        return (
             "[no prose]\n"
             "[output only JSON]\n"
             f"Extract the recipe details from the following transcript and caption. Do not include any promotional material"
@@ -109,31 +200,335 @@ class RecipeGenerator:
             f'  "categories": ["category 1", "category 2"]\n'
             f"}}\n"
         )
+
+    @staticmethod
+    def _parse_recipe(recipe_json: str) -> Dict[str, Any]:
+        """
+        Parse the recipe JSON returned by the model.
+
+        Args:
+            recipe_json (str): Model response.
+
+        Returns:
+            dict: Recipe fields.
+
+        Raises:
+            ValueError: If the response is not valid recipe JSON.
+        """
         try:
-            response = openai.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=500,
-                temperature=0.5,
-            )
-            recipe_json = response.choices[0].message.content.strip()
             recipe_data = json.loads(recipe_json)
-            recipe_data["recipe_id"] = str(uuid.uuid4())  # Add unique UUID
-            return Recipe(
-                recipe_id=recipe_data["recipe_id"],
-                title=recipe_data["title"],
-                ingredients=recipe_data["ingredients"],
-                instructions=recipe_data["instructions"],
-                categories=recipe_data["categories"],
-                notes=recipe_data.get("notes"),
-                firebase_client=firebase_client,
-            )
         except json.JSONDecodeError as e:
             logging.error(f"Failed to parse recipe JSON: {e}")
             raise ValueError("Invalid recipe format received from OpenAI.")
-        except Exception as e:
-            logging.error(f"Error during recipe generation: {e}")
-            raise e
+        if not isinstance(recipe_data, dict):
+            raise ValueError("Invalid recipe format received from OpenAI.")
+        missing = {"title", "ingredients", "instructions", "categories"} - set(
+            recipe_data
+        )
+        if missing:
+            raise ValueError(f"Recipe is missing {', '.join(sorted(missing))}.")
+        return recipe_data
+
+    @staticmethod
+    def _build_recipe(
+        recipe_json: str,
+        firebase_client: FirebaseClient,
+        shortcode: Optional[str] = None,
+    ) -> Recipe:
+        """
+        Build a Recipe from the JSON returned by the model.
+
+        Args:
+            recipe_json (str): Model response.
+            firebase_client (FirebaseClient): Firebase client instance.
+            shortcode (str, optional): Shortcode of the source Instagram post.
+
+        Returns:
+            Recipe: Generated recipe instance.
+
+        Raises:
+            ValueError: If the response is not valid recipe JSON.
+        """
+        recipe_data = RecipeGenerator._parse_recipe(recipe_json)
+        recipe_data["recipe_id"] = str(uuid.uuid4())  # Add unique UUID
+        return Recipe(
+            recipe_id=recipe_data["recipe_id"],
+            title=recipe_data["title"],
+            ingredients=recipe_data["ingredients"],
+            instructions=recipe_data["instructions"],
+            categories=recipe_data["categories"],
+            notes=recipe_data.get("notes"),
+            shortcode=shortcode,
+            firebase_client=firebase_client,
+            canonical_ingredients=normalize_ingredients(recipe_data["ingredients"]),
+        )
+
+    def classify_transcript(self, transcript: str, caption: str) -> int:
+        """
+        Classify the likelihood that the transcript contains a recipe.
+
+        Clear cases are decided by the local scorer; only ambiguous posts cost an
+        LLM round trip.
+
+        Args:
+            transcript (str): Transcribed text.
+            caption (str): Instagram post caption.
+
+        Returns:
+            int: Likelihood percentage that the transcript contains a recipe.
+        """
+        with get_metrics().span("classify"):
+            likelihood = self._classify_locally(transcript, caption)
+            if likelihood is not None:
+                return likelihood
+            prompt = self._classification_prompt(transcript, caption)
+            try:
+                return self._parse_likelihood(
+                    self._complete("gpt-4o-mini", prompt, self._parse_likelihood)
+                )
+            except Exception as e:
+                logging.error(f"Error during classification: {e}")
+                return 0
+
+    async def aclassify_transcript(self, transcript: str, caption: str) -> int:
+        """
+        Classify the likelihood that the transcript contains a recipe, asynchronously.
+
+        Args:
+            transcript (str): Transcribed text.
+            caption (str): Instagram post caption.
+
+        Returns:
+            int: Likelihood percentage that the transcript contains a recipe.
+        """
+        with get_metrics().span("classify"):
+            likelihood = self._classify_locally(transcript, caption)
+            if likelihood is not None:
+                return likelihood
+            prompt = self._classification_prompt(transcript, caption)
+            try:
+                return self._parse_likelihood(
+                    await self._acomplete("gpt-4o-mini", prompt, self._parse_likelihood)
+                )
+            except Exception as e:
+                logging.error(f"Error during classification: {e}")
+                return 0
+
+    def generate_recipe(
+        self,
+        transcript: str,
+        caption: str,
+        firebase_client: FirebaseClient,
+        shortcode: Optional[str] = None,
+        likelihood: Optional[int] = None,
+    ) -> Recipe:
+        """
+        Generate a recipe from the transcript and caption.
+
+        Args:
+            transcript (str): Transcribed text.
+            caption (str): Instagram post caption.
+            firebase_client (FirebaseClient): Firebase client instance.
+            shortcode (str, optional): Shortcode of the source Instagram post.
+            likelihood (int, optional): Known recipe likelihood of the post, e.g.
+                of an earlier near-duplicate. Defaults to classifying it.
+
+        Returns:
+            Recipe: Generated recipe instance.
+        """
+        with get_metrics().span("generate_recipe"):
+            if likelihood is None:
+                likelihood = self.classify_transcript(transcript, caption)
+            if likelihood < 85:
+                logging.info("Transcript is unlikely to contain a recipe.")
+                raise ValueError("Transcript does not contain a recipe.")
+
+            prompt = self._recipe_prompt(transcript, caption)
+            try:
+                recipe_json = self._complete(
+                    "gpt-4o-mini",
+                    prompt,
+                    self._parse_recipe,
+                    max_tokens=500,
+                    temperature=0.5,
+                )
+                return self._build_recipe(recipe_json, firebase_client, shortcode)
+            except Exception as e:
+                logging.error(f"Error during recipe generation: {e}")
+                raise e
+
+    async def agenerate_recipe(
+        self,
+        transcript: str,
+        caption: str,
+        firebase_client: FirebaseClient,
+        shortcode: Optional[str] = None,
+        likelihood: Optional[int] = None,
+    ) -> Recipe:
+        """
+        Generate a recipe from the transcript and caption, asynchronously.
+
+        Args:
+            transcript (str): Transcribed text.
+            caption (str): Instagram post caption.
+            firebase_client (FirebaseClient): Firebase client instance.
+            shortcode (str, optional): Shortcode of the source Instagram post.
+            likelihood (int, optional): Known recipe likelihood of the post, e.g.
+                of an earlier near-duplicate. Defaults to classifying it.
+
+        Returns:
+            Recipe: Generated recipe instance.
+        """
+        with get_metrics().span("generate_recipe"):
+            if likelihood is None:
+                likelihood = await self.aclassify_transcript(transcript, caption)
+            if likelihood < 85:
+                logging.info("Transcript is unlikely to contain a recipe.")
+                raise ValueError("Transcript does not contain a recipe.")
+
+            prompt = self._recipe_prompt(transcript, caption)
+            try:
+                recipe_json = await self._acomplete(
+                    "gpt-4o-mini",
+                    prompt,
+                    self._parse_recipe,
+                    max_tokens=500,
+                    temperature=0.5,
+                )
+                return self._build_recipe(recipe_json, firebase_client, shortcode)
+            except Exception as e:
+                logging.error(f"Error during recipe generation: {e}")
+                raise e
+
+    def _batch_complete(
+        self,
+        backend: BatchBackend,
+        prompts: Dict[str, str],
+        batch_dir: str,
+        poll_interval: float,
+        validate: Callable[[str], Any],
+        **params: Any,
+    ) -> Dict[str, str]:
+        """
+        Answer many prompts with one batch job, skipping those already cached.
+
+        Args:
+            backend (BatchBackend): Service that runs the job.
+            prompts (dict): User prompts keyed by custom ID.
+            batch_dir (str): Directory for the request and result files.
+            poll_interval (float): Seconds between status checks.
+            validate (callable): Parser that raises if a response is unusable.
+                Unusable responses are returned but not cached.
+            **params: Sampling parameters passed to the API.
+
+        Returns:
+            dict: Response text keyed by custom ID.
+        """
+        model = "gpt-4o-mini"
+        responses: Dict[str, str] = {}
+        requests: Dict[str, Dict] = {}
+        keys: Dict[str, str] = {}
+        for custom_id, prompt in prompts.items():
+            messages = [{"role": "user", "content": prompt}]
+            keys[custom_id] = CompletionCache.make_key(model, messages, **params)
+            cached = self._cached(keys[custom_id], validate)
+            if cached is not None:
+                responses[custom_id] = cached
+            else:
+                requests[custom_id] = {"model": model, "messages": messages, **params}
+
+        results = run_batch(backend, requests, batch_dir, poll_interval)
+        for custom_id, content in results.items():
+            try:
+                self._store(keys[custom_id], content, validate)
+            except Exception as e:
+                logging.warning(f"Not caching unusable response for {custom_id}: {e}")
+            responses[custom_id] = content
+        return responses
+
+    def generate_recipes_batch(
+        self,
+        posts: List[Tuple[str, str, str]],
+        backend: BatchBackend,
+        firebase_client: FirebaseClient,
+        cookbook: Optional[Cookbook] = None,
+        batch_dir: str = "batches",
+        poll_interval: float = 30.0,
+        user: Optional[User] = None,
+    ) -> Dict[str, Recipe]:
+        """
+        Generate and save recipes for many posts using batch jobs.
+
+        Posts the local scorer cannot decide are classified in one batch job, and
+        every likely recipe is then generated in a second one.
+
+        Args:
+            posts (list): (shortcode, transcript, caption) tuples.
+            backend (BatchBackend): Service that runs the jobs.
+            firebase_client (FirebaseClient): Firebase client instance.
+            cookbook (Cookbook, optional): Cookbook to add the recipes to. Recipes
+                are only saved when omitted.
+            batch_dir (str): Directory for the request and result files.
+            poll_interval (float): Seconds between status checks.
+            user (User, optional): Owner of the cookbook. Posts already in their
+                shortcode index are skipped and new recipes are indexed.
+
+        Returns:
+            dict: Saved recipes keyed by shortcode.
+        """
+        texts = {
+            shortcode: (transcript, caption)
+            for shortcode, transcript, caption in posts
+            if user is None or shortcode not in user.shortcodes
+        }
+        likelihoods: Dict[str, int] = {}
+        ambiguous: Dict[str, str] = {}
+        for shortcode, (transcript, caption) in texts.items():
+            likelihood = self._classify_locally(transcript, caption)
+            if likelihood is None:
+                ambiguous[shortcode] = self._classification_prompt(transcript, caption)
+            else:
+                likelihoods[shortcode] = likelihood
+
+        responses = self._batch_complete(
+            backend, ambiguous, batch_dir, poll_interval, self._parse_likelihood
+        )
+        for shortcode, response in responses.items():
+            try:
+                likelihoods[shortcode] = self._parse_likelihood(response)
+            except Exception as e:
+                logging.error(f"Error during classification of {shortcode}: {e}")
+
+        likely = {
+            shortcode: self._recipe_prompt(*texts[shortcode])
+            for shortcode, likelihood in likelihoods.items()
+            if likelihood >= 85
+        }
+        logging.info(f"{len(likely)} of {len(posts)} post(s) are likely recipes.")
+        responses = self._batch_complete(
+            backend,
+            likely,
+            batch_dir,
+            poll_interval,
+            self._parse_recipe,
+            max_tokens=500,
+            temperature=0.5,
+        )
+
+        recipes: Dict[str, Recipe] = {}
+        for shortcode, recipe_json in responses.items():
+            try:
+                recipe = self._build_recipe(recipe_json, firebase_client, shortcode)
+                if cookbook is not None and user is not None:
+                    user.add_recipe(cookbook, recipe)
+                elif cookbook is not None:
+                    cookbook.add_recipe(recipe)
+                else:
+                    recipe.save()
+                recipes[shortcode] = recipe
+            except Exception as e:
+                logging.error(f"Error building recipe for {shortcode}: {e}")
+        return recipes
 
     def format_recipe_as_markdown(
         self, recipe_data: Dict[str, Union[str, List[str]]]
@@ -0,0 +1,134 @@
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+from metrics import get_metrics
+
+
+class _Bucket:
+    # Token bucket state of one host.
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated_at = now
+        self.blocked_until = 0.0
+
+
+class RequestScheduler:
+    """
+    Spreads requests to each host over time within a request budget.
+
+    Every host gets a token bucket refilled at ``requests_per_minute`` and
+    holding at most ``burst`` tokens. Each request takes a token, and callers
+    that find the bucket empty sleep until their turn, with some jitter so
+    concurrent callers do not wake up together. A rate-limit response blocks
+    the host for a while. Batches therefore run at a steady pace below the
+    limit instead of bursting into it and stalling.
+
+    Attributes:
+        requests_per_minute (float): Sustained request budget per host.
+        burst (int): Requests a host may receive back to back after being idle.
+        jitter (float): Extra random delay, as a share of the request interval.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 10.0,
+        burst: int = 5,
+        jitter: float = 0.2,
+    ) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.burst = max(1, burst)
+        self.jitter = jitter
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self) -> float:
+        """
+        Seconds between requests to one host at the sustained budget.
+        """
+        return 60.0 / self.requests_per_minute
+
+    def _bucket(self, host: str, now: float) -> _Bucket:
+        # Caller must hold self._lock.
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(float(self.burst), now)
+        elapsed = max(0.0, now - bucket.updated_at)
+        bucket.tokens = min(float(self.burst), bucket.tokens + elapsed / self.interval)
+        bucket.updated_at = max(bucket.updated_at, now)
+        return bucket
+
+    def reserve(self, host: str) -> float:
+        """
+        Take a request slot for a host without waiting for it.
+
+        Args:
+            host (str): Host the request goes to.
+
+        Returns:
+            float: Seconds to wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._bucket(host, now)
+            bucket.tokens -= 1.0
+            # A negative balance queues the request behind earlier reservations.
+            delay = max(0.0, -bucket.tokens * self.interval)
+            return delay + max(0.0, bucket.blocked_until - now)
+
+    def acquire(self, host: str) -> None:
+        """
+        Wait until a request to a host fits in its budget.
+
+        Args:
+            host (str): Host the request goes to.
+        """
+        delay = self.reserve(host)
+        if delay > 0:
+            delay += random.uniform(0.0, self.jitter * self.interval)
+            logging.debug(f"Waiting {delay:.1f}s before the next request to {host}.")
+            get_metrics().increment("throttled_requests")
+            get_metrics().increment("throttle_wait_seconds", delay)
+            time.sleep(delay)
+
+    def backoff(self, host: str, seconds: float) -> None:
+        """
+        Block a host after it rate-limited a request.
+
+        The bucket is emptied and only starts refilling once the block ends, so
+        requests resume at the sustained pace rather than in a burst.
+
+        Args:
+            host (str): Host that rate-limited the request.
+            seconds (float): How long to send it nothing.
+        """
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._bucket(host, now)
+            bucket.blocked_until = max(bucket.blocked_until, now + seconds)
+            bucket.tokens = min(bucket.tokens, 0.0)
+            bucket.updated_at = bucket.blocked_until
+        get_metrics().increment("rate_limited_requests")
+        logging.warning(f"{host} is rate limiting requests; pausing {seconds:.0f}s.")
+
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_request_scheduler() -> RequestScheduler:
+    """
+    Get the process-wide request scheduler, creating it on first use.
+
+    Returns:
+        RequestScheduler: Shared scheduler with the default budget.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler()
+        return _scheduler
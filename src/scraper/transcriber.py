@@ -1,47 +1,489 @@
+import gc
 import logging
-from typing import Optional
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-import whisper  # type: ignore
+from metrics import get_metrics
+from scraper.audio import SAMPLE_RATE
+from scraper.vad import SpeechMap, detect_speech
+
+DEFAULT_MODEL_SIZE = "small"
+DEFAULT_IDLE_TIMEOUT = 600.0
+# Silence inserted between speech regions so Whisper sees sentence breaks.
+VAD_GAP_SECONDS = 0.3
+# With less kept speech than this VAD is more likely wrong than the clip silent.
+VAD_MIN_SPEECH_SHARE = 0.05
+VAD_MIN_SPEECH_SECONDS = 1.5
+
+
+class ModelRegistry:
+    """
+    A process-wide registry of loaded Whisper models.
+
+    Models are keyed by model size and device, loaded once on first use and
+    released after they have been idle for longer than ``idle_timeout``.
+
+    Attributes:
+        idle_timeout (float): Seconds a model may sit unused before it is freed,
+            or None to keep models loaded for the life of the process.
+    """
+
+    def __init__(self, idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT) -> None:
+        """
+        Initialize the ModelRegistry.
+
+        Args:
+            idle_timeout (float, optional): Seconds a model may sit unused before
+                it is freed. None keeps models loaded indefinitely.
+        """
+        self.idle_timeout = idle_timeout
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._last_used: Dict[Tuple[str, str], float] = {}
+        self._in_use: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Timer] = None
+
+    @staticmethod
+    def resolve_device(device: Optional[str] = None) -> str:
+        """
+        Resolve the device a model should be loaded on.
+
+        Args:
+            device (str, optional): Requested device. Defaults to CUDA when available.
+
+        Returns:
+            str: Device name.
+        """
+        if device:
+            return device
+        # torch and whisper take seconds to import, so they are imported where
+        # they are first needed.
+        import torch  # type: ignore
+
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    @contextmanager
+    def lease(
+        self, model_size: str = DEFAULT_MODEL_SIZE, device: Optional[str] = None
+    ) -> Iterator[Any]:
+        """
+        Borrow a loaded model, loading it on first use.
+
+        A leased model is never freed while the lease is held.
+
+        Args:
+            model_size (str): Whisper model size, e.g. "small".
+            device (str, optional): Device to load the model on.
+
+        Yields:
+            whisper.Whisper: Loaded Whisper model.
+        """
+        key = (model_size, self.resolve_device(device))
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                logging.info(f"Loading Whisper model '{key[0]}' on {key[1]}...")
+                with get_metrics().span("model_load"):
+                    import whisper  # type: ignore
+
+                    model = whisper.load_model(key[0], device=key[1])
+                self._models[key] = model
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+        try:
+            yield model
+        finally:
+            with self._lock:
+                self._in_use[key] -= 1
+                self._last_used[key] = time.monotonic()
+                self._schedule_reaper()
+
+    def loaded(self) -> Tuple[Tuple[str, str], ...]:
+        """
+        List the keys of the models currently held in memory.
+
+        Returns:
+            tuple: (model size, device) pairs.
+        """
+        with self._lock:
+            return tuple(self._models)
+
+    def release_idle(self, max_idle: Optional[float] = None) -> int:
+        """
+        Free every model that has not been used within ``max_idle`` seconds.
+
+        Args:
+            max_idle (float, optional): Idle threshold. Defaults to ``idle_timeout``.
+
+        Returns:
+            int: Number of models freed.
+        """
+        max_idle = self.idle_timeout if max_idle is None else max_idle
+        if max_idle is None:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            if self._reaper is threading.current_thread():
+                self._reaper = None
+            stale = [
+                key
+                for key in self._models
+                if not self._in_use.get(key)
+                and now - self._last_used.get(key, now) >= max_idle
+            ]
+            for key in stale:
+                del self._models[key]
+                self._last_used.pop(key, None)
+                self._in_use.pop(key, None)
+                logging.info(f"Released idle Whisper model '{key[0]}' on {key[1]}.")
+            if self._models:
+                self._schedule_reaper()
+        if stale:
+            gc.collect()
+            if any(device.startswith("cuda") for _, device in stale):
+                import torch
+
+                torch.cuda.empty_cache()
+        return len(stale)
+
+    def clear(self) -> None:
+        """
+        Free every loaded model regardless of idle time.
+        """
+        self.release_idle(max_idle=0.0)
+
+    def _schedule_reaper(self) -> None:
+        # Caller must hold self._lock.
+        if self.idle_timeout is None:
+            return
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        self._reaper = threading.Timer(self.idle_timeout, self.release_idle)
+        self._reaper.daemon = True
+        self._reaper.start()
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Get the process-wide Whisper model registry.
+
+    Returns:
+        ModelRegistry: Shared registry instance.
+    """
+    return _registry
 
 
 class Transcriber:
     """
-    A class to transcribe audio files using the Whisper model.
+    A service to transcribe audio files using a shared Whisper model.
 
     Attributes:
-        audio_path (str): Path to the audio file.
-        model (whisper.Model): Whisper model instance.
+        model_size (str): Whisper model size.
+        device (str): Device the model runs on.
+        vad (bool): Whether to strip non-speech audio before transcribing.
+        registry (ModelRegistry): Registry the model is borrowed from.
     """
 
-    def __init__(self, audio_path: str) -> None:
+    def __init__(
+        self,
+        model_size: str = DEFAULT_MODEL_SIZE,
+        device: Optional[str] = None,
+        registry: Optional[ModelRegistry] = None,
+        vad: bool = True,
+    ) -> None:
         """
         Initialize the Transcriber.
 
         Args:
-            audio_path (str): Path to the audio file.
-            model (whisper.Model, optional): Whisper model instance. Defaults to None.
+            model_size (str): Whisper model size. Defaults to "small".
+            device (str, optional): Device to run on. Defaults to CUDA when available.
+            registry (ModelRegistry, optional): Model registry. Defaults to the
+                process-wide registry.
+            vad (bool): Whether to strip silence and music before transcribing.
+                Defaults to True.
         """
-        self.audio_path = audio_path
-        self.model = whisper.load_model("small")
+        self.registry = registry or get_model_registry()
+        self.model_size = model_size
+        self.device = self.registry.resolve_device(device)
+        self.vad = vad
 
-    def transcribe_audio(self, verbose: bool = False) -> str:
+    def transcribe_audio(self, audio_path: str, verbose: bool = False) -> str:
         """
-        Transcribe the audio file.
+        Transcribe an audio file.
 
         Args:
+            audio_path (str): Path to the audio file.
             verbose (bool): Whether to enable verbose output.
 
         Returns:
             str: Transcribed text.
         """
         try:
-            response = self.model.transcribe(
-                audio=self.audio_path,
-                language="en",
-                verbose=verbose,
-                fp16=False,
-            )
-            return response.get("text", "")
+            return self.transcribe_segments(audio_path, verbose).get("text", "")
         except Exception as e:
             logging.error(f"Error during transcription: {e}")
             return ""
+
+    def transcribe_segments(self, audio_path: str, verbose: bool = False) -> Dict:
+        """
+        Transcribe an audio file and return Whisper's full result.
+
+        When VAD is enabled only the detected speech is sent to the model, and
+        segment timestamps are mapped back to the original audio.
+
+        Args:
+            audio_path (str): Path to the audio file.
+            verbose (bool): Whether to enable verbose output.
+
+        Returns:
+            dict: Whisper result with "text" and "segments" keys.
+        """
+        import whisper
+
+        with get_metrics().span("transcribe") as span:
+            audio = whisper.load_audio(audio_path)
+            span.add(audio_seconds=len(audio) / SAMPLE_RATE)
+            speech_map = self._speech_map(audio, audio_path) if self.vad else None
+            if speech_map is not None:
+                audio = speech_map.concatenate(audio)
+
+            with self.registry.lease(self.model_size, self.device) as model:
+                response = model.transcribe(
+                    audio=audio,
+                    language="en",
+                    verbose=verbose,
+                    fp16=False,
+                )
+
+        if speech_map is not None:
+            for segment in response.get("segments", []):
+                segment["start"] = speech_map.to_original(segment["start"])
+                segment["end"] = speech_map.to_original(segment["end"])
+        return response
+
+    def _speech_map(self, audio: Any, audio_path: str) -> Optional[SpeechMap]:
+        """
+        Detect speech in the audio and log how much is skipped.
+
+        Args:
+            audio (np.ndarray): 16 kHz mono samples.
+            audio_path (str): Path the samples were loaded from, for logging.
+
+        Returns:
+            SpeechMap: Map of the kept regions, or None to transcribe everything.
+        """
+        total = len(audio) / SAMPLE_RATE
+        regions = detect_speech(audio)
+        if not regions:
+            logging.info(
+                f"VAD found no speech in {audio_path}; transcribing all {total:.1f}s."
+            )
+            return None
+        speech_map = SpeechMap(regions, gap=VAD_GAP_SECONDS)
+        kept = speech_map.speech_seconds
+        if kept < max(VAD_MIN_SPEECH_SECONDS, total * VAD_MIN_SPEECH_SHARE):
+            logging.info(
+                f"VAD kept only {kept:.1f}s of {total:.1f}s "
+                f"in {audio_path}; transcribing all of it."
+            )
+            return None
+        skipped = total - kept
+        logging.info(
+            f"VAD kept {kept:.1f}s of {total:.1f}s "
+            f"in {audio_path} ({skipped:.1f}s skipped)."
+        )
+        return speech_map
+
+
+_worker_transcriber: Optional[Transcriber] = None
+
+
+def _init_worker(
+    model_size: str, device: Optional[str], num_threads: int, vad: bool = True
+) -> None:
+    """
+    Set up a batch worker process with a warm model and a bounded thread count.
+
+    Args:
+        model_size (str): Whisper model size.
+        device (str, optional): Device to run on.
+        num_threads (int): Torch intra-op threads for this worker.
+        vad (bool): Whether to strip silence and music before transcribing.
+    """
+    global _worker_transcriber
+    import torch
+
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+    # Workers keep their model for the life of the pool.
+    registry = ModelRegistry(idle_timeout=None)
+    _worker_transcriber = Transcriber(model_size, device, registry=registry, vad=vad)
+    with registry.lease(model_size, device):
+        pass
+
+
+def _transcribe_in_worker(audio_path: str, verbose: bool) -> Tuple[str, str]:
+    """
+    Transcribe one file inside a batch worker process.
+
+    Args:
+        audio_path (str): Path to the audio file.
+        verbose (bool): Whether to enable verbose output.
+
+    Returns:
+        tuple: The audio path and its transcript.
+    """
+    assert _worker_transcriber is not None, "Batch worker was not initialized."
+    return audio_path, _worker_transcriber.transcribe_audio(audio_path, verbose)
+
+
+class BatchTranscriber:
+    """
+    Transcribe many audio files in parallel over a pool of worker processes.
+
+    Each worker holds its own warm Whisper model and is limited to its share of
+    the CPU cores so the pool does not oversubscribe the machine.
+
+    Attributes:
+        workers (int): Number of worker processes.
+        threads_per_worker (int): Torch threads used by each worker.
+        model_size (str): Whisper model size.
+        device (str): Device the models run on.
+        vad (bool): Whether workers strip non-speech audio before transcribing.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        model_size: str = DEFAULT_MODEL_SIZE,
+        device: Optional[str] = None,
+        threads_per_worker: Optional[int] = None,
+        vad: bool = True,
+    ) -> None:
+        """
+        Initialize the BatchTranscriber.
+
+        Args:
+            workers (int, optional): Number of worker processes. Defaults to the
+                number of CPU cores.
+            model_size (str): Whisper model size. Defaults to "small".
+            device (str, optional): Device to run on. Defaults to CUDA when available.
+            threads_per_worker (int, optional): Torch threads per worker. Defaults
+                to an even split of the CPU cores across workers.
+            vad (bool): Whether to strip silence and music before transcribing.
+                Defaults to True.
+        """
+        cpu_count = os.cpu_count() or 1
+        self.workers = max(1, workers or cpu_count)
+        self.threads_per_worker = threads_per_worker or max(
+            1, cpu_count // self.workers
+        )
+        self.model_size = model_size
+        self.device = ModelRegistry.resolve_device(device)
+        self.vad = vad
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "BatchTranscriber":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """
+        The worker pool, started on first use.
+
+        Returns:
+            ProcessPoolExecutor: Pool of warm transcription workers.
+        """
+        if self._executor is None:
+            logging.info(
+                f"Starting {self.workers} transcription worker(s) "
+                f"with {self.threads_per_worker} thread(s) each..."
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(
+                    self.model_size,
+                    self.device,
+                    self.threads_per_worker,
+                    self.vad,
+                ),
+            )
+        return self._executor
+
+    def submit(self, audio_path: str, verbose: bool = False) -> Future:
+        """
+        Queue one file for transcription.
+
+        Args:
+            audio_path (str): Path to the audio file.
+            verbose (bool): Whether to enable verbose output.
+
+        Returns:
+            Future: Resolves to a tuple of the audio path and its transcript.
+        """
+        return self.executor.submit(_transcribe_in_worker, audio_path, verbose)
+
+    def transcribe_audio(self, audio_path: str, verbose: bool = False) -> str:
+        """
+        Transcribe one file on the pool and wait for the result.
+
+        This lets a BatchTranscriber stand in for a Transcriber, so several
+        threads can share the pool.
+
+        Args:
+            audio_path (str): Path to the audio file.
+            verbose (bool): Whether to enable verbose output.
+
+        Returns:
+            str: Transcribed text, or an empty string if transcription failed.
+        """
+        try:
+            # Spans recorded inside the workers stay in their processes; this
+            # one covers the wait, queueing included.
+            with get_metrics().span("transcribe_batch"):
+                return self.submit(audio_path, verbose).result()[1]
+        except Exception as e:
+            logging.error(f"Error transcribing {audio_path}: {e}")
+            return ""
+
+    def transcribe_batch(
+        self, audio_paths: List[str], verbose: bool = False
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Transcribe a list of files, yielding each result as soon as it finishes.
+
+        Args:
+            audio_paths (list): Paths to the audio files.
+            verbose (bool): Whether to enable verbose output.
+
+        Yields:
+            tuple: The audio path and its transcript, in completion order. The
+                transcript is empty if transcription failed.
+        """
+        futures = {self.submit(path, verbose): path for path in audio_paths}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                logging.error(f"Error transcribing {futures[future]}: {e}")
+                yield futures[future], ""
+
+    def close(self) -> None:
+        """
+        Shut down the worker pool.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
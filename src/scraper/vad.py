@@ -0,0 +1,197 @@
+import bisect
+from typing import List, Tuple
+
+import numpy as np
+
+from scraper.audio import SAMPLE_RATE
+
+FRAME_SECONDS = 0.03
+# Most speech energy sits in the telephone band; music spreads much wider.
+SPEECH_BAND_HZ = (300.0, 3400.0)
+
+
+def _frames(samples: np.ndarray, frame_length: int) -> np.ndarray:
+    """
+    Split a signal into non-overlapping frames, dropping the trailing remainder.
+
+    Args:
+        samples (np.ndarray): Mono float samples.
+        frame_length (int): Samples per frame.
+
+    Returns:
+        np.ndarray: Array of shape (frames, frame_length).
+    """
+    count = len(samples) // frame_length
+    return samples[: count * frame_length].reshape(count, frame_length)
+
+
+def speech_frames(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_seconds: float = FRAME_SECONDS,
+    energy_margin_db: float = 12.0,
+    min_band_ratio: float = 0.4,
+) -> np.ndarray:
+    """
+    Flag each frame that looks like speech.
+
+    A frame counts as speech when it is louder than the clip's noise floor by
+    ``energy_margin_db`` and enough of its spectral energy falls in the speech band.
+
+    Args:
+        samples (np.ndarray): Mono float samples.
+        sample_rate (int): Sample rate of ``samples``.
+        frame_seconds (float): Frame duration.
+        energy_margin_db (float): Required level above the noise floor.
+        min_band_ratio (float): Required share of energy in the speech band.
+
+    Returns:
+        np.ndarray: Boolean mask with one entry per frame.
+    """
+    frame_length = int(sample_rate * frame_seconds)
+    frames = _frames(samples.astype(np.float32, copy=False), frame_length)
+    if not len(frames):
+        return np.zeros(0, dtype=bool)
+
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(frame_length), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(frame_length, d=1.0 / sample_rate)
+    band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+
+    total = spectrum.sum(axis=1) + 1e-10
+    band_ratio = spectrum[:, band].sum(axis=1) / total
+    energy_db = 10.0 * np.log10(total)
+    noise_floor_db = np.percentile(energy_db, 10)
+
+    return (energy_db > noise_floor_db + energy_margin_db) & (
+        band_ratio >= min_band_ratio
+    )
+
+
+def detect_speech(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    min_silence: float = 1.0,
+    min_speech: float = 0.25,
+    padding: float = 0.2,
+    frame_seconds: float = FRAME_SECONDS,
+) -> List[Tuple[float, float]]:
+    """
+    Find the regions of a clip that contain speech.
+
+    Gaps shorter than ``min_silence`` are bridged so sentences stay whole, bursts
+    shorter than ``min_speech`` are dropped, and each region is padded so word
+    edges are not clipped.
+
+    Args:
+        samples (np.ndarray): Mono float samples.
+        sample_rate (int): Sample rate of ``samples``.
+        min_silence (float): Shortest non-speech gap, in seconds, that is cut.
+        min_speech (float): Shortest speech burst, in seconds, that is kept.
+        padding (float): Seconds added around each region.
+        frame_seconds (float): Frame duration.
+
+    Returns:
+        list: Sorted, non-overlapping (start, end) times in seconds.
+    """
+    mask = speech_frames(samples, sample_rate, frame_seconds)
+    if not mask.any():
+        return []
+
+    # Rising and falling edges of the speech mask give the raw regions.
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame_seconds
+    ends = np.flatnonzero(edges == -1) * frame_seconds
+
+    duration = len(samples) / sample_rate
+    regions: List[Tuple[float, float]] = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if regions and start - regions[-1][1] < min_silence:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+
+    padded: List[Tuple[float, float]] = []
+    for start, end in regions:
+        if end - start < min_speech:
+            continue
+        start, end = max(0.0, start - padding), min(duration, end + padding)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((start, end))
+    return padded
+
+
+class SpeechMap:
+    """
+    Maps times in a clip made of concatenated speech regions back to the original.
+
+    Attributes:
+        regions (list): (start, end) times of the kept regions in the original.
+        gap (float): Seconds of silence inserted between regions in the clip.
+    """
+
+    def __init__(self, regions: List[Tuple[float, float]], gap: float = 0.0) -> None:
+        """
+        Initialize the SpeechMap.
+
+        Args:
+            regions (list): (start, end) times of the kept regions in the original.
+            gap (float): Seconds of silence inserted between regions in the clip.
+        """
+        self.regions = regions
+        self.gap = gap
+        self._offsets: List[float] = []
+        offset = 0.0
+        for start, end in regions:
+            self._offsets.append(offset)
+            offset += end - start + gap
+
+    @property
+    def speech_seconds(self) -> float:
+        """
+        Total duration of the kept regions.
+
+        Returns:
+            float: Seconds of speech.
+        """
+        return sum(end - start for start, end in self.regions)
+
+    def to_original(self, clip_time: float) -> float:
+        """
+        Convert a time in the concatenated clip to a time in the original audio.
+
+        Args:
+            clip_time (float): Seconds from the start of the clip.
+
+        Returns:
+            float: Seconds from the start of the original audio.
+        """
+        if not self.regions:
+            return clip_time
+        index = max(0, bisect.bisect_right(self._offsets, clip_time) - 1)
+        start, end = self.regions[index]
+        return min(end, start + clip_time - self._offsets[index])
+
+    def concatenate(
+        self, samples: np.ndarray, sample_rate: int = SAMPLE_RATE
+    ) -> np.ndarray:
+        """
+        Build the clip of kept regions, separated by ``gap`` seconds of silence.
+
+        Args:
+            samples (np.ndarray): Original mono samples.
+            sample_rate (int): Sample rate of ``samples``.
+
+        Returns:
+            np.ndarray: Concatenated speech samples.
+        """
+        silence = np.zeros(int(self.gap * sample_rate), dtype=samples.dtype)
+        pieces: List[np.ndarray] = []
+        for start, end in self.regions:
+            if pieces:
+                pieces.append(silence)
+            pieces.append(samples[int(start * sample_rate) : int(end * sample_rate)])
+        if not pieces:
+            return samples[:0]
+        return np.concatenate(pieces)
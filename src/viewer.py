@@ -1,30 +1,173 @@
 import argparse
 import logging
 import os
+import shutil
 import signal
 import subprocess
 import sys
-from typing import Any, List, Tuple, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 from prompt_toolkit import Application
 from prompt_toolkit.application.current import get_app
+from prompt_toolkit.formatted_text import StyleAndTextTuples
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.layout import Layout
 from prompt_toolkit.layout.containers import HSplit, Window
+from prompt_toolkit.layout.controls import FormattedTextControl
 from prompt_toolkit.widgets import Label, TextArea
 
 from firebase.client import FirebaseClient
 from models.cookbook import Cookbook
+from models.library_cache import LibraryCache
 from models.recipe import Recipe
+from models.search_index import SearchIndex, get_search_index
 from models.user import User
 from scraper.recipe_generator import RecipeGenerator
 
 logging.basicConfig(level=logging.INFO)
 
+PAGE_SIZE = 50
+# Start loading the next page once the cursor is this close to unloaded rows.
+PREFETCH_ROWS = 20
+SEARCH_LIMIT = 200
+
+
+class RecipePager:
+    """
+    A list of recipes whose titles are fetched a page at a time.
+
+    The recipe IDs are known up front; titles that were not given are loaded on
+    demand, in the background unless a caller waits for them.
+
+    Attributes:
+        recipe_ids (list): IDs of every recipe in the list.
+        page_size (int): Number of titles fetched per request.
+    """
+
+    def __init__(
+        self,
+        recipe_ids: List[str],
+        fetch_titles: Callable[[List[str]], List[str]],
+        page_size: int = PAGE_SIZE,
+        on_loaded: Optional[Callable[[], None]] = None,
+        titles: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Initialize the RecipePager.
+
+        Args:
+            recipe_ids (list): IDs of every recipe in the list.
+            fetch_titles (callable): Returns the titles of a page of recipe IDs,
+                in order.
+            page_size (int): Number of titles fetched per request.
+            on_loaded (callable, optional): Called after a background page load.
+            titles (list, optional): Titles already known, e.g. from a cache.
+        """
+        self.recipe_ids = recipe_ids
+        self.page_size = page_size
+        self._fetch_titles = fetch_titles
+        self._on_loaded = on_loaded
+        self._titles: List[Optional[str]] = (
+            list(titles) if titles is not None else [None] * len(recipe_ids)
+        )
+        self._pending: Set[int] = set()
+        # Bumped by replace() so loads started for the old rows are dropped.
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def __len__(self) -> int:
+        return len(self.recipe_ids)
+
+    def row(self, index: int) -> Tuple[str, Optional[str]]:
+        """
+        Get a row of the list.
+
+        Args:
+            index (int): Row index.
+
+        Returns:
+            tuple: Recipe ID and title, or None while the title is loading.
+        """
+        return self.recipe_ids[index], self._titles[index]
+
+    def _load_page(self, page: int) -> None:
+        start = page * self.page_size
+        with self._lock:
+            generation = self._generation
+            recipe_ids = self.recipe_ids[start : start + self.page_size]
+        try:
+            titles = self._fetch_titles(recipe_ids)
+        except Exception as e:
+            logging.error(f"Error loading recipe titles: {e}")
+            titles = []
+        with self._lock:
+            if generation != self._generation:
+                return
+            for offset, title in enumerate(titles):
+                self._titles[start + offset] = title
+            self._pending.discard(page)
+
+    def load(self, index: int, wait: bool = False) -> None:
+        """
+        Make sure the page holding a row is loaded or loading.
+
+        Args:
+            index (int): Row index.
+            wait (bool): Whether to load the page in the calling thread.
+        """
+        if not 0 <= index < len(self):
+            return
+        page = index // self.page_size
+        with self._lock:
+            if page in self._pending or self._titles[index] is not None:
+                return
+            self._pending.add(page)
+        if wait:
+            self._load_page(page)
+            return
+
+        def load_in_background() -> None:
+            self._load_page(page)
+            if self._on_loaded is not None:
+                self._on_loaded()
+
+        self._executor.submit(load_in_background)
+
+    def replace(self, recipe_ids: List[str], titles: List[str]) -> None:
+        """
+        Swap in a new list of recipes with known titles.
+
+        Args:
+            recipe_ids (list): IDs of every recipe in the list.
+            titles (list): Their titles, in the same order.
+        """
+        with self._lock:
+            self.recipe_ids = recipe_ids
+            self._titles = list(titles)
+            self._pending.clear()
+            self._generation += 1
+
+    def close(self) -> None:
+        """
+        Stop loading pages.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
 
 class CLI:
-    def __init__(self, firebase_client: FirebaseClient, user_id: str) -> None:
+    def __init__(
+        self,
+        firebase_client: FirebaseClient,
+        user_id: str,
+        library: Optional[LibraryCache] = None,
+        search_index: Optional[SearchIndex] = None,
+    ) -> None:
         self.firebase_client = firebase_client
+        self.library = library
+        self.search_index = search_index
         self.user = User(
             user_id=user_id, name="", email="", firebase_client=firebase_client
         )
@@ -32,49 +175,144 @@ class CLI:
             local=firebase_client.local, firebase_client=firebase_client
         )
         self.recipes = self._list_recipes()
-        self.recipes.append(("exit", "Exit"))
+        self.recipes.load(0, wait=True)
+        # The rows on screen: the whole library, or the results of a search.
+        self.view = self.recipes
         self.selected_index = 0
-        self.text_area = TextArea(text=self._get_recipe_list(), read_only=True)
-        self.layout = Layout(HSplit([Label(text="Select a recipe:"), self.text_area]))
+        self.top_index = 0
+        # Leave room for the search box, the label and the prompt line.
+        self.visible_rows = max(5, shutil.get_terminal_size().lines - 4)
+        self.list_window = Window(
+            FormattedTextControl(self._get_visible_rows),
+            height=lambda: min(self.visible_rows, len(self.view) + 1),
+        )
+        rows: List[Any] = [Label(text="Select a recipe:"), self.list_window]
+        if search_index is not None:
+            self.search_field = TextArea(height=1, prompt="Search: ", multiline=False)
+            self.search_field.buffer.on_text_changed += self._on_search_changed
+            rows.insert(0, self.search_field)
+        self.layout = Layout(HSplit(rows))
         self.app: Application = Application(
             layout=self.layout, key_bindings=self._create_bindings(), full_screen=False
         )
 
-    def _list_recipes(self) -> List[Tuple[str, str]]:
+    def _list_recipes(self) -> RecipePager:
         if self.firebase_client.local:
             recipes_dir = "recipes"
-            return [
-                (os.path.join(recipes_dir, f), f)
-                for f in os.listdir(recipes_dir)
-                if f.endswith(".md")
-            ]
-        else:
-            # List recipes from user's cookbooks
-            recipes = []
-            user_doc = (
-                self.firebase_client.db.collection("users")
-                .document(self.user.user_id)
-                .get()
+            paths = (
+                sorted(
+                    os.path.join(recipes_dir, f)
+                    for f in os.listdir(recipes_dir)
+                    if f.endswith(".md")
+                )
+                if os.path.isdir(recipes_dir)
+                else []
             )
-            user_data = user_doc.to_dict()
-            cookbook_ids = user_data.get("cookbooks", [])
-            for cookbook_id in cookbook_ids:
-                cookbook_doc = (
-                    self.firebase_client.db.collection("cookbooks")
-                    .document(cookbook_id)
-                    .get()
+            return RecipePager(
+                paths,
+                lambda page: [os.path.basename(path) for path in page],
+                on_loaded=self._on_page_loaded,
+            )
+        if self.library is not None:
+            cached = self.library.recipes()
+            if cached:
+                return RecipePager(
+                    [recipe["recipe_id"] for recipe in cached],
+                    self._fetch_titles,
+                    on_loaded=self._on_page_loaded,
+                    titles=[recipe["title"] for recipe in cached],
                 )
-                cookbook_data = cookbook_doc.to_dict()
-                recipe_ids = cookbook_data.get("recipes", [])
-                for recipe_id in recipe_ids:
-                    recipe_doc = (
-                        self.firebase_client.db.collection("recipes")
-                        .document(recipe_id)
-                        .get()
-                    )
-                    recipe = recipe_doc.to_dict()
-                    recipes.append((recipe_id, recipe["title"]))
-            return recipes
+        # List recipes from user's cookbooks, fetching only their titles.
+        return RecipePager(
+            self.user.get_recipe_ids(),
+            self._fetch_titles,
+            on_loaded=self._on_page_loaded,
+        )
+
+    def _fetch_titles(self, recipe_ids: List[str]) -> List[str]:
+        recipes = self.firebase_client.get_documents(
+            "recipes", recipe_ids, field_paths=["title"]
+        )
+        return [(recipe or {}).get("title", "") for recipe in recipes]
+
+    def _fetch_recipes(self, recipe_ids: List[str]) -> Dict[str, Dict]:
+        recipes = self.firebase_client.get_documents("recipes", recipe_ids)
+        return {
+            recipe_id: recipe
+            for recipe_id, recipe in zip(recipe_ids, recipes)
+            if recipe is not None
+        }
+
+    def _index_library(self) -> None:
+        # Without a library cache nothing else fills the search index, so index
+        # the listed recipes it lacks on a background thread.
+        assert self.search_index is not None
+        try:
+            self.search_index.add_missing(
+                list(self.recipes.recipe_ids), self._fetch_recipes
+            )
+        except Exception as e:
+            logging.error(f"Error indexing recipe library: {e}")
+
+    def _on_page_loaded(self) -> None:
+        self.app.invalidate()
+
+    def _call_in_ui(self, func: Callable[[], None]) -> None:
+        # Widget state belongs to the UI thread, so background threads hand
+        # their updates to the application's event loop.
+        loop = self.app.loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(func)
+        except RuntimeError:
+            # The application exited and its loop closed meanwhile.
+            pass
+
+    def _sync_library(self) -> None:
+        # Runs on a background thread while the cached list is on screen.
+        assert self.library is not None
+        try:
+            self.library.sync()
+            cached = self.library.recipes()
+        except Exception as e:
+            logging.error(f"Error syncing recipe library: {e}")
+            return
+        self._call_in_ui(lambda: self._show_library(cached))
+
+    def _show_library(self, cached: List[Dict]) -> None:
+        selected = (
+            self.recipes.row(self.selected_index)[0]
+            if self.selected_index < len(self.recipes)
+            else None
+        )
+        recipe_ids = [recipe["recipe_id"] for recipe in cached]
+        self.recipes.replace(recipe_ids, [recipe["title"] for recipe in cached])
+        if self.view is self.recipes:
+            # Keep the cursor on the same recipe when it is still listed.
+            self._select(
+                recipe_ids.index(selected)
+                if selected in recipe_ids
+                else min(self.selected_index, len(recipe_ids))
+            )
+        self.app.invalidate()
+
+    def _on_search_changed(self, buffer: Any) -> None:
+        assert self.search_index is not None
+        query = buffer.text
+        if not query.strip():
+            self.view = self.recipes
+        else:
+            results = self.search_index.search(
+                query, limit=SEARCH_LIMIT, recipe_ids=self.recipes.recipe_ids
+            )
+            self.view = RecipePager(
+                [result["recipe_id"] for result in results],
+                self._fetch_titles,
+                titles=[result["title"] for result in results],
+            )
+        self.top_index = 0
+        self._select(0)
 
     def _display_recipe(self, recipe_path: str) -> None:
         recipe_content = self.firebase_client.download_string(recipe_path)
@@ -87,22 +325,39 @@ class CLI:
         print("\nExiting...")
         get_app().exit()
 
-    def _get_recipe_list(self) -> str:
-        return "\n".join(
-            [
-                f"{'>' if i == self.selected_index else ' '} {recipe[1]}"
-                for i, recipe in enumerate(self.recipes)
-            ]
-        )
+    def _get_visible_rows(self) -> StyleAndTextTuples:
+        # Only the rows in view are rendered; the last row is "Exit".
+        rows: StyleAndTextTuples = []
+        end = min(self.top_index + self.visible_rows, len(self.view) + 1)
+        for index in range(self.top_index, end):
+            if index == len(self.view):
+                label = "Exit"
+            else:
+                recipe_id, title = self.view.row(index)
+                label = "Loading..." if title is None else title or recipe_id
+            marker = ">" if index == self.selected_index else " "
+            rows.append(("", f"{marker} {label}\n"))
+        return rows
+
+    def _select(self, index: int) -> None:
+        self.selected_index = max(0, min(index, len(self.view)))
+        if self.selected_index < self.top_index:
+            self.top_index = self.selected_index
+        elif self.selected_index >= self.top_index + self.visible_rows:
+            self.top_index = self.selected_index - self.visible_rows + 1
+        self.view.load(self.selected_index)
+        self.view.load(self.selected_index + PREFETCH_ROWS)
 
     def _display_recipe_in_editor(self, recipe_id: str) -> None:
-        recipe_doc = (
-            self.firebase_client.db.collection("recipes").document(recipe_id).get()
-        )
-        if not recipe_doc.exists:
+        if self.firebase_client.local:
+            # Local recipes are listed by the path of their markdown file.
+            subprocess.call([os.getenv("EDITOR", "vi"), recipe_id])
+            return
+        try:
+            recipe_data = self.firebase_client.get_document("recipes", recipe_id)
+        except FileNotFoundError:
             logging.error(f"Recipe with ID {recipe_id} does not exist in Firebase.")
             return
-        recipe_data = recipe_doc.to_dict()
         recipe_path = f"recipes/{recipe_id}.md"
 
         if not os.path.exists(recipe_path):
@@ -126,21 +381,22 @@ class CLI:
         subprocess.call([editor, recipe_path])
 
     def _on_up(self, event: Any) -> None:
-        if self.selected_index > 0:
-            self.selected_index -= 1
-        self.text_area.text = self._get_recipe_list()
+        self._select(self.selected_index - 1)
 
     def _on_down(self, event: Any) -> None:
-        if self.selected_index < len(self.recipes) - 1:
-            self.selected_index += 1
-        self.text_area.text = self._get_recipe_list()
+        self._select(self.selected_index + 1)
+
+    def _on_page_up(self, event: Any) -> None:
+        self._select(self.selected_index - self.visible_rows)
+
+    def _on_page_down(self, event: Any) -> None:
+        self._select(self.selected_index + self.visible_rows)
 
     def _on_enter(self, event: Any) -> None:
-        if self.recipes[self.selected_index] == "Exit":
+        if self.selected_index == len(self.view):
             self.app.exit()
         else:
-            self._display_recipe_in_editor(self.recipes[self.selected_index][0])
-            self.text_area.text = self._get_recipe_list()
+            self._display_recipe_in_editor(self.view.row(self.selected_index)[0])
             self.app.invalidate()
             get_app().invalidate()
 
@@ -148,6 +404,8 @@ class CLI:
         bindings = KeyBindings()
         bindings.add("up")(self._on_up)
         bindings.add("down")(self._on_down)
+        bindings.add("pageup")(self._on_page_up)
+        bindings.add("pagedown")(self._on_page_down)
         bindings.add("enter")(self._on_enter)
         bindings.add("c-c")(self._exit_app)
         return bindings
@@ -155,10 +413,20 @@ class CLI:
     def _exit_app(self, event: Any) -> None:
         self.app.exit()
 
+    def _start_background_work(self) -> None:
+        # Called once the application's event loop is running.
+        if self.library is not None:
+            threading.Thread(target=self._sync_library, daemon=True).start()
+        elif self.search_index is not None:
+            threading.Thread(target=self._index_library, daemon=True).start()
+
     def run(self) -> None:
         self._clear_screen()
         signal.signal(signal.SIGINT, self._handle_sigint)
-        self.app.run()
+        try:
+            self.app.run(pre_run=self._start_background_work)
+        finally:
+            self.recipes.close()
 
 
 def main() -> None:
@@ -172,6 +440,12 @@ def main() -> None:
         default=False,
         help="Use local storage instead of Firebase",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="Read the library from Firebase instead of the local metadata cache",
+    )
     args = parser.parse_args()
 
     firebase_client = FirebaseClient(local=args.local)
@@ -179,11 +453,20 @@ def main() -> None:
     # Prompt for user ID
     user_id = input("Enter your user ID: ")
 
-    cli = CLI(firebase_client, user_id)
+    search_index = None if args.local else get_search_index()
+    library = (
+        None
+        if args.local or args.no_cache
+        else LibraryCache(firebase_client, user_id, search_index=search_index)
+    )
+    cli = CLI(firebase_client, user_id, library, search_index)
     try:
         cli.run()
     except Exception as e:
         logging.error(f"An error occurred: {e}")
+    finally:
+        if library is not None:
+            library.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+import json
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+from backfill import backfill
+from firebase.client import FirebaseClient
+from firebase.store import SQLiteDocumentStore
+from models.cookbook import Cookbook
+from scraper.batch import BatchBackend, LocalBatchBackend, run_batch
+from scraper.recipe_classifier import RecipeScorer
+from scraper.recipe_generator import RecipeGenerator
+
+RECIPE = {
+    "title": "Garlic Butter Pasta",
+    "ingredients": ["200 g pasta", "2 tbsp butter", "3 cloves garlic"],
+    "instructions": ["Boil the pasta.", "Toss with garlic butter."],
+    "categories": ["pasta"],
+}
+TRANSCRIPT = (
+    "Boil 200 grams of pasta. Melt 2 tablespoons of butter in a pan, add 3 "
+    "cloves of garlic, stir and season with salt and pepper."
+)
+
+
+def respond(body: Dict) -> str:
+    prompt = body["messages"][-1]["content"]
+    return "Likelihood: 95%" if "Likelihood" in prompt else json.dumps(RECIPE)
+
+
+def test_batch_backend_is_abstract() -> None:
+    with pytest.raises(TypeError):
+        BatchBackend()  # type: ignore[abstract]
+
+
+def test_run_batch_with_local_backend(tmp_path: Path) -> None:
+    requests = {
+        name: {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": text}]}
+        for name, text in {"classify": "Likelihood: X%", "recipe": "JSON"}.items()
+    }
+    responses = run_batch(
+        LocalBatchBackend(respond), requests, batch_dir=str(tmp_path), poll_interval=0
+    )
+    assert responses == {"classify": "Likelihood: 95%", "recipe": json.dumps(RECIPE)}
+    assert len(list(tmp_path.glob("*.results.jsonl"))) == 1
+
+
+def test_backfill_skips_posts_with_recipes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    client = FirebaseClient(local=True, store=SQLiteDocumentStore(":memory:"))
+    for shortcode in ("done", "new"):
+        client.set_document("transcripts", shortcode, {"transcript": TRANSCRIPT})
+    client.set_document("shortcode_index", "someone", {"recipes": {"done": "r1"}})
+    generator = RecipeGenerator(
+        local=True, firebase_client=client, scorer=RecipeScorer()
+    )
+    cookbook = Cookbook(
+        cookbook_id="c1", name="", description="", firebase_client=client
+    )
+
+    created = backfill(
+        client,
+        generator,
+        cookbook,
+        LocalBatchBackend(respond),
+        batch_dir=str(tmp_path),
+        poll_interval=0,
+    )
+
+    assert created == 1
+    recipes = client.list_documents("recipes").values()
+    assert [recipe["shortcode"] for recipe in recipes] == ["new"]
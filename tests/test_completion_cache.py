@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+from typing import Iterator, List
+
+import pytest
+
+from scraper import completion_cache
+from scraper.completion_cache import CompletionCache
+
+MESSAGES = [{"role": "user", "content": "Is this a recipe?"}]
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Iterator[List[float]]:
+    """
+    Replace the cache's clock with one the test moves by hand.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(completion_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    yield now
+
+
+def test_make_key_is_stable_and_covers_every_input() -> None:
+    key = CompletionCache.make_key("gpt", MESSAGES, temperature=0.0, max_tokens=10)
+    assert key == CompletionCache.make_key(
+        "gpt",
+        [dict(reversed(list(MESSAGES[0].items())))],
+        max_tokens=10,
+        temperature=0.0,
+    )
+    # Keys are stored on disk, so they must not change between versions.
+    assert key == "9b0b6d6e50519f3a915092eeef803e499fe4a1e9ae18b0002927623593d9b692"
+    assert key != CompletionCache.make_key("gpt", MESSAGES, temperature=0.0)
+    assert key != CompletionCache.make_key(
+        "other", MESSAGES, temperature=0.0, max_tokens=10
+    )
+    assert key != CompletionCache.make_key(
+        "gpt",
+        [{"role": "user", "content": "Is this a recipe!"}],
+        temperature=0.0,
+        max_tokens=10,
+    )
+
+
+def test_evicts_least_recently_used(clock: List[float]) -> None:
+    cache = CompletionCache(":memory:", max_entries=2)
+    cache.put("a", "A")
+    clock[0] += 1
+    cache.put("b", "B")
+    clock[0] += 1
+    # Reading "a" makes "b" the least recently used entry.
+    assert cache.get("a") == "A"
+    clock[0] += 1
+    cache.put("c", "C")
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+    assert cache.stats() == {"hits": 3, "misses": 1, "entries": 2}
+
+
+def test_expires_entries_after_ttl(clock: List[float]) -> None:
+    cache = CompletionCache(":memory:", ttl=60.0)
+    cache.put("a", "A")
+    clock[0] += 30
+    # Reading an entry does not extend its lifetime.
+    assert cache.get("a") == "A"
+    clock[0] += 31
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_delete_removes_entry() -> None:
+    cache = CompletionCache(":memory:")
+    cache.put("a", "A")
+    cache.delete("a")
+    assert cache.get("a") is None
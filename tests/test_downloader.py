@@ -0,0 +1,157 @@
+import re
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("instaloader")
+
+from scraper import downloader as downloader_module  # noqa: E402
+from scraper.downloader import InstagramDownloader  # noqa: E402
+
+# Larger than a download chunk, so a dropped transfer leaves bytes to resume.
+VIDEO = bytes(range(256)) * 4096
+
+
+class VideoServer:
+    """
+    Serves VIDEO over HTTP, optionally ignoring Range headers or dropping the
+    connection partway through the first response.
+
+    Attributes:
+        ranges (bool): Whether Range headers are honoured and advertised.
+        drop_after (int, optional): Bytes sent before the first GET is cut off.
+        requests (list): Range header of every GET, or None when there was none.
+    """
+
+    def __init__(self, ranges: bool = True, drop_after: Optional[int] = None) -> None:
+        self.ranges = ranges
+        self.drop_after = drop_after
+        self.requests: List[Optional[str]] = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_HEAD(self) -> None:
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(VIDEO)))
+                if server.ranges:
+                    self.send_header("Accept-Ranges", "bytes")
+                self.end_headers()
+
+            def do_GET(self) -> None:
+                header = self.headers.get("Range")
+                with server._lock:
+                    server.requests.append(header)
+                    first = len(server.requests) == 1
+                match = re.match(r"bytes=(\d+)-(\d*)", header or "")
+                if server.ranges and match:
+                    start = int(match.group(1))
+                    end = int(match.group(2) or len(VIDEO) - 1)
+                    body = VIDEO[start : end + 1]
+                    self.send_response(206)
+                    self.send_header(
+                        "Content-Range", f"bytes {start}-{end}/{len(VIDEO)}"
+                    )
+                else:
+                    body = VIDEO
+                    self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if first and server.drop_after is not None:
+                    self.wfile.write(body[: server.drop_after])
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/video.mp4"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def downloader() -> Iterator[InstagramDownloader]:
+    yield InstagramDownloader(local=True, segments=4)
+
+
+@contextmanager
+def serve(**options: Any) -> Iterator[VideoServer]:
+    server = VideoServer(**options)
+    try:
+        yield server
+    finally:
+        server.close()
+
+
+def test_resumes_from_existing_part_file(
+    downloader: InstagramDownloader, tmp_path: Path
+) -> None:
+    output = tmp_path / "video.mp4"
+    Path(f"{output}.part").write_bytes(VIDEO[:1000])
+    with serve() as server:
+        downloader._download_video(server.url, str(output))
+        assert server.requests == ["bytes=1000-"]
+    assert output.read_bytes() == VIDEO
+    assert not Path(f"{output}.part").exists()
+
+
+def test_resumes_after_dropped_connection(
+    downloader: InstagramDownloader, tmp_path: Path
+) -> None:
+    output = tmp_path / "video.mp4"
+    with serve(drop_after=600000) as server:
+        downloader._download_video(server.url, str(output))
+        assert len(server.requests) == 2
+        assert server.requests[0] is None
+        match = re.match(r"bytes=(\d+)-$", server.requests[1] or "")
+        assert match and 0 < int(match.group(1)) <= 600000
+    assert output.read_bytes() == VIDEO
+
+
+def test_merges_segments_of_large_video(
+    downloader: InstagramDownloader, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(downloader_module, "SEGMENT_THRESHOLD", 1000)
+    output = tmp_path / "video.mp4"
+    with serve() as server:
+        downloader._download_video(server.url, str(output))
+        quarter = len(VIDEO) // 4
+        assert sorted(server.requests) == [  # type: ignore[type-var]
+            f"bytes={index * quarter}-{(index + 1) * quarter - 1}" for index in range(4)
+        ]
+    assert output.read_bytes() == VIDEO
+    assert list(tmp_path.iterdir()) == [output]
+
+
+def test_server_ignoring_range_gets_whole_file(
+    downloader: InstagramDownloader, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(downloader_module, "SEGMENT_THRESHOLD", 1000)
+    output = tmp_path / "video.mp4"
+    # A stale part file must be overwritten, not appended to.
+    Path(f"{output}.part").write_bytes(VIDEO[:1000])
+    with serve(ranges=False) as server:
+        downloader._download_video(server.url, str(output))
+        assert server.requests == ["bytes=1000-"]
+    assert output.read_bytes() == VIDEO
+
+
+def test_oversized_parts_are_removed(tmp_path: Path) -> None:
+    part = tmp_path / "video.mp4.part"
+    part.write_bytes(VIDEO + b"extra")
+    with pytest.raises(IOError):
+        InstagramDownloader._join_parts(
+            [str(part)], str(tmp_path / "video.mp4"), len(VIDEO)
+        )
+    assert not part.exists()
@@ -0,0 +1,65 @@
+from typing import Iterator, List
+
+import numpy as np
+
+from firebase.client import FirebaseClient
+from firebase.store import SQLiteDocumentStore
+from scraper.audio import SAMPLE_RATE
+from scraper.fingerprint import FingerprintIndex, fingerprint_pcm
+
+
+def melody(seed: int, seconds: float = 20.0) -> np.ndarray:
+    """
+    Build a tune of random chords over quiet noise.
+    """
+    rng = np.random.default_rng(seed)
+    note = int(0.25 * SAMPLE_RATE)
+    t = np.arange(note) / SAMPLE_RATE
+    notes = []
+    for _ in range(int(seconds / 0.25)):
+        chord = sum(
+            np.sin(2 * np.pi * freq * t) for freq in rng.uniform(150.0, 3000.0, 3)
+        )
+        notes.append(chord * np.hanning(note))
+    signal = np.concatenate(notes) / 3.0
+    return signal + rng.normal(0.0, 0.01, len(signal))
+
+
+def pcm_chunks(samples: np.ndarray, chunk_size: int = 4096) -> Iterator[bytes]:
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    for start in range(0, len(pcm), chunk_size):
+        yield pcm[start : start + chunk_size]
+
+
+def fingerprint(samples: np.ndarray) -> List[int]:
+    return fingerprint_pcm(pcm_chunks(samples))
+
+
+def make_index(**fingerprints: List[int]) -> FingerprintIndex:
+    client = FirebaseClient(local=True, store=SQLiteDocumentStore(":memory:"))
+    index = FingerprintIndex(client)
+    for shortcode, hashes in fingerprints.items():
+        index.add(shortcode, hashes)
+    return index
+
+
+def test_fingerprint_is_stable_across_chunk_sizes() -> None:
+    samples = melody(1)
+    assert fingerprint_pcm(pcm_chunks(samples, 4096)) == fingerprint_pcm(
+        pcm_chunks(samples, 1000)
+    )
+
+
+def test_trimmed_and_quieter_copy_matches() -> None:
+    original = melody(1)
+    index = make_index(ORIGINAL=fingerprint(original), OTHER=fingerprint(melody(2)))
+
+    trimmed = original[int(3.3 * SAMPLE_RATE) : int(17.1 * SAMPLE_RATE)]
+    assert index.find_match(fingerprint(trimmed)) == "ORIGINAL"
+    assert index.find_match(fingerprint(original * 0.3)) == "ORIGINAL"
+
+
+def test_unrelated_audio_does_not_match() -> None:
+    index = make_index(ORIGINAL=fingerprint(melody(1)))
+    assert index.find_match(fingerprint(melody(3))) is None
+    assert index.find_match([]) is None
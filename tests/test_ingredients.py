@@ -0,0 +1,59 @@
+import pytest
+
+from models.ingredient_index import IngredientIndex
+from models.ingredients import normalize_ingredient, normalize_ingredients
+
+
+@pytest.mark.parametrize(
+    "line, names",
+    [
+        ("3 cloves garlic, minced", ["garlic"]),
+        ("2 large Tomatoes, diced", ["tomato"]),
+        ("1 cup cherry tomatoes (halved)", ["cherry tomato"]),
+        ("Salt and pepper to taste", ["salt", "pepper"]),
+        ("salt & pepper", ["salt", "pepper"]),
+        ("2 tbsp butter or margarine", ["butter"]),
+        ("1 tsp ground cloves", ["clove"]),
+        ("2 bay leaves", ["bay leaf"]),
+        ("4 lemon halves", ["lemon half"]),
+        ("1 cup olives", ["olive"]),
+        ("1 cup half and half", ["half and half"]),
+        ("1/2 cup half & half", ["half and half"]),
+        ("2 tbsp hot sauce", ["hot sauce"]),
+        ("1 cup jalapeño slices", ["jalapeno"]),
+        ("to taste", []),
+    ],
+)
+def test_normalize_ingredient(line: str, names: list) -> None:
+    assert normalize_ingredient(line) == names
+
+
+def test_normalize_ingredients_deduplicates() -> None:
+    lines = ["1 onion, chopped", "2 onions", "salt and pepper", "pinch of salt"]
+    assert normalize_ingredients(lines) == ["onion", "salt", "pepper"]
+
+
+def make_index() -> IngredientIndex:
+    return IngredientIndex.from_recipes(
+        [
+            {"recipe_id": "fajitas", "canonical_ingredients": ["chicken breast"]},
+            {"recipe_id": "stir-fry", "canonical_ingredients": ["red bell pepper"]},
+            {"recipe_id": "soup", "canonical_ingredients": ["chicken", "pepper"]},
+            {"recipe_id": "toast", "canonical_ingredients": ["bread"]},
+        ]
+    )
+
+
+def test_query_matches_names_containing_its_words() -> None:
+    index = make_index()
+    assert index.contains_any(["chicken"]) == ["fajitas", "soup"]
+    assert index.contains_any(["pepper"]) == ["stir-fry", "soup"]
+    assert index.contains_all(["chicken", "pepper"]) == ["soup"]
+    assert index.contains_all(["chicken", "rice"]) == []
+    # "bell" is part of a name but "bell chicken" is not.
+    assert index.contains_any(["bell chicken"]) == []
+
+
+def test_missing_at_most_counts_matched_ingredients() -> None:
+    matches = make_index().missing_at_most(["chicken", "peppers"])
+    assert matches == [("fajitas", 0), ("stir-fry", 0), ("soup", 0)]
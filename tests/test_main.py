@@ -0,0 +1,87 @@
+import importlib
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+
+pytest.importorskip("instaloader")
+pytest.importorskip("openai")
+
+from src.firebase.client import FirebaseClient  # noqa: E402
+from src.firebase.store import SQLiteDocumentStore  # noqa: E402
+from src.models.cookbook import Cookbook  # noqa: E402
+from src.models.recipe import Recipe  # noqa: E402
+from src.models.user import User  # noqa: E402
+
+# src exports the main() function under the same name as the module.
+recipe_main = importlib.import_module("src.main")
+
+
+class FakeGenerator:
+    def __init__(self, firebase_client: FirebaseClient) -> None:
+        self.firebase_client = firebase_client
+
+    async def agenerate_recipe(
+        self,
+        transcript: str,
+        caption: str,
+        firebase_client: FirebaseClient,
+        shortcode: str,
+        likelihood: Optional[int] = None,
+    ) -> Recipe:
+        return Recipe(
+            f"recipe_{shortcode}",
+            "Pasta",
+            ["pasta"],
+            ["Boil the pasta."],
+            ["pasta"],
+            shortcode=shortcode,
+            firebase_client=self.firebase_client,
+        )
+
+
+def test_failing_stage_commits_none_of_the_post_writes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    store = SQLiteDocumentStore(":memory:")
+    client = FirebaseClient(local=True, store=store)
+    user = User("u1", "Ada", "ada@example.com", client)
+    cookbook = Cookbook("c1", "Dinners", "", client)
+    with client.batch() as batch:
+        user.save(batch)
+        user.create_cookbook(cookbook, batch)
+    # Audio and transcript are already stored, so no stage needs the network.
+    audio_path = str(tmp_path / "POST1.mp3")
+    open(audio_path, "wb").close()
+    store.apply(
+        [
+            ("set", "audio_metadata", "POST1.mp3", {"caption": "Pasta"}),
+            ("set", "transcripts", "POST1", {"transcript": "Boil pasta."}),
+        ]
+    )
+
+    def fail_link(recipe_id: str, batch: Any) -> None:
+        raise RuntimeError("link failed")
+
+    # The recipe write is queued before the cookbook link fails.
+    monkeypatch.setattr(cookbook, "link_recipe", fail_link)
+    pipeline = recipe_main.build_pipeline(
+        None,  # type: ignore[arg-type]
+        user,
+        cookbook,
+        FakeGenerator(client),  # type: ignore[arg-type]
+        client,
+        None,  # type: ignore[arg-type]
+        local=True,
+        duplicate_threshold=None,
+    )
+    job = recipe_main.PostJob("url", "POST1", client.batch(), audio_path)
+
+    assert pipeline.run([job]) == []
+    assert pipeline.stages[-1].stats.failed == 1
+    assert len(job.batch) == 0
+    assert store.get("recipes", ["recipe_POST1"]) == {}
+    assert store.get("cookbooks", ["c1"])["c1"]["recipes"] == []
+    assert os.path.exists(audio_path)
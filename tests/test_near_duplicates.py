@@ -0,0 +1,30 @@
+from firebase.client import FirebaseClient
+from firebase.store import SQLiteDocumentStore
+from scraper.near_duplicates import NearDuplicateIndex, minhash_signature, post_text
+
+TRANSCRIPT = (
+    "Here is my morning routine with ten minutes of stretching, then squats, "
+    "lunges and a quick dance to my favourite song before heading to the gym."
+)
+
+
+def test_repost_reuses_stored_classification() -> None:
+    client = FirebaseClient(local=True, store=SQLiteDocumentStore(":memory:"))
+    index = NearDuplicateIndex(client)
+    index.add("original", minhash_signature(post_text(TRANSCRIPT, "#fyp")))
+    index.set_likelihood("original", 5)
+
+    # A fresh index reads the classification back from the store.
+    repost = minhash_signature(post_text(TRANSCRIPT, "#fyp #repost"))
+    assert NearDuplicateIndex(client).find_match(repost) == ("original", None, 5)
+
+
+def test_unclassified_posts_are_not_matches() -> None:
+    client = FirebaseClient(local=True, store=SQLiteDocumentStore(":memory:"))
+    index = NearDuplicateIndex(client)
+    signature = minhash_signature(post_text(TRANSCRIPT, ""))
+    index.add("original", signature)
+    assert index.find_match(signature) is None
+
+    index.set_recipe("original", "r1")
+    assert index.find_match(signature) == ("original", "r1", None)
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from typing import Any, Iterator
+
+import pytest
+
+from scraper.openai_client import AsyncOpenAIClient, TokenBucket
+
+MESSAGES = [{"role": "user", "content": "Response format: 'Likelihood: X%'"}]
+
+
+@pytest.fixture
+def server() -> Iterator[Any]:
+    pytest.importorskip("openai")
+    fakes = pytest.importorskip("benchmarks.fakes")
+    with fakes.FakeOpenAIServer(latency=0.0) as server:
+        yield server
+
+
+def chat(server: Any, **options: float) -> str:
+    async def run() -> str:
+        async with AsyncOpenAIClient(
+            api_key="test", base_url=server.base_url, **options
+        ) as client:
+            return await client.chat("gpt-4o-mini", MESSAGES)
+
+    return asyncio.run(run())
+
+
+def test_retries_rate_limited_requests(server: Any) -> None:
+    server.fail_first = 2
+    assert chat(server, base_delay=0.01) == "Likelihood: 95%"
+    assert server.requests == 3
+
+
+def test_gives_up_after_max_retries(server: Any) -> None:
+    import openai
+
+    server.fail_first = 10
+    with pytest.raises(openai.RateLimitError):
+        chat(server, max_retries=2, base_delay=0.01)
+    assert server.requests == 3
+
+
+def test_waits_for_retry_after(server: Any) -> None:
+    server.fail_first = 1
+    server.retry_after = "0.5"
+    start = time.monotonic()
+    chat(server, base_delay=0.0)
+    assert time.monotonic() - start >= 0.5
+
+
+def test_caps_retry_after_at_max_delay(server: Any) -> None:
+    server.fail_first = 1
+    server.retry_after = "30"
+    start = time.monotonic()
+    chat(server, max_delay=0.1)
+    assert time.monotonic() - start < 5
+
+
+def test_request_bucket_spaces_out_requests(server: Any) -> None:
+    async def run() -> None:
+        async with AsyncOpenAIClient(
+            api_key="test", base_url=server.base_url
+        ) as client:
+            client._requests = TokenBucket(600, capacity=1)
+            await asyncio.gather(
+                *(client.chat("gpt-4o-mini", MESSAGES) for _ in range(4))
+            )
+
+    start = time.monotonic()
+    asyncio.run(run())
+    # One request bursts through; the other three wait 0.1s each for a token.
+    assert time.monotonic() - start >= 0.3
+    assert server.requests == 4
+
+
+def test_token_bucket_refills_at_rate() -> None:
+    async def run() -> float:
+        bucket = TokenBucket(rate_per_minute=1200, capacity=2)
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # Two tokens are available at once; the next two take 0.05s each.
+    assert asyncio.run(run()) >= 0.1
+
+
+def test_token_bucket_clamps_oversized_requests() -> None:
+    async def run() -> float:
+        bucket = TokenBucket(rate_per_minute=60, capacity=5)
+        start = time.monotonic()
+        await bucket.acquire(100)
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) < 0.5
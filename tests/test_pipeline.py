@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional
+
+from pipeline import Pipeline, Stage
+
+
+def test_items_pass_through_stages_in_order() -> None:
+    pipeline = Pipeline(
+        [Stage("double", lambda item: item * 2), Stage("inc", lambda item: item + 1)],
+        queue_size=2,
+    )
+    assert pipeline.run(range(20)) == [item * 2 + 1 for item in range(20)]
+    for stage in pipeline.stages:
+        assert stage.stats.processed == 20
+        assert stage.stats.completed == 20
+
+
+def test_bounded_queues_hold_back_the_input() -> None:
+    pulled = 0
+    finished = 0
+    ahead: List[int] = []
+
+    def items() -> Iterator[int]:
+        nonlocal pulled
+        for item in range(50):
+            pulled += 1
+            ahead.append(pulled - finished)
+            yield item
+
+    async def slow(item: int) -> int:
+        nonlocal finished
+        await asyncio.sleep(0.001)
+        finished += 1
+        return item
+
+    pipeline = Pipeline(
+        [Stage("fast", lambda item: item), Stage("slow", slow)], queue_size=2
+    )
+    assert pipeline.run(items()) == list(range(50))
+    # Two queues of two items, one item in each stage and one being fed.
+    assert max(ahead) <= 2 * (2 + 1) + 1
+
+
+def test_stage_counts_and_finalize_once_per_item() -> None:
+    finalized: List[Any] = []
+    errors: Dict[int, Optional[Exception]] = {}
+    lock = threading.Lock()
+
+    def skip_odd(item: int) -> Optional[int]:
+        return None if item % 2 else item
+
+    async def fail_on_four(item: int) -> int:
+        if item % 4 == 0:
+            raise ValueError(f"bad item {item}")
+        return item
+
+    def finalize(item: int, error: Optional[Exception]) -> None:
+        with lock:
+            finalized.append(item)
+            errors[item] = error
+
+    pipeline = Pipeline(
+        [
+            Stage("skip", skip_odd, concurrency=3),
+            Stage("fail", fail_on_four, concurrency=2),
+            Stage("keep", lambda item: item),
+        ],
+        queue_size=1,
+        finalize=finalize,
+    )
+    results = pipeline.run(range(16))
+
+    assert sorted(results) == [2, 6, 10, 14]
+    assert Counter(finalized) == Counter(range(16))
+    assert all(isinstance(errors[item], ValueError) for item in (0, 4, 8, 12))
+    assert all(errors[item] is None for item in range(16) if item % 4)
+    skip, fail, keep = (stage.stats for stage in pipeline.stages)
+    assert (skip.processed, skip.skipped, skip.failed) == (8, 8, 0)
+    assert (fail.processed, fail.skipped, fail.failed) == (4, 0, 4)
+    assert (keep.processed, keep.skipped, keep.failed) == (4, 0, 0)
+    assert "fail" in pipeline.report()
+
+
+def test_finalize_failure_does_not_stop_the_pipeline() -> None:
+    def finalize(item: int, error: Optional[Exception]) -> None:
+        raise RuntimeError("commit failed")
+
+    pipeline = Pipeline([Stage("sleep", time.sleep)], finalize=finalize)
+    assert pipeline.run([0.0, 0.0]) == []
+    assert pipeline.stages[0].stats.skipped == 2
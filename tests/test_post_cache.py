@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from scraper import post_cache
+from scraper.post_cache import PostMetadataCache, url_expiry
+
+NOW = 1_700_000_000.0
+
+
+def video_url(expires_at: float) -> str:
+    return f"https://cdn.example.com/v.mp4?oh=abc&oe={int(expires_at):X}&_nc_ht=x"
+
+
+def post(url: str = "https://cdn.example.com/v.mp4") -> dict:
+    return {"caption": "Pasta", "video_url": url, "owner": "chef", "duration": 30.0}
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    now = [NOW]
+    monkeypatch.setattr(post_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_url_expiry_reads_hex_oe_parameter() -> None:
+    assert url_expiry(video_url(NOW)) == NOW
+    assert url_expiry("https://cdn.example.com/v.mp4?oe=zz") is None
+    assert url_expiry("https://cdn.example.com/v.mp4") is None
+    assert url_expiry(None) is None
+
+
+def test_entries_expire_after_ttl(clock: List[float]) -> None:
+    cache = PostMetadataCache(":memory:", ttl=3600.0)
+    cache.put("ABC", post())
+    clock[0] += 3599
+    cached = cache.get("ABC")
+    assert cached is not None
+    assert cached["caption"] == "Pasta"
+    assert cached["fetched_at"] == NOW
+    clock[0] += 2
+    assert cache.get("ABC") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_with_their_video_url(clock: List[float]) -> None:
+    cache = PostMetadataCache(":memory:", ttl=None)
+    cache.put("ABC", post(video_url(NOW + 600)))
+    cache.put("OLD", post())
+    clock[0] += 599
+    assert cache.get("ABC") is not None
+    clock[0] += 1
+    assert cache.get("ABC") is None
+    # Without a TTL or an expiring URL an entry is kept.
+    clock[0] += 365 * 86400
+    assert cache.get("OLD") is not None
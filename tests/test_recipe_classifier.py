@@ -0,0 +1,22 @@
+from scraper.recipe_classifier import RecipeScorer
+
+
+def test_rejects_post_without_food_quantities_or_verbs() -> None:
+    scorer = RecipeScorer()
+    assert scorer.score("yeah yeah oh baby", "#fyp") == 0.0
+    assert scorer.classify("yeah yeah oh baby", "#fyp") == 0
+    assert scorer.stats()["rejected"] == 1
+
+
+def test_articles_are_not_quantities() -> None:
+    features = RecipeScorer.features("a day with one friend at a gym", "")
+    assert features["quantity_units"] == 0.0
+    assert RecipeScorer().classify("a day with one friend at a gym", "") == 0
+
+
+def test_accepts_clear_recipe() -> None:
+    transcript = (
+        "Preheat the oven. Mix 2 cups flour with 1 tsp salt and 3 tbsp butter, "
+        "then whisk in 2 eggs and bake until golden."
+    )
+    assert RecipeScorer().classify(transcript, "Easy bread recipe") == 100
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from firebase.client import FirebaseClient
+from firebase.store import SQLiteDocumentStore
+from models import search_index
+from models.library_cache import LibraryCache
+from models.recipe import Recipe
+from models.search_index import SearchIndex
+
+
+def make_client() -> FirebaseClient:
+    store = SQLiteDocumentStore(":memory:")
+    # Written well before the first sync, so later syncs do not refetch them.
+    written = time.time() - 3600
+    store.apply(
+        [
+            ("set", "users", "u1", {"cookbooks": ["c1"]}),
+            ("set", "cookbooks", "c1", {"name": "", "recipes": ["r1", "r2"]}),
+            ("set", "recipes", "r1", {"title": "Garlic Pasta", "updated_at": written}),
+            ("set", "recipes", "r2", {"title": "Tomato Soup", "updated_at": written}),
+        ]
+    )
+    return FirebaseClient(local=True, store=store)
+
+
+def test_add_many_weights_fields() -> None:
+    index = SearchIndex(":memory:")
+    index.add_many(
+        {
+            "r1": {"title": "Garlic Pasta", "ingredients": ["pasta"]},
+            "r2": {"title": "Soup", "instructions": ["Add garlic."]},
+        }
+    )
+    assert [result["recipe_id"] for result in index.search("garl")] == ["r1", "r2"]
+    assert index.missing(["r2", "r3", "r1"]) == ["r3"]
+
+
+def test_sync_fills_new_index_with_whole_library() -> None:
+    client = make_client()
+    library = LibraryCache(client, "u1", path=":memory:")
+    library.sync()
+
+    # A later sync fetches nothing new, but the new index still lacks both.
+    library.search_index = SearchIndex(":memory:")
+    assert library.sync() == 0
+    assert len(library.search_index) == 2
+    assert library.search_index.search("soup")[0]["recipe_id"] == "r2"
+
+
+def test_search_keeps_stopword_prefix_being_typed() -> None:
+    index = SearchIndex(":memory:")
+    index.add_many({"r1": {"title": "Tomato Salad"}, "r2": {"title": "Onion Rings"}})
+    for prefix in ("t", "to", "tom"):
+        assert [result["recipe_id"] for result in index.search(prefix)] == ["r1"]
+    assert [result["recipe_id"] for result in index.search("on")] == ["r2"]
+    # A finished stopword is skipped like in indexed text.
+    assert [result["recipe_id"] for result in index.search("salad to ")] == ["r1"]
+    assert [result["recipe_id"] for result in index.search("to salad")] == ["r1"]
+
+
+def test_recipe_is_indexed_only_once_its_batch_commits(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    index = SearchIndex(":memory:")
+    monkeypatch.setattr(search_index, "_search_index", index)
+    client = FirebaseClient(local=True, store=SQLiteDocumentStore(":memory:"))
+    pasta = Recipe("r1", "Garlic Pasta", [], [], [], firebase_client=client)
+    soup = Recipe("r2", "Tomato Soup", [], [], [], firebase_client=client)
+
+    with pytest.raises(RuntimeError):
+        with client.batch() as batch:
+            pasta.save(batch)
+            raise RuntimeError("persist failed")
+    assert index.search("garlic") == []
+
+    with client.batch() as batch:
+        soup.save(batch)
+        assert index.search("soup") == []
+    assert index.search("soup")[0]["recipe_id"] == "r2"
+    soup.title = "Onion Soup"
+    soup.save()
+    assert index.search("onion")[0]["recipe_id"] == "r2"
@@ -0,0 +1,107 @@
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pytest
+
+from firebase.client import FirebaseClient
+from firebase.store import (
+    FirestoreDocumentStore,
+    SQLiteDocumentStore,
+    migrate_local_tree,
+)
+from models.user import User
+
+
+def write_legacy(root: Path, relative_path: str, data: Dict) -> None:
+    # The original local mode wrote each document as str() of a dict.
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(str(data))
+
+
+class FakeFirestoreBatch:
+    def __init__(self, commits: List[List[Tuple]]) -> None:
+        self.commits = commits
+        self.writes: List[Tuple] = []
+
+    def set(self, ref: Tuple, data: Dict, merge: bool = False) -> None:
+        self.writes.append((ref, data, merge))
+
+    def commit(self) -> None:
+        self.commits.append(self.writes)
+
+
+class FakeFirestore:
+    """
+    Records the batched writes sent to Firestore, one list per committed batch.
+    """
+
+    def __init__(self) -> None:
+        self.commits: List[List[Tuple]] = []
+        self._collection = ""
+
+    def batch(self) -> FakeFirestoreBatch:
+        return FakeFirestoreBatch(self.commits)
+
+    def collection(self, name: str) -> "FakeFirestore":
+        self._collection = name
+        return self
+
+    def document(self, document_id: str) -> Tuple[str, str]:
+        return (self._collection, document_id)
+
+
+def test_write_batch_commits_firestore_writes_in_chunks_of_500() -> None:
+    db = FakeFirestore()
+    client = FirebaseClient(local=True, store=FirestoreDocumentStore(db))  # type: ignore[arg-type]
+    with client.batch() as batch:
+        for index in range(1201):
+            batch.set("recipes", f"r{index}", {"title": str(index)})
+        batch.update("users", "u1", {"name": "Ada"})
+
+    assert [len(writes) for writes in db.commits] == [500, 500, 202]
+    assert db.commits[0][0] == (("recipes", "r0"), {"title": "0"}, False)
+    assert db.commits[-1][-1] == (("users", "u1"), {"name": "Ada"}, True)
+    assert len(batch) == 0
+
+
+def test_write_batch_discards_writes_on_error() -> None:
+    store = SQLiteDocumentStore(":memory:")
+    client = FirebaseClient(local=True, store=store)
+    with pytest.raises(RuntimeError):
+        with client.batch() as batch:
+            batch.set("recipes", "r1", {"title": "Pasta"})
+            raise RuntimeError("persist failed")
+    assert len(batch) == 0
+    assert store.get("recipes", ["r1"]) == {}
+
+
+def test_migrate_baseline_tree(tmp_path: Path) -> None:
+    write_legacy(
+        tmp_path,
+        "users/u1.json",
+        {"name": "Ada", "email": "ada@example.com", "cookbooks": []},
+    )
+    write_legacy(
+        tmp_path,
+        "users/u1/cookbooks/c1.json",
+        {"name": "Dinners", "description": "", "recipes": ["r1"]},
+    )
+    write_legacy(tmp_path, "cookbooks/c1.json", {"name": "", "recipes": ["r2"]})
+    for recipe_id, title in (("r1", "Pasta"), ("r2", "Soup")):
+        write_legacy(tmp_path, f"recipes/{recipe_id}.json", {"title": title})
+    (tmp_path / "recipes" / "recipe_abc.md").write_text("# Pasta")
+    store = SQLiteDocumentStore(":memory:")
+
+    counts = migrate_local_tree(store, str(tmp_path), remove=True)
+
+    assert counts == {"cookbooks": 2, "recipes": 2, "users": 1}
+    assert store.get("users", ["u1"])["u1"]["cookbooks"] == ["c1"]
+    assert store.get("cookbooks", ["c1"])["c1"]["name"] == "Dinners"
+    client = FirebaseClient(local=True, store=store)
+    user = User(user_id="u1", name="", email="", firebase_client=client)
+    titles = sorted(recipe["title"] for recipe in user.get_user_recipes())
+    assert titles == ["Pasta", "Soup"]
+    assert not os.path.exists(tmp_path / "users" / "u1" / "cookbooks" / "c1.json")
+    assert os.path.exists(tmp_path / "recipes" / "recipe_abc.md")
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from metrics import Metrics
+from scraper import throttle
+from scraper.throttle import RequestScheduler
+
+HOST = "www.instagram.com"
+
+
+class FakeClock:
+    """
+    A monotonic clock that only moves when the scheduler sleeps.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(
+        throttle, "time", SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep)
+    )
+    return clock
+
+
+@pytest.fixture
+def metrics(monkeypatch: pytest.MonkeyPatch) -> Metrics:
+    metrics = Metrics(enabled=True)
+    monkeypatch.setattr(throttle, "get_metrics", lambda: metrics)
+    return metrics
+
+
+def test_burst_is_free_and_later_requests_wait_their_turn(
+    clock: FakeClock, metrics: Metrics
+) -> None:
+    scheduler = RequestScheduler(requests_per_minute=10.0, burst=3, jitter=0.0)
+    for _ in range(3):
+        scheduler.acquire(HOST)
+    assert clock.sleeps == []
+    assert "throttled_requests" not in metrics.to_dict()["counters"]
+
+    scheduler.acquire(HOST)
+    scheduler.acquire(HOST)
+    assert clock.sleeps == [pytest.approx(6.0), pytest.approx(6.0)]
+    counters = metrics.to_dict()["counters"]
+    assert counters["throttled_requests"] == 2
+    assert counters["throttle_wait_seconds"] == pytest.approx(12.0)
+
+
+def test_idle_host_refills_up_to_burst(clock: FakeClock, metrics: Metrics) -> None:
+    scheduler = RequestScheduler(requests_per_minute=10.0, burst=2, jitter=0.0)
+    scheduler.acquire(HOST)
+    scheduler.acquire(HOST)
+    clock.now += 600.0
+    assert scheduler.reserve(HOST) == 0.0
+    assert scheduler.reserve(HOST) == 0.0
+    assert scheduler.reserve(HOST) == pytest.approx(6.0)
+    # Other hosts have budgets of their own.
+    assert scheduler.reserve("i.instagram.com") == 0.0
+
+
+def test_backoff_blocks_host_then_resumes_at_sustained_pace(
+    clock: FakeClock, metrics: Metrics
+) -> None:
+    scheduler = RequestScheduler(requests_per_minute=10.0, burst=5, jitter=0.0)
+    scheduler.backoff(HOST, 120.0)
+    assert scheduler.reserve(HOST) == pytest.approx(126.0)
+    assert scheduler.reserve(HOST) == pytest.approx(132.0)
+    assert metrics.to_dict()["counters"]["rate_limited_requests"] == 1
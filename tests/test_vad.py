@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from scraper.audio import SAMPLE_RATE
+from scraper.transcriber import Transcriber
+from scraper.vad import SpeechMap, detect_speech
+
+
+def _clip(seconds: float, tones: list) -> np.ndarray:
+    """
+    Build a quiet noise clip with 1 kHz tone bursts at the given (start, end) times.
+    """
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0.0, 1e-4, int(seconds * SAMPLE_RATE)).astype(np.float32)
+    for start, end in tones:
+        begin, stop = int(start * SAMPLE_RATE), int(end * SAMPLE_RATE)
+        t = np.arange(stop - begin) / SAMPLE_RATE
+        samples[begin:stop] += 0.5 * np.sin(2 * np.pi * 1000.0 * t)
+    return samples
+
+
+def test_detect_speech_finds_tone_bursts_in_silence() -> None:
+    regions = detect_speech(_clip(30.0, [(5.0, 7.0), (20.0, 21.0)]), padding=0.2)
+    assert len(regions) == 2
+    assert regions[0] == pytest.approx((4.8, 7.2), abs=0.05)
+    assert regions[1] == pytest.approx((19.8, 21.2), abs=0.05)
+
+
+def test_detect_speech_bridges_short_gaps_and_drops_blips() -> None:
+    clip = _clip(20.0, [(2.0, 4.0), (4.5, 6.0), (15.0, 15.06)])
+    regions = detect_speech(clip, padding=0.0)
+    assert regions == [pytest.approx((2.0, 6.0), abs=0.05)]
+
+
+def test_detect_speech_on_silence_is_empty() -> None:
+    assert detect_speech(np.zeros(SAMPLE_RATE * 5, dtype=np.float32)) == []
+
+
+def test_speech_map_maps_clip_times_back_to_original() -> None:
+    speech_map = SpeechMap([(5.0, 7.0), (20.0, 21.0)], gap=0.3)
+    assert speech_map.speech_seconds == pytest.approx(3.0)
+    assert speech_map.to_original(0.0) == pytest.approx(5.0)
+    assert speech_map.to_original(1.5) == pytest.approx(6.5)
+    # Times inside the inserted gap stay at the end of the previous region.
+    assert speech_map.to_original(2.1) == pytest.approx(7.0)
+    assert speech_map.to_original(2.3) == pytest.approx(20.0)
+    assert speech_map.to_original(2.8) == pytest.approx(20.5)
+    assert speech_map.to_original(10.0) == pytest.approx(21.0)
+
+
+def test_speech_map_concatenates_regions_with_gaps() -> None:
+    clip = _clip(30.0, [(5.0, 7.0), (20.0, 21.0)])
+    speech_map = SpeechMap([(5.0, 7.0), (20.0, 21.0)], gap=0.3)
+    kept = speech_map.concatenate(clip)
+    assert len(kept) == pytest.approx(3.3 * SAMPLE_RATE, abs=2)
+    gap = kept[2 * SAMPLE_RATE : int(2.3 * SAMPLE_RATE)]
+    assert not gap.any()
+
+
+def test_transcriber_keeps_short_speech_in_long_clip() -> None:
+    transcriber = Transcriber(device="cpu")
+    speech_map = transcriber._speech_map(_clip(60.0, [(10.0, 14.0)]), "clip.wav")
+    assert speech_map is not None
+    assert speech_map.speech_seconds < 6.0
+
+
+def test_transcriber_falls_back_when_almost_no_speech() -> None:
+    transcriber = Transcriber(device="cpu")
+    assert transcriber._speech_map(_clip(60.0, [(10.0, 10.5)]), "clip.wav") is None
+    assert transcriber._speech_map(_clip(60.0, []), "clip.wav") is None